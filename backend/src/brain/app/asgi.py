@@ -0,0 +1,389 @@
+"""
+K.A.O.S. Brain - Async Serving Mode
+Serves the /api/v1/* routes on Starlette with non-blocking LLM calls.
+
+Run with: uvicorn app.asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import orjson
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
+
+from .core.analyzer import CommandAnalyzer
+from .core.cache import AnalysisCache, LLM
+from .core.circuit_breaker import CircuitOpenError
+from .core.llm_client import AsyncOllamaClient
+from .core.singleflight import AsyncSingleFlight
+from .core.tracing import begin_trace, end_trace, span
+from .core.validator import TargetValidator
+from .main import (
+    PROMETHEUS_CONTENT_TYPE,
+    OLLAMA_MODEL,
+    OLLAMA_URL,
+    LLM_INSIGHT_CHARS,
+    analysis_cache,
+    build_llm_layer,
+    cached_analysis,
+    cached_batch_analysis,
+    is_local_client,
+    llm_breaker,
+    llm_prompt,
+    load_rules,
+    metrics,
+    ndjson_line,
+    needs_llm,
+    parse_batch_commands,
+    semantic_lookup,
+    semantic_store,
+    settings,
+)
+
+logger = logging.getLogger("KAOS_BRAIN")
+
+# Bound to the serving event loop in lifespan()
+ollama_client = None
+llm_slots = None
+llm_flight = AsyncSingleFlight()
+
+
+class LLMOverloaded(Exception):
+    """Raised when every LLM slot is taken and the request must not wait."""
+
+
+@asynccontextmanager
+async def llm_slot():
+    """Claim an LLM slot or fail immediately when all are in use."""
+    if llm_slots.locked():
+        raise LLMOverloaded("LLM concurrency limit reached")
+    async with llm_slots:
+        yield
+
+
+def json_response(data, status=200):
+    return Response(
+        orjson.dumps(data), status_code=status, media_type="application/json"
+    )
+
+
+def llm_fallback_note(error: Exception) -> str:
+    """Record a heuristic-only fallback and return its reasoning suffix."""
+    metrics.record_fallback()
+    if isinstance(error, LLMOverloaded):
+        return " | LLM Busy"
+    return " | LLM Offline"
+
+
+async def timed_generate(prompt: str) -> str:
+    """Ollama completion with its latency recorded."""
+    start = time.perf_counter()
+    try:
+        return await ollama_client.generate(prompt)
+    finally:
+        metrics.record_llm_query(time.perf_counter() - start)
+
+
+async def cached_llm_reasoning(command: str, fail_fast: bool = True) -> str:
+    """
+    LLM insight served from the analysis cache when possible.
+    Interactive requests fail fast on overload; batch work waits its turn.
+    """
+    key = AnalysisCache.make_key(LLM, OLLAMA_MODEL, command)
+    reasoning = analysis_cache.get(key)
+    if reasoning is not None:
+        metrics.record_cache_hit()
+        return reasoning
+    metrics.record_cache_miss()
+    reasoning = semantic_lookup(command)
+    if reasoning is not None:
+        return reasoning
+
+    async def fetch():
+        async with (llm_slot() if fail_fast else llm_slots):
+            result = await llm_breaker.call_async(
+                timed_generate, llm_prompt(command)
+            )
+        analysis_cache.set(key, result)
+        # Embedding and the periodic .npz snapshot are blocking work
+        await run_in_threadpool(semantic_store, command, result)
+        return result
+
+    # Identical concurrent prompts share a single in-flight LLM call
+    reasoning, shared = await llm_flight.do(key, fetch)
+    if shared:
+        metrics.record_llm_coalesced()
+    return reasoning
+
+
+async def stream_llm_reasoning(command: str):
+    key = AnalysisCache.make_key(LLM, OLLAMA_MODEL, command)
+    reasoning = analysis_cache.get(key)
+    if reasoning is not None:
+        metrics.record_cache_hit()
+        yield reasoning[:LLM_INSIGHT_CHARS]
+        return
+    metrics.record_cache_miss()
+    reasoning = semantic_lookup(command)
+    if reasoning is not None:
+        yield reasoning[:LLM_INSIGHT_CHARS]
+        return
+    fragments = []
+    async with llm_slot():
+        if not llm_breaker.allow_request():
+            raise CircuitOpenError("LLM circuit open")
+        start = time.perf_counter()
+        try:
+            async for fragment in ollama_client.stream(
+                llm_prompt(command), max_chars=LLM_INSIGHT_CHARS
+            ):
+                fragments.append(fragment)
+                yield fragment
+        except Exception:
+            llm_breaker.record_failure()
+            raise
+        except BaseException:
+            llm_breaker.record_abandoned()
+            raise
+        finally:
+            metrics.record_llm_query(time.perf_counter() - start)
+        llm_breaker.record_success()
+    analysis_cache.set(key, "".join(fragments))
+    await run_in_threadpool(semantic_store, command, "".join(fragments))
+
+
+async def validate_target(command: str):
+    """
+    Scope check. When a poll of the scope file is due, the check runs on
+    a worker thread so a stat or reparse never stalls the event loop.
+    """
+    if TargetValidator.reload_due():
+        return await run_in_threadpool(TargetValidator.validate_target, command)
+    return TargetValidator.validate_target(command)
+
+
+async def health(request):
+    return json_response({"status": "healthy", "mode": "enterprise-hybrid"})
+
+
+async def metrics_report(request):
+    return json_response(metrics.get_metrics())
+
+
+async def prometheus_metrics(request):
+    return Response(
+        metrics.render_prometheus(),
+        headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+    )
+
+
+async def rules_info(request):
+    return json_response(CommandAnalyzer.rules().info())
+
+
+async def rules_reload(request):
+    if not is_local_client(request.client.host if request.client else None):
+        return json_response({"error": "Rule reload is local-only"}, status=403)
+    # Compiled on a worker thread; the event loop keeps serving
+    try:
+        return json_response(await run_in_threadpool(load_rules))
+    except Exception as e:
+        logger.error(f"Rule pack reload failed: {e}")
+        return json_response({"error": f"Rule pack reload failed: {e}"}, status=400)
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency and outcome.
+    Each request is traced; its stage timings go out as Server-Timing.
+    """
+
+    UNTIMED_PATHS = ("/metrics", "/api/v1/metrics")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.UNTIMED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace = begin_trace(on_span=metrics.record_stage)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", trace.server_timing().encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_trace()
+            metrics.record_request(trace.elapsed(), success=status < 400)
+
+
+async def analyze(request):
+    try:
+        with span("decode"):
+            data = orjson.loads(await request.body())
+            command_input = data.get("command", "")
+
+        # 1. Scope Validation
+        with span("validate"):
+            valid_target, msg = await validate_target(command_input)
+        if not valid_target:
+            return json_response({"error": msg}, status=403)
+
+        # 2. Hybrid Engine Analysis (Fast-Path, no blocking I/O)
+        with span("analyze"):
+            analysis = cached_analysis(command_input)
+        response_payload = {
+            "llm_layer": build_llm_layer(command_input, analysis)
+        }
+
+        # 3. LLM Augmentation (awaited, never blocks a worker)
+        if needs_llm(analysis):
+            try:
+                with span("llm"):
+                    llm_reasoning = await cached_llm_reasoning(command_input)
+                response_payload["llm_layer"]["reasoning"] += (
+                    f" | LLM Insight: {llm_reasoning[:LLM_INSIGHT_CHARS]}..."
+                )
+            except Exception as e:
+                logger.error(f"LLM unavailable: {e}")
+                response_payload["llm_layer"]["reasoning"] += llm_fallback_note(e)
+
+        with span("encode"):
+            return json_response(response_payload)
+
+    except Exception as e:
+        logger.error(f"Analysis failed: {e}")
+        return json_response({"error": "Internal Server Error"}, status=500)
+
+
+async def analyze_stream(request):
+    try:
+        with span("decode"):
+            data = orjson.loads(await request.body())
+            command_input = data.get("command", "")
+
+        with span("validate"):
+            valid_target, msg = await validate_target(command_input)
+        if not valid_target:
+            return json_response({"error": msg}, status=403)
+
+        with span("analyze"):
+            analysis = cached_analysis(command_input)
+    except Exception as e:
+        logger.error(f"Analysis failed: {e}")
+        return json_response({"error": "Internal Server Error"}, status=500)
+
+    async def generate():
+        llm_layer = build_llm_layer(command_input, analysis)
+        yield ndjson_line({"event": "analysis", "llm_layer": llm_layer})
+
+        reasoning = llm_layer["reasoning"]
+        if needs_llm(analysis):
+            fragments = []
+            try:
+                async for fragment in stream_llm_reasoning(command_input):
+                    fragments.append(fragment)
+                    yield ndjson_line({"event": "token", "text": fragment})
+                reasoning += f" | LLM Insight: {''.join(fragments)}..."
+            except Exception as e:
+                logger.error(f"LLM unavailable: {e}")
+                note = llm_fallback_note(e)
+                yield ndjson_line(
+                    {"event": "error", "message": note.strip(" |")}
+                )
+                reasoning += note
+
+        yield ndjson_line({"event": "done", "reasoning": reasoning})
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+async def analyze_batch(request):
+    try:
+        with span("decode"):
+            commands = parse_batch_commands(await request.body())
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    async def generate():
+        scope = [await validate_target(c) for c in commands]
+        analyses = cached_batch_analysis(commands)
+        batch_slots = asyncio.Semaphore(settings.BATCH_LLM_CONCURRENCY)
+
+        async def batch_llm_reasoning(command):
+            async with batch_slots:
+                return await cached_llm_reasoning(command, fail_fast=False)
+
+        pending = {}
+        for command, analysis, (valid, _) in zip(commands, analyses, scope):
+            if valid and needs_llm(analysis) and command not in pending:
+                pending[command] = asyncio.ensure_future(
+                    batch_llm_reasoning(command)
+                )
+
+        try:
+            for index, command in enumerate(commands):
+                valid, msg = scope[index]
+                if not valid:
+                    yield ndjson_line({"index": index, "error": msg})
+                    continue
+
+                llm_layer = build_llm_layer(command, analyses[index])
+                if command in pending:
+                    try:
+                        llm_reasoning = await pending[command]
+                        llm_layer["reasoning"] += (
+                            f" | LLM Insight: {llm_reasoning[:LLM_INSIGHT_CHARS]}..."
+                        )
+                    except Exception as e:
+                        logger.error(f"LLM unavailable: {e}")
+                        llm_layer["reasoning"] += llm_fallback_note(e)
+                yield ndjson_line({"index": index, "llm_layer": llm_layer})
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global ollama_client, llm_slots
+    ollama_client = AsyncOllamaClient.from_config(
+        settings, OLLAMA_URL, OLLAMA_MODEL
+    )
+    llm_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    yield
+    await ollama_client.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/v1/health", health, methods=["GET"]),
+        Route("/api/v1/metrics", metrics_report, methods=["GET"]),
+        Route("/metrics", prometheus_metrics, methods=["GET"]),
+        Route("/api/v1/rules", rules_info, methods=["GET"]),
+        Route("/api/v1/rules/reload", rules_reload, methods=["POST"]),
+        Route("/api/v1/analyze", analyze, methods=["POST"]),
+        Route("/api/v1/analyze/stream", analyze_stream, methods=["POST"]),
+        Route("/api/v1/analyze/batch", analyze_batch, methods=["POST"]),
+    ],
+    middleware=[Middleware(RequestMetricsMiddleware)],
+    lifespan=lifespan,
+)
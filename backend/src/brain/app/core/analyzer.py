@@ -3,9 +3,10 @@ K.A.O.S. Hybrid Engine - Command Analyzer
 Implements Regex Heuristics and Risk Assessment.
 """
 
-import re
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from .rules import RiskOverride, RulePack
 
 
 class RiskLevel(Enum):
@@ -24,6 +25,30 @@ class ToolType(Enum):
     UNKNOWN = "unknown"
 
 
+def builtin_rule_spec(
+    destructive_patterns: List[str],
+    intent_map: Dict[str, ToolType],
+    weights: Dict[str, float],
+    whole_words: Set[str],
+) -> Dict[str, Any]:
+    """Express the built-in heuristics as a rule pack spec."""
+    return {
+        "name": "builtin",
+        "version": 0,
+        "destructive_patterns": list(destructive_patterns),
+        "intents": [
+            {
+                "keyword": keyword,
+                "tool": tool.value,
+                "weight": weights.get(keyword, 1.0),
+                "whole_word": keyword in whole_words,
+            }
+            for keyword, tool in intent_map.items()
+        ],
+        "risk_overrides": [],
+    }
+
+
 class CommandAnalyzer:
 
     DESTRUCTIVE_PATTERNS = [
@@ -41,34 +66,130 @@ class CommandAnalyzer:
         "hello": ToolType.CONVERSATION,
         "hi": ToolType.CONVERSATION,
         "ahoj": ToolType.CONVERSATION,
+        "nmap": ToolType.NMAP,
+        "sqlmap": ToolType.SQLMAP,
+        "metasploit": ToolType.METASPLOIT,
+        "msfconsole": ToolType.METASPLOIT,
+    }
+
+    # Explicit keyword weights; keywords not listed weigh 1.0.
+    # Tool names outrank generic verbs ("sqlmap" also contains "map").
+    INTENT_WEIGHTS = {
+        "nmap": 3.0,
+        "sqlmap": 3.0,
+        "metasploit": 3.0,
+        "msfconsole": 3.0,
     }
 
+    # Keywords that only count as whole words ("hi" must not fire on "this")
+    WHOLE_WORD_INTENTS = {"hello", "hi", "ahoj"}
+
+    # Compiled once at import. The active pack is replaced as a whole by
+    # install_rules(); each analysis reads it once, so a swap never
+    # mixes rules from two packs inside one request.
+    BUILTIN_RULES = RulePack(builtin_rule_spec(
+        DESTRUCTIVE_PATTERNS, INTENT_MAP, INTENT_WEIGHTS, WHOLE_WORD_INTENTS
+    ))
+    _rules = BUILTIN_RULES
+
+    @classmethod
+    def rules(cls) -> RulePack:
+        return cls._rules
+
+    @classmethod
+    def install_rules(cls, pack: RulePack) -> None:
+        """Validate a compiled rule pack and make it the active one."""
+        for tool in pack.tools:
+            ToolType(tool)
+        for override in pack.risk_overrides:
+            RiskLevel(override.risk)
+        cls._rules = pack
+
+    @staticmethod
+    def match_destructive(command: str) -> Optional[str]:
+        """Return the destructive pattern matching the command, if any."""
+        return CommandAnalyzer._rules.destructive.search(command)
+
     @staticmethod
     def check_destructive(command: str) -> bool:
-        for pattern in CommandAnalyzer.DESTRUCTIVE_PATTERNS:
-            if re.search(pattern, command, re.IGNORECASE):
-                return True
-        return False
+        return CommandAnalyzer.match_destructive(command) is not None
+
+    @staticmethod
+    def rank_intents(
+        command: str, rules: Optional[RulePack] = None
+    ) -> List[Tuple[ToolType, float]]:
+        """Return candidate tool types ranked by summed keyword weight."""
+        rules = rules or CommandAnalyzer._rules
+        return [
+            (ToolType(tool), score) for tool, score in rules.intents.rank(command)
+        ]
+
+    @staticmethod
+    def identify_tool(
+        command: str, rules: Optional[RulePack] = None
+    ) -> ToolType:
+        """Return the top-ranked tool type of a rule pack (default: active)."""
+        candidates = CommandAnalyzer.rank_intents(command, rules)
+        return candidates[0][0] if candidates else ToolType.UNKNOWN
 
     @staticmethod
     def analyze(command: str) -> Dict[str, Any]:
-        command_lower = command.lower()
+        rules = CommandAnalyzer._rules
 
         # 1. Safety Check
-        if CommandAnalyzer.check_destructive(command):
-            return {
-                "risk": RiskLevel.CRITICAL.value,
-                "tool_type": ToolType.SYSTEM.value,
-                "reasoning": "Destructive command pattern detected.",
-                "allowed": False,
-            }
+        matched_pattern = rules.destructive.search(command)
+        if matched_pattern is not None:
+            return CommandAnalyzer._destructive_analysis(matched_pattern)
+
+        # 2. Fast-Path Intent Detection (single pass over the input)
+        return CommandAnalyzer._intent_analysis(
+            CommandAnalyzer.rank_intents(command, rules),
+            rules.match_override(command),
+        )
+
+    @staticmethod
+    def analyze_batch(commands: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze many commands in one pass.
+        Distinct commands go through the destructive matcher, the keyword
+        index and the override matcher together, one scan each over the
+        whole batch; every position of a duplicate shares its result and
+        output order matches the input.
+        """
+        rules = CommandAnalyzer._rules
+        distinct = list(dict.fromkeys(commands))
+        destructive = rules.destructive.search_many(distinct)
+        ranked = rules.intents.rank_many(distinct)
+        overrides = rules.match_overrides(distinct)
+        results = {}
+        for i, command in enumerate(distinct):
+            if destructive[i] is not None:
+                results[command] = CommandAnalyzer._destructive_analysis(
+                    destructive[i]
+                )
+            else:
+                results[command] = CommandAnalyzer._intent_analysis(
+                    [(ToolType(tool), score) for tool, score in ranked[i]],
+                    overrides[i],
+                )
+        return [results[command] for command in commands]
+
+    @staticmethod
+    def _destructive_analysis(matched_pattern: str) -> Dict[str, Any]:
+        return {
+            "risk": RiskLevel.CRITICAL.value,
+            "tool_type": ToolType.SYSTEM.value,
+            "reasoning": "Destructive command pattern detected.",
+            "allowed": False,
+            "matched_pattern": matched_pattern,
+        }
 
-        # 2. Fast-Path Intent Detection
-        tool_type = ToolType.UNKNOWN
-        for keyword, tool in CommandAnalyzer.INTENT_MAP.items():
-            if keyword in command_lower:
-                tool_type = tool
-                break
+    @staticmethod
+    def _intent_analysis(
+        candidates: List[Tuple[ToolType, float]],
+        override: Optional[RiskOverride],
+    ) -> Dict[str, Any]:
+        tool_type = candidates[0][0] if candidates else ToolType.UNKNOWN
 
         # 3. Construct Analysis
         if tool_type != ToolType.UNKNOWN:
@@ -80,9 +201,23 @@ class CommandAnalyzer:
             "Heuristic analysis identified " + tool_type.value + " intent."
         )
 
-        return {
+        analysis = {
             "risk": risk_val,
             "tool_type": tool_type.value,
             "reasoning": reasoning_text,
             "allowed": True,
+            "intent_candidates": [tool.value for tool, _ in candidates],
         }
+
+        # 4. Rule Pack Risk Overrides
+        if override is not None:
+            analysis["risk"] = override.risk
+            if override.reasoning:
+                analysis["reasoning"] = override.reasoning
+            analysis["allowed"] = (
+                override.allowed
+                if override.allowed is not None
+                else override.risk != RiskLevel.CRITICAL.value
+            )
+            analysis["matched_override"] = override.pattern
+        return analysis
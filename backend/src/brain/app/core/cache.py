@@ -0,0 +1,74 @@
+"""
+K.A.O.S. Hybrid Engine - Analysis Cache
+Bounded LRU cache with per-entry TTL for heuristic and LLM results.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+HEURISTIC = "heuristic"
+LLM = "llm"
+
+
+def normalize_command(command: str) -> str:
+    """Case-fold and collapse whitespace so trivial variants share a key."""
+    return " ".join(command.lower().split())
+
+
+class AnalysisCache:
+    """
+    Thread-safe LRU cache keyed on (namespace, model, normalized command).
+
+    Heuristic and LLM results live under separate namespaces, so a cached
+    heuristic verdict never stands in for an LLM answer. Entries expire
+    after ``ttl`` seconds; the least recently used entry is evicted once
+    ``max_entries`` is reached. A size of 0 disables caching.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(namespace: str, model: str, command: str) -> Tuple:
+        return (namespace, model, normalize_command(command))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
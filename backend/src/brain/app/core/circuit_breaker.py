@@ -0,0 +1,179 @@
+"""
+K.A.O.S. Hybrid Engine - Circuit Breaker
+Fails fast to heuristic-only analysis while the LLM backend is down.
+"""
+
+import threading
+import time
+from enum import Enum
+from typing import Callable, Optional
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow_request`` rejects calls immediately. Once ``cooldown`` seconds
+    have passed a single trial call is let through (half-open); its
+    outcome closes or re-opens the breaker. An optional background probe
+    checks backend health while the breaker is open, so recovery does not
+    have to wait for live traffic.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+        probe_interval: float = 5.0,
+        on_state_change: Optional[Callable[[BreakerState], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.on_state_change = on_state_change
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._prober: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the backend right now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state is BreakerState.CLOSED:
+                return True
+            if self._state is BreakerState.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._transition(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if (
+                self._state is BreakerState.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition(BreakerState.OPEN)
+
+    def record_abandoned(self) -> None:
+        """A cancelled call is neither success nor failure; free the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn through the breaker, raising CircuitOpenError when open."""
+        if not self.allow_request():
+            raise CircuitOpenError("LLM circuit open")
+        succeeded = None
+        try:
+            result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            self._settle(succeeded)
+
+    async def call_async(self, fn: Callable, *args, **kwargs):
+        """Await fn through the breaker, raising CircuitOpenError when open."""
+        if not self.allow_request():
+            raise CircuitOpenError("LLM circuit open")
+        succeeded = None
+        try:
+            result = await fn(*args, **kwargs)
+            succeeded = True
+            return result
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            self._settle(succeeded)
+
+    def _settle(self, succeeded: Optional[bool]) -> None:
+        # None: cancelled or interrupted (any BaseException), so only the
+        # half-open trial is released and the failure count is untouched
+        if succeeded is None:
+            self.record_abandoned()
+        elif succeeded:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _maybe_half_open(self) -> None:
+        if (
+            self._state is BreakerState.OPEN
+            and self._clock() - self._opened_at >= self.cooldown
+        ):
+            self._transition(BreakerState.HALF_OPEN)
+
+    def _transition(self, state: BreakerState) -> None:
+        if state is self._state:
+            return
+        self._state = state
+        if state is BreakerState.OPEN:
+            self._start_prober()
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def _start_prober(self) -> None:
+        if self.probe is None or (self._prober and self._prober.is_alive()):
+            return
+        self._stop.clear()
+        self._prober = threading.Thread(
+            target=self._probe_loop, name="llm-breaker-probe", daemon=True
+        )
+        self._prober.start()
+
+    def _probe_loop(self) -> None:
+        # Runs only while open; a healthy probe moves straight to half-open
+        while not self._stop.wait(self.probe_interval):
+            with self._lock:
+                if self._state is not BreakerState.OPEN:
+                    return
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    if self._state is BreakerState.OPEN:
+                        self._transition(BreakerState.HALF_OPEN)
+                return
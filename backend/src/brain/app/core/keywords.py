@@ -0,0 +1,165 @@
+"""
+K.A.O.S. Hybrid Engine - Keyword Index
+Aho-Corasick automaton for single-pass multi-keyword intent lookup.
+"""
+
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    keyword: str
+    value: Any
+    weight: float
+    start: int
+    end: int
+
+
+class KeywordIndex:
+    """
+    Aho-Corasick keyword index.
+
+    Keywords are added with a payload value, a weight and an optional
+    whole-word flag, then ``build()`` computes the failure links once.
+    ``search`` walks the input a single time regardless of vocabulary size
+    and returns every hit; whole-word keywords are only reported when the
+    surrounding characters are not alphanumeric.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (keyword, value, weight, whole_word) entries ending here
+        self._output: List[List[Tuple[str, Any, float, bool]]] = [[]]
+        self._built = True
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._output)
+
+    def add(
+        self,
+        keyword: str,
+        value: Any,
+        weight: float = 1.0,
+        whole_word: bool = False,
+    ) -> None:
+        """Insert a keyword; call build() before searching again."""
+        keyword = keyword.lower()
+        if not keyword:
+            raise ValueError("Keyword must not be empty")
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((keyword, value, weight, whole_word))
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links breadth-first."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+        self._built = True
+
+    def search(self, text: str) -> List[KeywordHit]:
+        """Return all keyword hits in the text, in order of their end."""
+        if not self._built:
+            self.build()
+
+        text = text.lower()
+        hits = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            match_state = state
+            while match_state:
+                for keyword, value, weight, whole_word in self._output[
+                    match_state
+                ]:
+                    start = index - len(keyword) + 1
+                    if whole_word and not _is_word_bounded(
+                        text, start, index + 1
+                    ):
+                        continue
+                    hits.append(
+                        KeywordHit(keyword, value, weight, start, index + 1)
+                    )
+                match_state = self._fail[match_state]
+        return hits
+
+    def rank(self, text: str) -> List[Tuple[Any, float]]:
+        """
+        Aggregate hits per value and rank them by summed weight.
+        Ties go to the value whose first hit appears earliest.
+        """
+        return _rank_hits(self.search(text))
+
+    def rank_many(self, texts: List[str]) -> List[List[Tuple[Any, float]]]:
+        """
+        ``rank`` for many texts with a single walk of the automaton.
+        Texts are joined with newlines, which bound whole words like the
+        ends of a text; hits are assigned back to their text by offset.
+        """
+        texts = [text.lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        grouped: List[List[KeywordHit]] = [[] for _ in texts]
+        for hit in self.search("\n".join(texts)):
+            index = bisect_right(starts, hit.start) - 1
+            base = starts[index]
+            if hit.end - base <= len(texts[index]):
+                grouped[index].append(KeywordHit(
+                    hit.keyword, hit.value, hit.weight,
+                    hit.start - base, hit.end - base,
+                ))
+        return [_rank_hits(hits) for hits in grouped]
+
+
+def _rank_hits(hits: List[KeywordHit]) -> List[Tuple[Any, float]]:
+    scores: Dict[Any, float] = {}
+    first_seen: Dict[Any, int] = {}
+    for hit in hits:
+        scores[hit.value] = scores.get(hit.value, 0.0) + hit.weight
+        first_seen[hit.value] = min(
+            first_seen.get(hit.value, hit.start), hit.start
+        )
+    return sorted(
+        scores.items(),
+        key=lambda item: (-item[1], first_seen[item[0]]),
+    )
+
+
+def _is_word_bounded(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else ""
+    after = text[end] if end < len(text) else ""
+    return not (before.isalnum() or before == "_") and not (
+        after.isalnum() or after == "_"
+    )
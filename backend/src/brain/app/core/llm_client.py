@@ -0,0 +1,258 @@
+"""
+K.A.O.S. Hybrid Engine - LLM Client
+Pooled keep-alive HTTP client for the Ollama generate API.
+"""
+
+import json
+import socket
+from typing import AsyncIterator, Iterator, Optional
+from urllib.parse import urljoin
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    retry,
+    stop_after_attempt,
+    wait_random_exponential,
+    retry_if_exception_type,
+)
+from urllib3.connection import HTTPConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled sockets."""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+class OllamaClient:
+    """
+    Ollama client backed by a pooled requests.Session.
+
+    Connections are reused across requests and retries, connect and read
+    timeouts are separate, and connection failures are retried with
+    full-jitter exponential backoff instead of a fixed wait.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        retries: int = 3,
+        pool_size: int = 10,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 4.0,
+    ):
+        self.url = url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.health_url = urljoin(url, "/api/tags")
+
+        self.session = requests.Session()
+        adapter = KeepAliveAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        retrying = retry(
+            stop=stop_after_attempt(retries),
+            wait=wait_random_exponential(
+                multiplier=backoff_initial, max=backoff_max
+            ),
+            retry=retry_if_exception_type(
+                requests.exceptions.ConnectionError
+            ),
+        )
+        self._generate_with_retry = retrying(self._generate)
+        self._open_stream_with_retry = retrying(self._open_stream)
+
+    @classmethod
+    def from_config(cls, config, url: str, model: str) -> "OllamaClient":
+        return cls(
+            url,
+            model,
+            connect_timeout=config.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout=config.OLLAMA_TIMEOUT,
+            retries=config.OLLAMA_RETRIES,
+            pool_size=config.OLLAMA_POOL_SIZE,
+            backoff_initial=config.OLLAMA_BACKOFF_INITIAL,
+            backoff_max=config.OLLAMA_BACKOFF_MAX,
+        )
+
+    def generate(self, prompt: str) -> str:
+        """Return the full completion for a prompt."""
+        return self._generate_with_retry(prompt)
+
+    def stream(
+        self, prompt: str, max_chars: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Yield completion fragments from Ollama's NDJSON stream.
+
+        Once ``max_chars`` characters have been yielded the response is
+        closed, which drops the connection and makes Ollama stop
+        generating tokens nobody will read.
+        """
+        response = self._open_stream_with_retry(prompt)
+        try:
+            emitted = 0
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                fragment = chunk.get("response", "")
+                if max_chars is not None and emitted + len(fragment) >= max_chars:
+                    yield fragment[: max_chars - emitted]
+                    return
+                if fragment:
+                    emitted += len(fragment)
+                    yield fragment
+                if chunk.get("done"):
+                    return
+        finally:
+            response.close()
+
+    def ping(self) -> bool:
+        """Cheap liveness check against Ollama's model listing."""
+        try:
+            response = self.session.get(
+                self.health_url, timeout=self.timeout[0]
+            )
+            return response.ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _generate(self, prompt: str) -> str:
+        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        response = self.session.post(
+            self.url, json=payload, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json().get("response", "")
+
+    def _open_stream(self, prompt: str) -> requests.Response:
+        payload = {"model": self.model, "prompt": prompt, "stream": True}
+        response = self.session.post(
+            self.url, json=payload, timeout=self.timeout, stream=True
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response
+
+
+class AsyncOllamaClient:
+    """
+    Non-blocking Ollama client for the ASGI server.
+
+    Mirrors OllamaClient on top of a pooled httpx.AsyncClient, so waiting
+    on the model never ties up an event-loop thread.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        retries: int = 3,
+        pool_size: int = 10,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 4.0,
+    ):
+        self.url = url
+        self.model = model
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+
+        retrying = retry(
+            stop=stop_after_attempt(retries),
+            wait=wait_random_exponential(
+                multiplier=backoff_initial, max=backoff_max
+            ),
+            retry=retry_if_exception_type(
+                (httpx.ConnectError, httpx.ConnectTimeout)
+            ),
+        )
+        self._generate_with_retry = retrying(self._generate)
+        self._open_stream_with_retry = retrying(self._open_stream)
+
+    @classmethod
+    def from_config(cls, config, url: str, model: str) -> "AsyncOllamaClient":
+        return cls(
+            url,
+            model,
+            connect_timeout=config.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout=config.OLLAMA_TIMEOUT,
+            retries=config.OLLAMA_RETRIES,
+            pool_size=config.OLLAMA_POOL_SIZE,
+            backoff_initial=config.OLLAMA_BACKOFF_INITIAL,
+            backoff_max=config.OLLAMA_BACKOFF_MAX,
+        )
+
+    async def generate(self, prompt: str) -> str:
+        """Return the full completion for a prompt."""
+        return await self._generate_with_retry(prompt)
+
+    async def stream(
+        self, prompt: str, max_chars: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Async counterpart of OllamaClient.stream()."""
+        response = await self._open_stream_with_retry(prompt)
+        try:
+            emitted = 0
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                fragment = chunk.get("response", "")
+                if max_chars is not None and emitted + len(fragment) >= max_chars:
+                    yield fragment[: max_chars - emitted]
+                    return
+                if fragment:
+                    emitted += len(fragment)
+                    yield fragment
+                if chunk.get("done"):
+                    return
+        finally:
+            await response.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def _generate(self, prompt: str) -> str:
+        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        response = await self.client.post(self.url, json=payload)
+        response.raise_for_status()
+        return response.json().get("response", "")
+
+    async def _open_stream(self, prompt: str) -> httpx.Response:
+        payload = {"model": self.model, "prompt": prompt, "stream": True}
+        request = self.client.build_request("POST", self.url, json=payload)
+        response = await self.client.send(request, stream=True)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            await response.aclose()
+            raise
+        return response
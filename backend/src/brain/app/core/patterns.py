@@ -0,0 +1,148 @@
+"""
+K.A.O.S. Hybrid Engine - Pattern Matcher
+Compiles a regex blocklist into a single alternation matcher.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Backreferences, named groups and leading global flags do not survive being
+# spliced into a shared alternation; such patterns stay standalone.
+_UNMERGEABLE = re.compile(r"\\[1-9]|\(\?P[=<]|^\(\?[aiLmsux]+\)")
+
+# Anchors and lookbehinds see the neighbouring text once inputs are joined,
+# so matchers using them scan each input on its own in ``search_many``.
+_POSITIONAL = re.compile(r"(?<!\[)\^|(?<!\\)\$|\\[AZ]|\(\?<[=!]")
+
+
+def read_pattern_file(path: str) -> List[str]:
+    """Read one regex per line, skipping blank lines and '#' comments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [
+            line.strip()
+            for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+class PatternMatcher:
+    """
+    Multi-pattern matcher backed by one precompiled alternation.
+
+    Every source pattern is wrapped in its own named group, so a single
+    ``search`` scans the input once and ``match.lastgroup`` tells which
+    pattern fired. Adding patterns recompiles the alternation once at load
+    time; the per-request cost stays a single regex search.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), flags: int = re.IGNORECASE):
+        self.flags = flags
+        self._patterns: List[str] = []
+        self._compiled: Optional[re.Pattern] = None
+        self._merged: List[int] = []
+        self._standalone: List[Tuple[int, re.Pattern]] = []
+        self._positional = False
+        self.add_patterns(patterns)
+
+    @property
+    def patterns(self) -> List[str]:
+        return list(self._patterns)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add_patterns(self, patterns: Iterable[str]) -> None:
+        """Validate and append patterns, then rebuild the alternation."""
+        added = False
+        for pattern in patterns:
+            # Fail on the offending pattern, not on the combined expression
+            re.compile(pattern, self.flags)
+            if pattern not in self._patterns:
+                self._patterns.append(pattern)
+                added = True
+        if added:
+            self._compile()
+
+    def load_file(self, path: str) -> int:
+        """
+        Load extra patterns from a file, one regex per line.
+        Blank lines and lines starting with '#' are ignored.
+        Returns the number of patterns read from the file.
+        """
+        patterns = read_pattern_file(path)
+        self.add_patterns(patterns)
+        return len(patterns)
+
+    def search(self, text: str) -> Optional[str]:
+        """Return the source pattern of the leftmost match, or None."""
+        if self._compiled is not None:
+            match = self._compiled.search(text)
+            if match is not None:
+                return self._patterns[int(match.lastgroup[1:])]
+        for index, compiled in self._standalone:
+            if compiled.search(text):
+                return self._patterns[index]
+        return None
+
+    def search_many(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        ``search`` for many texts with one scan of their concatenation.
+        Texts are joined with newlines and every hit is mapped back to its
+        text by offset. A hit that crosses a boundary is discarded and the
+        texts it touched (or any text containing a newline) are searched
+        on their own, so results always equal per-text ``search``.
+        """
+        if self._positional or len(texts) < 2:
+            return [self.search(text) for text in texts]
+
+        joined = "\n".join(texts)
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        recheck: Set[int] = {i for i, text in enumerate(texts) if "\n" in text}
+
+        def scan(compiled: re.Pattern) -> dict:
+            found = {}
+            for match in compiled.finditer(joined):
+                index = bisect_right(starts, match.start()) - 1
+                if match.end() > starts[index] + len(texts[index]):
+                    last = bisect_left(starts, match.end())
+                    recheck.update(range(index, last))
+                elif index not in found:
+                    found[index] = match
+            return found
+
+        results: List[Optional[str]] = [None] * len(texts)
+        if self._compiled is not None:
+            for index, match in scan(self._compiled).items():
+                results[index] = self._patterns[int(match.lastgroup[1:])]
+        for pattern_index, compiled in self._standalone:
+            for index in scan(compiled):
+                if results[index] is None:
+                    results[index] = self._patterns[pattern_index]
+        for index in recheck:
+            results[index] = self.search(texts[index])
+        return results
+
+    def _compile(self) -> None:
+        self._positional = any(_POSITIONAL.search(p) for p in self._patterns)
+        self._merged = []
+        self._standalone = []
+        for index, pattern in enumerate(self._patterns):
+            if _UNMERGEABLE.search(pattern):
+                self._standalone.append(
+                    (index, re.compile(pattern, self.flags))
+                )
+            else:
+                self._merged.append(index)
+
+        if not self._merged:
+            self._compiled = None
+            return
+        alternation = "|".join(
+            f"(?P<p{index}>{self._patterns[index]})" for index in self._merged
+        )
+        self._compiled = re.compile(alternation, self.flags)
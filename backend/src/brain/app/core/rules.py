@@ -0,0 +1,231 @@
+"""
+K.A.O.S. Hybrid Engine - Rule Packs
+Versioned analyzer heuristics loaded from JSON/YAML, parsed once and cached.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import stat
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .keywords import KeywordIndex
+from .patterns import PatternMatcher
+
+try:
+    import yaml
+except ImportError:  # JSON packs still work without PyYAML
+    yaml = None
+
+logger = logging.getLogger("KAOS_BRAIN")
+
+# Bump when RulePack's pickled layout changes; old artifacts are ignored
+ARTIFACT_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class RiskOverride:
+    """Forces the risk (and optionally verdict) of matching commands."""
+
+    pattern: str
+    risk: str
+    reasoning: Optional[str] = None
+    allowed: Optional[bool] = None
+
+
+def spec_digest(spec: Dict[str, Any]) -> str:
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RulePack:
+    """
+    Compiled analyzer heuristics.
+
+    A pack is built once from its spec (destructive patterns, intent
+    keywords, risk overrides) and never mutated afterwards, so it can be
+    shared by concurrent requests and replaced by assigning a new pack.
+
+    Spec layout (JSON or YAML)::
+
+        name: engagement-42
+        version: 3
+        destructive_patterns: ["rm\\\\s+-rf", ...]
+        intents:
+          - {keyword: nmap, tool: nmap, weight: 3.0}
+          - {keyword: hi, tool: conversation, whole_word: true}
+        risk_overrides:
+          - {pattern: "--os-shell", risk: HIGH, reasoning: "..."}
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = self.validate(spec)
+        self.name = str(self.spec.get("name", "unnamed"))
+        self.version = self.spec.get("version", 0)
+        self.digest = spec_digest(self.spec)
+
+        self.destructive = PatternMatcher(self.spec["destructive_patterns"])
+
+        self.intents = KeywordIndex()
+        for intent in self.spec["intents"]:
+            self.intents.add(
+                intent["keyword"],
+                intent["tool"],
+                weight=float(intent.get("weight", 1.0)),
+                whole_word=bool(intent.get("whole_word", False)),
+            )
+        self.intents.build()
+
+        self.risk_overrides = [
+            RiskOverride(**override) for override in self.spec["risk_overrides"]
+        ]
+        self._overrides = {o.pattern: o for o in self.risk_overrides}
+        self._override_matcher = PatternMatcher(list(self._overrides))
+
+    @staticmethod
+    def validate(spec: Any) -> Dict[str, Any]:
+        """Check the spec's shape and fill in optional sections."""
+        if not isinstance(spec, dict):
+            raise ValueError("Rule pack must be a mapping")
+        spec = dict(spec)
+        for section in ("destructive_patterns", "intents", "risk_overrides"):
+            spec.setdefault(section, [])
+            if not isinstance(spec[section], list):
+                raise ValueError(f"Rule pack '{section}' must be a list")
+        if not all(isinstance(p, str) for p in spec["destructive_patterns"]):
+            raise ValueError("Destructive patterns must be strings")
+        for intent in spec["intents"]:
+            if not isinstance(intent, dict) or not {"keyword", "tool"} <= set(intent):
+                raise ValueError(f"Intent needs 'keyword' and 'tool': {intent}")
+        for override in spec["risk_overrides"]:
+            if not isinstance(override, dict) or not {"pattern", "risk"} <= set(override):
+                raise ValueError(f"Risk override needs 'pattern' and 'risk': {override}")
+        return spec
+
+    @property
+    def tools(self) -> List[str]:
+        return sorted({intent["tool"] for intent in self.spec["intents"]})
+
+    def match_override(self, command: str) -> Optional[RiskOverride]:
+        pattern = self._override_matcher.search(command)
+        return None if pattern is None else self._overrides[pattern]
+
+    def match_overrides(self, commands: List[str]) -> List[Optional[RiskOverride]]:
+        """``match_override`` for many commands in one matcher scan."""
+        return [
+            None if pattern is None else self._overrides[pattern]
+            for pattern in self._override_matcher.search_many(commands)
+        ]
+
+    def with_patterns(self, patterns: Iterable[str]) -> "RulePack":
+        """A new pack with extra destructive patterns appended."""
+        spec = dict(self.spec)
+        spec["destructive_patterns"] = list(spec["destructive_patterns"]) + [
+            p for p in patterns if p not in spec["destructive_patterns"]
+        ]
+        return RulePack(spec)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "digest": self.digest,
+            "destructive_patterns": len(self.destructive),
+            "intents": len(self.spec["intents"]),
+            "risk_overrides": len(self.risk_overrides),
+        }
+
+
+def parse_rule_file(path: str, raw: bytes) -> Dict[str, Any]:
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise RuntimeError("PyYAML is required for YAML rule packs")
+        return yaml.safe_load(raw)
+    return json.loads(raw)
+
+
+def default_cache_dir() -> str:
+    """Per-user artifact directory, ``$XDG_CACHE_HOME/kaos/rules``."""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "kaos", "rules")
+
+
+def _private(st: os.stat_result) -> bool:
+    """Owned by this user and writable by no one else."""
+    return st.st_uid == os.geteuid() and not st.st_mode & 0o022
+
+
+def private_cache_dir(path: str) -> bool:
+    """
+    Create ``path`` with mode 0700 if missing. True if it is a real
+    directory that only this user can write to, the only kind whose
+    pickles may be loaded.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as e:
+        logger.warning(f"Rule artifact cache unavailable: {e}")
+        return False
+    if not stat.S_ISDIR(st.st_mode) or not _private(st):
+        logger.warning(
+            f"Not using rule artifact cache {path}: it must be a directory "
+            "owned by the current user and not group or world writable"
+        )
+        return False
+    return True
+
+
+def load_rule_pack(
+    path: str, cache_dir: Optional[str] = None
+) -> Tuple[RulePack, bool]:
+    """
+    Load a rule pack, reusing a cached artifact when one exists.
+
+    Artifacts are pickles named after the SHA-256 of the file contents
+    (plus artifact format and Python version), so an unchanged pack skips
+    parsing, validation and keyword automaton construction on restart.
+    Compiled regexes pickle as their source, so the pattern matchers are
+    still recompiled when an artifact loads. Returns
+    (pack, loaded_from_cache). Since unpickling runs code, the cache is
+    skipped unless ``private_cache_dir`` accepts the directory, and
+    artifacts not owned by this user are never loaded.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    key = hashlib.sha256(
+        f"{ARTIFACT_FORMAT}:{sys.version_info[:2]}:".encode() + raw
+    ).hexdigest()
+    artifact = None
+    if cache_dir and private_cache_dir(cache_dir):
+        artifact = os.path.join(cache_dir, f"{key}.pickle")
+
+    if artifact and os.path.exists(artifact):
+        try:
+            with open(artifact, "rb") as f:
+                st = os.fstat(f.fileno())
+                if not stat.S_ISREG(st.st_mode) or not _private(st):
+                    raise ValueError("not a private regular file")
+                pack = pickle.load(f)
+            if isinstance(pack, RulePack):
+                return pack, True
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable rule artifact {artifact}: {e}")
+
+    pack = RulePack(parse_rule_file(path, raw))
+    if artifact:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(pack, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, artifact)
+        except OSError as e:
+            logger.warning(f"Could not cache rule artifact: {e}")
+    return pack, False
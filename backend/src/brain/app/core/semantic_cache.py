@@ -0,0 +1,280 @@
+"""
+K.A.O.S. Hybrid Engine - Semantic Cache
+Near-duplicate prompt lookup over hashed n-gram vectors held in NumPy.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .cache import normalize_command
+from .validator import TOOL_ARGS
+
+logger = logging.getLogger("KAOS_BRAIN")
+
+# 3: natural-language prompts are embedded whole, tool lines by argument
+SNAPSHOT_FORMAT = 3
+
+# First words that make a prompt a tool invocation even without flags
+TOOL_NAMES = frozenset(TOOL_ARGS) | {
+    "hashcat", "john", "msfconsole", "msfvenom", "searchsploit",
+}
+
+# Words that carry no intent, and operator synonyms folded together
+STOPWORDS = frozenset({
+    "a", "all", "an", "for", "my", "of", "on", "please", "some", "that",
+    "the", "this", "to",
+})
+SYNONYMS = {
+    "box": "host", "boxes": "host", "hosts": "host", "machine": "host",
+    "server": "host", "servers": "host", "system": "host",
+    "target": "host", "targets": "host",
+    "ports": "port", "scanning": "scan", "scans": "scan", "sweep": "scan",
+    "enumerate": "scan",
+}
+# Command-line flags change meaning wholesale ("-sV" vs "-sC")
+FLAG_WEIGHT = 3.0
+
+
+def command_signature(text: str) -> Tuple[str, str]:
+    """
+    Split a prompt into (signature, compared text).
+
+    A tool invocation (a known tool first, or any flag) has the tool plus
+    its sorted, de-duplicated flags as signature, which must match exactly
+    for a semantic hit: ``--os-shell`` or ``--script vuln`` is a different
+    request, however similar the rest of the line looks. Only the
+    remaining arguments are compared fuzzily. Natural-language prompts
+    share the empty signature and are compared whole, so "port scan
+    target" can still find "scan the box".
+    """
+    words = normalize_command(text).split()
+    flags = sorted({word for word in words[1:] if word.startswith("-")})
+    if not words or (not flags and words[0] not in TOOL_NAMES):
+        return "", " ".join(words)
+    arguments = [word for word in words[1:] if not word.startswith("-")]
+    return " ".join([words[0]] + flags), " ".join(arguments)
+
+
+def _signature_id(signature: str) -> int:
+    return zlib.crc32(signature.encode("utf-8"))
+
+
+class HashingVectorizer:
+    """
+    Stateless text embedder: word unigrams plus character n-grams of each
+    word, hashed (CRC32, signed) into ``dim`` buckets and L2-normalized.
+    Stopwords are dropped, synonyms folded, and flags only match exactly.
+
+    Needs no model download or vocabulary, and equal text always maps to
+    the same vector, so snapshots stay valid across restarts.
+    """
+
+    def __init__(self, dim: int = 1024, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def features(self, text: str) -> Iterator[Tuple[str, float]]:
+        for word in normalize_command(text).split():
+            if word in STOPWORDS:
+                continue
+            if word.startswith("-"):
+                yield "f:" + word, FLAG_WEIGHT
+                continue
+            word = SYNONYMS.get(word, word)
+            yield "w:" + word, 1.0
+            padded = f"<{word}>"
+            for start in range(max(1, len(padded) - self.ngram + 1)):
+                yield "c:" + padded[start:start + self.ngram], 1.0
+
+    def transform(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dim] += sign * weight
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """
+    Bounded nearest-neighbour cache for LLM reasoning.
+
+    Prompt vectors live in one preallocated ``max_entries x dim`` float32
+    matrix, so memory is fixed up front and a lookup is a single
+    matrix-vector product. A hit needs the same ``command_signature``
+    (tool and flag set, or none for natural language) and a cosine
+    similarity of the compared text of at least ``threshold``. When full, the least recently used row is
+    overwritten; rows older than ``ttl`` seconds are ignored and reused
+    first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        threshold: float = 0.8,
+        ttl: float = 86400.0,
+        vectorizer: Optional[HashingVectorizer] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        dim = self.vectorizer.dim
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        # Wall-clock times so they survive a snapshot round trip
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._used = np.zeros(max_entries, dtype=np.float64)
+        self._prompts = [""] * max_entries
+        self._signatures = [""] * max_entries
+        # CRC32 of each signature, to mask candidate rows in one pass
+        self._signature_ids = np.zeros(max_entries, dtype=np.int64)
+        self._values = [""] * max_entries
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._live.sum())
+
+    def lookup(self, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return (cached value, similarity) of the nearest prompt, or None."""
+        if self.max_entries == 0:
+            return None
+        signature, arguments = command_signature(prompt)
+        vector = self.vectorizer.transform(arguments)
+        key = normalize_command(prompt)
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            slot = self._slots.get(key)
+            if slot is not None and self._live[slot]:
+                self._used[slot] = now
+                return self._values[slot], 1.0
+            candidates = self._live & (self._signature_ids == _signature_id(signature))
+            if not candidates.any():
+                return None
+            scores = self._vectors @ vector
+            scores[~candidates] = -1.0
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold or self._signatures[best] != signature:
+                return None
+            self._used[best] = now
+            return self._values[best], score
+
+    def add(self, prompt: str, value: str) -> None:
+        if self.max_entries == 0:
+            return
+        signature, arguments = command_signature(prompt)
+        vector = self.vectorizer.transform(arguments)
+        now = self._clock()
+        key = normalize_command(prompt)
+        with self._lock:
+            self._expire(now)
+            slot = self._slots.get(key)
+            if slot is None or not self._live[slot]:
+                free = np.flatnonzero(~self._live)
+                slot = int(free[0]) if free.size else int(np.argmin(self._used))
+                self._slots.pop(self._prompts[slot], None)
+                self._slots[key] = slot
+            self._vectors[slot] = vector
+            self._prompts[slot] = key
+            self._signatures[slot] = signature
+            self._signature_ids[slot] = _signature_id(signature)
+            self._values[slot] = value
+            self._created[slot] = now
+            self._used[slot] = now
+            self._live[slot] = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._live[:] = False
+            self._slots.clear()
+
+    def _expire(self, now: float) -> None:
+        if self.ttl:
+            self._live &= self._created > now - self.ttl
+
+    def save(self, path: str, tag: str = "") -> int:
+        """
+        Write live entries to an .npz snapshot (atomic replace).
+        ``tag`` (e.g. the model name) must match when loading.
+        """
+        with self._lock:
+            live = np.flatnonzero(self._live)
+            payload = {
+                "format": np.array(SNAPSHOT_FORMAT),
+                "tag": np.array(tag),
+                "dim": np.array(self.vectorizer.dim),
+                "vectors": self._vectors[live].copy(),
+                "created": self._created[live].copy(),
+                "used": self._used[live].copy(),
+                "prompts": np.array([self._prompts[i] for i in live], dtype=str),
+                "values": np.array([self._values[i] for i in live], dtype=str),
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(live)
+
+    def load(self, path: str, tag: str = "") -> int:
+        """Restore a snapshot; mismatched or unreadable ones are skipped."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if (
+                    int(data["format"]) != SNAPSHOT_FORMAT
+                    or str(data["tag"]) != tag
+                    or int(data["dim"]) != self.vectorizer.dim
+                ):
+                    logger.warning(f"Ignoring incompatible semantic snapshot {path}")
+                    return 0
+                # Most recently used entries win when the snapshot is larger
+                order = np.argsort(data["used"])[::-1][: self.max_entries]
+                vectors = data["vectors"][order]
+                created = data["created"][order]
+                used = data["used"][order]
+                prompts = data["prompts"][order].tolist()
+                values = data["values"][order].tolist()
+        except FileNotFoundError:
+            return 0
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable semantic snapshot {path}: {e}")
+            return 0
+
+        count = len(order)
+        with self._lock:
+            self._live[:] = False
+            self._vectors[:count] = vectors
+            self._created[:count] = created
+            self._used[:count] = used
+            self._prompts[:count] = prompts
+            for slot, prompt in enumerate(prompts):
+                signature = command_signature(prompt)[0]
+                self._signatures[slot] = signature
+                self._signature_ids[slot] = _signature_id(signature)
+            self._values[:count] = values
+            self._live[:count] = True
+            self._slots = {prompt: slot for slot, prompt in enumerate(prompts)}
+            self._expire(self._clock())
+            return int(self._live.sum())
@@ -0,0 +1,123 @@
+"""
+K.A.O.S. Hybrid Engine - Single-Flight
+Coalesces identical concurrent calls into one in-flight execution.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-based duplicate call suppression.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving while it is in flight block until it finishes and receive
+    the same result or exception. Nothing is remembered afterwards, so
+    this composes with, rather than replaces, the analysis cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self, key: Hashable, fn: Callable[..., Any], *args, **kwargs
+    ) -> Tuple[Any, bool]:
+        """Run fn once per key; return (result, shared_with_leader)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Event-loop counterpart of SingleFlight for coroutine functions.
+
+    The call runs as its own task and every caller, leader included,
+    awaits it through ``asyncio.shield``: a caller that is cancelled
+    (a client disconnect, a cancelled batch) only stops waiting, and the
+    others still get the result. The task itself is cancelled once no
+    callers are left.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Await fn once per key; return (result, shared_with_leader)."""
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _AsyncCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(
+                lambda task: self._finished(key, call)
+            )
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Abandoned: later callers must start a fresh call
+                self._forget(key, call)
+                call.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _AsyncCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _AsyncCall) -> None:
+        self._forget(key, call)
+        if not call.task.cancelled():
+            # Mark retrieved so an error nobody awaited does not warn
+            call.task.exception()
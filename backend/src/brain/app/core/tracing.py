@@ -0,0 +1,185 @@
+"""
+K.A.O.S. Hybrid Engine - Request Tracing
+Per-stage request spans, Server-Timing headers and slow-request profiling.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar(
+    "kaos_request_trace", default=None
+)
+
+
+class RequestTrace:
+    """
+    Wall-clock spans for the stages of one request.
+
+    Spans with the same name are summed (a batch validates many
+    commands) and reported in first-seen order. ``on_span`` is called
+    with (name, seconds) as each span closes, e.g. to feed histograms.
+    """
+
+    def __init__(
+        self,
+        on_span: Optional[Callable[[str, float], None]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.on_span = on_span
+        self._clock = clock
+        self.started = clock()
+        self.spans: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            duration = self._clock() - start
+            self.spans[name] = self.spans.get(name, 0.0) + duration
+            if self.on_span is not None:
+                self.on_span(name, duration)
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        entries = [
+            f"{name};dur={duration * 1000:.3f}"
+            for name, duration in self.spans.items()
+        ]
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+
+def begin_trace(
+    on_span: Optional[Callable[[str, float], None]] = None
+) -> RequestTrace:
+    """Start a trace and make it current for this request's context."""
+    trace = RequestTrace(on_span)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace() -> None:
+    _current_trace.set(None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def span(name: str):
+    """Time a stage of the current request; a no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.span(name)
+
+
+def fold_stack(frame) -> str:
+    """Collapse a frame chain into flamegraph.pl folded-stack form."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for slow requests.
+
+    While at least one request is tracked, a single daemon thread samples
+    the stacks of the tracked threads every ``interval`` seconds via
+    ``sys._current_frames``. When a request finishes above
+    ``slow_threshold`` seconds its samples are written to ``output_dir``
+    as folded stacks, ready for flamegraph.pl or speedscope.
+
+    Sampling is per OS thread, so it suits the threaded Flask server.
+    Greenlets under gevent and tasks on one event loop share a thread
+    and cannot be told apart.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float,
+        interval: float = 0.005,
+        output_dir: str = "/tmp/kaos-profiles",
+    ):
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._samples: Dict[int, Counter] = {}
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> int:
+        """Begin sampling the calling thread; returns its tracking id."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._samples[ident] = Counter()
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample_loop, name="kaos-profiler", daemon=True
+                )
+                self._sampler.start()
+        return ident
+
+    def stop(self, ident: int, duration: float, label: str) -> Optional[str]:
+        """Stop sampling; dump and return the profile path if slow."""
+        with self._lock:
+            samples = self._samples.pop(ident, None)
+        if not samples or duration < self.slow_threshold:
+            return None
+        return self._dump(samples, duration, label)
+
+    def discard(self, ident: int) -> None:
+        """Drop a request's samples without dumping them."""
+        with self._lock:
+            self._samples.pop(ident, None)
+
+    def _dump(self, samples: Counter, duration: float, label: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "request"
+        path = os.path.join(
+            self.output_dir,
+            f"{int(time.time() * 1000)}-{slug}-{int(duration * 1000)}ms.folded",
+        )
+        with open(path, "w") as handle:
+            for stack, count in samples.most_common():
+                handle.write(f"{stack} {count}\n")
+        return path
+
+    def _sample_loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._samples:
+                    # Idle: exit, start() spawns a new sampler on demand
+                    self._sampler = None
+                    return
+                idents = list(self._samples)
+            frames = sys._current_frames()
+            stacks = {
+                ident: fold_stack(frames[ident])
+                for ident in idents
+                if ident in frames
+            }
+            with self._lock:
+                for ident, stack in stacks.items():
+                    samples = self._samples.get(ident)
+                    if samples is not None:
+                        samples[stack] += 1
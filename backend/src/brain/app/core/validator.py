@@ -1,15 +1,444 @@
 """
 Backend Validator Module
-Implements permissive scope for unrestricted penetration testing.
+Checks command targets against the engagement scope file.
+
+Without a scope file the validator stays permissive (Pentest Mode).
 """
 
+import ipaddress
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("KAOS_SCOPE")
+
+# Scope file; checked for changes at most every SCOPE_RELOAD_INTERVAL seconds
+SCOPE_FILE = os.getenv("KAOS_SCOPE_FILE", "")
+SCOPE_RELOAD_INTERVAL = 1.0
+
+TOKEN_SPLIT = re.compile(r"[\s'\"`,;|&()<>=]+")
+SEGMENT_SPLIT = re.compile(r"[;|&()`\n]+")
+DOMAIN_RE = re.compile(
+    r"^(?=.{1,253}$)(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$"
+)
+# nmap-style last-octet range: 10.0.0.1-50
+OCTET_RANGE_RE = re.compile(r"^(\d{1,3}\.\d{1,3}\.\d{1,3}\.)(\d{1,3})-(\d{1,3})$")
+
+
+class ToolArgs(NamedTuple):
+    """Where a tool takes its hosts on the command line."""
+
+    # Bare arguments are hosts (nmap 10.0.0.1, ssh root@host)
+    positional: bool = False
+    # Options whose value is a host or URL (gobuster -u, amass -d)
+    host_options: FrozenSet[str] = frozenset()
+    # Other options that take a value, which is never a host
+    value_options: FrozenSet[str] = frozenset()
+
+
+def _tool(positional=False, hosts="", values=""):
+    return ToolArgs(positional, frozenset(hosts.split()), frozenset(values.split()))
+
+
+# Bare host names are only taken from the arguments of these tools;
+# URLs and IP literals count in any command
+TOOL_ARGS: Dict[str, ToolArgs] = {
+    "nmap": _tool(True, values=(
+        "-oN -oX -oG -oA -oS -iL -iR -p -e -g -S --script --script-args "
+        "--exclude --excludefile --datadir --stylesheet --source-port "
+        "--max-retries --host-timeout --scan-delay --min-rate --max-rate"
+    )),
+    "masscan": _tool(True, values=(
+        "-p --ports --rate -oX -oG -oJ -oL -iL -e --adapter --excludefile"
+    )),
+    "ping": _tool(True, values="-c -i -I -s -t -W -w"),
+    "traceroute": _tool(True, values="-f -i -m -p -q -s -w"),
+    "dig": _tool(True, values="-b -c -f -p -q -t -x -y"),
+    "host": _tool(True, values="-c -N -R -t -W"),
+    "nslookup": _tool(True),
+    "whois": _tool(True, values="-h -p"),
+    "ssh": _tool(True, values=(
+        "-b -c -D -E -e -F -I -i -J -L -l -m -O -o -p -Q -R -S -W -w"
+    )),
+    "nc": _tool(True, values="-e -c -i -o -p -q -s -w -x -X"),
+    "ncat": _tool(True, values="-e -c -i -o -p -q -s -w -x -X"),
+    "netcat": _tool(True, values="-e -c -i -o -p -q -s -w -x -X"),
+    "curl": _tool(True, values=(
+        "-A -b -c -d -e -E -F -H -K -m -o -r -T -u -U -w -x -X --cacert "
+        "--cert --connect-to --cookie --data --data-binary --data-raw "
+        "--header --key --max-time --output --proxy --referer --resolve "
+        "--user --user-agent"
+    )),
+    "wget": _tool(True, values=(
+        "-a -e -i -o -O -P -t -T -U -w --header --output-document "
+        "--password --user"
+    )),
+    "hydra": _tool(True, values="-b -C -e -l -L -m -M -o -p -P -s -t -T -w -W -x"),
+    "enum4linux": _tool(True, values="-k -p -u -w"),
+    "crackmapexec": _tool(True, values="-d -H -p -u --port"),
+    "netexec": _tool(True, values="-d -H -p -u --port"),
+    "nxc": _tool(True, values="-d -H -p -u --port"),
+    "smbclient": _tool(True, values="-A -I -m -p -U -W"),
+    "whatweb": _tool(True, values="-a -U --log-json --log-verbose"),
+    "sslscan": _tool(True),
+    "testssl": _tool(True),
+    "testssl.sh": _tool(True),
+    "dnsenum": _tool(True, values="-f -o -r --dnsserver --threads"),
+    "nikto": _tool(hosts="-h -host"),
+    "sqlmap": _tool(hosts="-u --url"),
+    "gobuster": _tool(hosts="-u --url -d --domain"),
+    "ffuf": _tool(hosts="-u"),
+    "feroxbuster": _tool(hosts="-u --url"),
+    "wpscan": _tool(hosts="--url"),
+    "nuclei": _tool(hosts="-u -target"),
+    "rustscan": _tool(hosts="-a --addresses"),
+    "dnsrecon": _tool(hosts="-d"),
+    "sublist3r": _tool(hosts="-d --domain"),
+    "subfinder": _tool(hosts="-d"),
+    "amass": _tool(hosts="-d"),
+    "theharvester": _tool(hosts="-d"),
+    "fierce": _tool(hosts="--domain"),
+}
+
+# Prefixes that run the next word as the command
+COMMAND_WRAPPERS = frozenset({
+    "sudo", "proxychains", "proxychains4", "torsocks", "nohup", "time",
+    "exec", "env",
+})
+
+Interval = Tuple[int, int]
+
+
+class IntervalIndex:
+    """
+    Sorted, merged address intervals of one IP family.
+
+    Overlapping and adjacent ranges are merged at build time, so
+    containment and overlap queries are a single bisect.
+    """
+
+    def __init__(self, intervals: List[Interval]):
+        merged: List[List[int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def covers(self, start: int, end: int) -> bool:
+        """True if one interval contains all of [start, end]."""
+        index = bisect_right(self._starts, start) - 1
+        return index >= 0 and self._ends[index] >= end
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if any interval intersects [start, end]."""
+        index = bisect_right(self._starts, end) - 1
+        return index >= 0 and self._ends[index] >= start
+
+
+class _DomainNode:
+    __slots__ = ("children", "exact", "wildcard")
+
+    def __init__(self):
+        self.children: Dict[str, "_DomainNode"] = {}
+        self.exact = False
+        self.wildcard = False
+
+
+class DomainTrie:
+    """
+    Suffix trie over reversed domain labels.
+
+    ``example.com`` matches that host only; ``*.example.com`` matches
+    every subdomain below it. Lookups walk one node per label.
+    """
+
+    def __init__(self):
+        self._root = _DomainNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, domain: str) -> None:
+        wildcard = domain.startswith("*.")
+        if wildcard:
+            domain = domain[2:]
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.children.setdefault(label, _DomainNode())
+        if wildcard:
+            node.wildcard = True
+        else:
+            node.exact = True
+        self._size += 1
+
+    def match(self, domain: str) -> bool:
+        labels = domain.split(".")
+        node = self._root
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.children.get(label)
+            if node is None:
+                return False
+            if depth == len(labels):
+                return node.exact
+            if node.wildcard:
+                return True
+        return False
+
+
+def parse_network(text: str) -> Optional[Tuple[int, Interval]]:
+    """Parse an IP, CIDR or range into (version, (first, last))."""
+    match = OCTET_RANGE_RE.match(text)
+    if match:
+        prefix, low, high = match.groups()
+        text = f"{prefix}{low}-{prefix}{high}"
+    try:
+        if "-" in text:
+            low, high = (ipaddress.ip_address(part) for part in text.split("-", 1))
+            if low.version != high.version or int(low) > int(high):
+                return None
+            return low.version, (int(low), int(high))
+        network = ipaddress.ip_network(text.split("%", 1)[0], strict=False)
+    except ValueError:
+        return None
+    return network.version, (
+        int(network.network_address), int(network.broadcast_address)
+    )
+
+
+def normalize_domain(text: str) -> Optional[str]:
+    domain = text.lower().rstrip(".")
+    if not DOMAIN_RE.match(domain.removeprefix("*.")):
+        return None
+    return domain
+
+
+def _host_part(token: str) -> str:
+    """The host of a URL, user@host, [v6]:port, //host/share or host/path."""
+    if "://" in token:
+        try:
+            return urlsplit(token).hostname or ""
+        except ValueError:
+            return ""
+    token = token.rsplit("@", 1)[-1]
+    if token.startswith("["):
+        return token[1:].split("]", 1)[0]
+    if parse_network(token) is not None:
+        return token
+    token = token.lstrip("/").split("/", 1)[0]
+    if token.count(":") == 1:
+        token = token.split(":", 1)[0]
+    return token
+
+
+def _command_words(segment: str) -> List[str]:
+    words = segment.split()
+    while words and (
+        words[0] in COMMAND_WRAPPERS
+        or ("=" in words[0] and not words[0].startswith("-"))
+    ):
+        words.pop(0)
+    return words
+
+
+def _takes_host(args: Optional[ToolArgs], option: Optional[str], token: str) -> bool:
+    """True if ``token``, the value of ``option`` if any, is a host argument."""
+    if args is None or os.path.exists(token):
+        return False
+    if option in args.host_options:
+        return True
+    return args.positional and option not in args.value_options
+
+
+def extract_targets(command: str) -> Iterator[str]:
+    """
+    Yield the IP, CIDR, range and host name targets of a command.
+
+    URLs and IP literals count wherever they appear. A bare host name
+    only counts where a tool in TOOL_ARGS takes a host: a positional
+    argument, or the value of one of its host options. Values of other
+    options and existing paths are never hosts, so ``hydra -L
+    users.list`` or ``cat notes.docx`` name no target.
+    """
+    for segment in SEGMENT_SPLIT.split(command):
+        words = _command_words(segment)
+        if not words:
+            continue
+        args = TOOL_ARGS.get(os.path.basename(words[0]).lower())
+        option = None
+        for token in TOKEN_SPLIT.split(" ".join(words[1:])):
+            if not token:
+                continue
+            if token.startswith("-"):
+                option = token
+                continue
+            value_of, option = option, None
+            host = _host_part(token)
+            if not host:
+                continue
+            if parse_network(host) is not None:
+                yield host
+                continue
+            if "://" not in token and not _takes_host(args, value_of, token):
+                continue
+            domain = normalize_domain(host)
+            if domain is not None:
+                yield domain
+
+
+class Scope:
+    """
+    An immutable, indexed scope: included and excluded networks per IP
+    family plus included and excluded domains. Exclusions always win.
+    """
+
+    def __init__(self, entries: List[str]):
+        ranges = {(4, True): [], (4, False): [], (6, True): [], (6, False): []}
+        self.domains = DomainTrie()
+        self.excluded_domains = DomainTrie()
+        for entry in entries:
+            included = not entry.startswith("!")
+            entry = entry.lstrip("!").strip()
+            network = parse_network(entry)
+            if network is not None:
+                version, interval = network
+                ranges[(version, included)].append(interval)
+                continue
+            domain = normalize_domain(entry)
+            if domain is None:
+                logger.warning(f"Ignoring unparseable scope entry: {entry}")
+            elif included:
+                self.domains.add(domain)
+            else:
+                self.excluded_domains.add(domain)
+        self.networks = {
+            version: IntervalIndex(ranges[(version, True)]) for version in (4, 6)
+        }
+        self.excluded_networks = {
+            version: IntervalIndex(ranges[(version, False)]) for version in (4, 6)
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "Scope":
+        entries = []
+        with open(path) as handle:
+            for line in handle:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    entries.append(line)
+        return cls(entries)
+
+    def check(self, target: str) -> Tuple[bool, str]:
+        network = parse_network(target)
+        if network is not None:
+            version, (start, end) = network
+            if self.excluded_networks[version].overlaps(start, end):
+                return False, f"Target {target} is excluded from scope"
+            if not self.networks[version].covers(start, end):
+                return False, f"Target {target} is out of scope"
+            return True, "In scope"
+        if self.excluded_domains.match(target):
+            return False, f"Target {target} is excluded from scope"
+        if not self.domains.match(target):
+            return False, f"Target {target} is out of scope"
+        return True, "In scope"
+
+
+class ScopeEngine:
+    """
+    Scope file loader with hot reload.
+
+    The file's mtime and size are polled at most every ``reload_interval``
+    seconds; a changed file is parsed into a new Scope off to the side
+    and swapped in with a single assignment, so checks never see a
+    half-built index. A file that fails to load keeps the old scope.
+    """
+
+    def __init__(self, path: str, reload_interval: float = SCOPE_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._next_check = 0.0
+        self._scope: Optional[Scope] = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the scope file if it changed; returns True on a swap."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return False
+                scope = Scope.from_file(self.path)
+            except OSError as e:
+                logger.error(f"Scope file unavailable, keeping previous scope: {e}")
+                return False
+            self._scope, self._signature = scope, signature
+        logger.info(f"Loaded scope from {self.path}")
+        return True
+
+    def reload_due(self) -> bool:
+        """True if the next check polls (and may reparse) the scope file."""
+        return time.monotonic() >= self._next_check
+
+    @property
+    def scope(self) -> Optional[Scope]:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            self.reload()
+        return self._scope
+
+    def check(self, command: str) -> Tuple[bool, str]:
+        scope = self.scope
+        if scope is None:
+            return False, "Scope file could not be loaded"
+        for target in extract_targets(command):
+            allowed, msg = scope.check(target)
+            if not allowed:
+                return False, msg
+        return True, "Targets in scope"
+
 
 class TargetValidator:
     """
-    Permissive validator for Pentest Mode.
-    Allows all targets (IPs, Domains, CIDRs) without restriction.
+    Scope validator for command targets.
+
+    Permissive (Pentest Mode) until a scope file is configured through
+    KAOS_SCOPE_FILE or load_scope().
     """
 
+    _scope_engine: Optional[ScopeEngine] = (
+        ScopeEngine(SCOPE_FILE) if SCOPE_FILE else None
+    )
+
+    @classmethod
+    def load_scope(cls, path: Optional[str]) -> None:
+        """Enforce the scope file at path; None restores Pentest Mode."""
+        cls._scope_engine = ScopeEngine(path) if path else None
+
+    @staticmethod
+    def reload_due() -> bool:
+        """True if the next validate_target may touch the scope file."""
+        engine = TargetValidator._scope_engine
+        return engine is not None and engine.reload_due()
+
     @staticmethod
     def validate_target(ip: str) -> tuple[bool, str]:
-        return True, "Pentest Mode Enabled"
+        engine = TargetValidator._scope_engine
+        if engine is None:
+            return True, "Pentest Mode Enabled"
+        return engine.check(ip)
@@ -1,16 +1,26 @@
-from flask import Flask, request, Response
+from flask import Flask, g, request, Response, stream_with_context
 import orjson
+import atexit
+import ipaddress
 import logging
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_fixed,
-    retry_if_exception_type,
-)
-import requests
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+from config.settings import get_config
+from monitoring.metrics import get_metrics_collector
 
 from .core.analyzer import CommandAnalyzer
+from .core.cache import AnalysisCache, HEURISTIC, LLM
+from .core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from .core.llm_client import OllamaClient
+from .core.patterns import read_pattern_file
+from .core.rules import default_cache_dir, load_rule_pack
+from .core.semantic_cache import SemanticCache
+from .core.singleflight import SingleFlight
+from .core.tracing import SamplingProfiler, begin_trace, end_trace, span
 from .core.validator import TargetValidator
 
 app = Flask(__name__)
@@ -22,6 +32,102 @@ OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
 APP_HOST = os.getenv("KAOS_HOST", "127.0.0.1")
 APP_PORT = int(os.getenv("KAOS_PORT", "5000"))
+PATTERN_FILES = os.getenv("KAOS_PATTERN_FILES", "")
+RULE_PACK = os.getenv("KAOS_RULE_PACK", "")
+RULE_CACHE_DIR = os.getenv("KAOS_RULE_CACHE_DIR", default_cache_dir())
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Scrapes are left out of request metrics so they do not skew API latency
+UNTRACED_ENDPOINTS = ("metrics_report", "prometheus_metrics")
+
+# Characters of LLM output surfaced to the operator
+LLM_INSIGHT_CHARS = 100
+
+settings = get_config()
+metrics = get_metrics_collector()
+analysis_cache = AnalysisCache(
+    max_entries=settings.ANALYSIS_CACHE_SIZE, ttl=settings.ANALYSIS_CACHE_TTL
+)
+semantic_cache = SemanticCache(
+    max_entries=settings.SEMANTIC_CACHE_SIZE,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl=settings.SEMANTIC_CACHE_TTL,
+)
+last_semantic_snapshot = time.monotonic()
+ollama_client = OllamaClient.from_config(settings, OLLAMA_URL, OLLAMA_MODEL)
+llm_flight = SingleFlight()
+llm_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_BREAKER_THRESHOLD,
+    cooldown=settings.LLM_BREAKER_COOLDOWN,
+    probe=ollama_client.ping,
+    probe_interval=settings.LLM_BREAKER_PROBE_INTERVAL,
+    on_state_change=lambda state: metrics.record_breaker_state(state.value),
+)
+profiler = (
+    SamplingProfiler(
+        slow_threshold=settings.TRACE_PROFILE_SLOW_MS / 1000,
+        interval=settings.TRACE_PROFILE_INTERVAL_MS / 1000,
+        output_dir=settings.TRACE_PROFILE_DIR,
+    )
+    if settings.TRACE_PROFILE_SLOW_MS > 0
+    else None
+)
+
+# Shared by every batch request so LLM fan-out reuses warm worker threads
+batch_pool = ThreadPoolExecutor(
+    max_workers=settings.BATCH_LLM_CONCURRENCY, thread_name_prefix="batch-llm"
+)
+
+rules_lock = threading.Lock()
+
+
+def load_rules():
+    """
+    Compile the configured rule pack plus operator blocklists and swap
+    it in. Requests keep analyzing with the previous pack meanwhile; a
+    pack that fails to load or validate leaves the active one in place.
+    """
+    with rules_lock:
+        cached = False
+        pack = CommandAnalyzer.BUILTIN_RULES
+        if RULE_PACK:
+            pack, cached = load_rule_pack(RULE_PACK, RULE_CACHE_DIR)
+        for pattern_file in filter(None, PATTERN_FILES.split(os.pathsep)):
+            pack = pack.with_patterns(read_pattern_file(pattern_file))
+        CommandAnalyzer.install_rules(pack)
+    info = dict(pack.info(), cached=cached)
+    logger.info(
+        f"Rule pack {info['name']} v{info['version']} active "
+        f"({info['destructive_patterns']} destructive patterns, "
+        f"{'cached' if cached else 'compiled'})"
+    )
+    return info
+
+
+load_rules()
+
+
+def save_semantic_snapshot(force: bool = False) -> None:
+    """Persist the semantic cache, at most once per snapshot interval."""
+    global last_semantic_snapshot
+    if not settings.SEMANTIC_CACHE_SNAPSHOT:
+        return
+    now = time.monotonic()
+    if not force and now - last_semantic_snapshot < settings.SEMANTIC_SNAPSHOT_INTERVAL:
+        return
+    last_semantic_snapshot = now
+    try:
+        semantic_cache.save(settings.SEMANTIC_CACHE_SNAPSHOT, tag=OLLAMA_MODEL)
+    except OSError as e:
+        logger.error(f"Semantic cache snapshot failed: {e}")
+
+
+# Snapshots are tagged with the model so another model's answers are dropped
+if settings.SEMANTIC_CACHE_SNAPSHOT and settings.SEMANTIC_CACHE_SIZE:
+    restored = semantic_cache.load(settings.SEMANTIC_CACHE_SNAPSHOT, tag=OLLAMA_MODEL)
+    logger.info(f"Restored {restored} semantic cache entries")
+    atexit.register(save_semantic_snapshot, force=True)
 
 
 def json_response(data, status=200):
@@ -30,17 +136,252 @@ def json_response(data, status=200):
     )
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_fixed(2),
-    retry=retry_if_exception_type(requests.exceptions.ConnectionError),
-)
+def timed_generate(prompt: str) -> str:
+    """Ollama completion with its latency recorded."""
+    start = time.perf_counter()
+    try:
+        return ollama_client.generate(prompt)
+    finally:
+        metrics.record_llm_query(time.perf_counter() - start)
+
+
 def query_ollama(prompt: str):
-    """Queries the LLM with retry logic via Tenacity."""
-    payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
-    response = requests.post(OLLAMA_URL, json=payload, timeout=10)
-    response.raise_for_status()
-    return response.json().get("response", "")
+    """
+    Queries the LLM over the pooled client (jittered backoff retries).
+    Raises CircuitOpenError at once while the LLM circuit is open.
+    """
+    return llm_breaker.call(timed_generate, prompt)
+
+
+def timed_analysis(command: str):
+    start = time.perf_counter()
+    analysis = CommandAnalyzer.analyze(command)
+    metrics.record_analysis(time.perf_counter() - start)
+    return analysis
+
+
+def llm_prompt(command: str) -> str:
+    return f"Explain security impact of: {command}"
+
+
+def needs_llm(analysis) -> bool:
+    """LLM augmentation is skipped for conversation and blocked commands."""
+    return (
+        analysis["tool_type"] not in ["conversation", "system"]
+        and analysis["allowed"]
+    )
+
+
+def build_llm_layer(command: str, analysis):
+    return {
+        "command": command,
+        "reasoning": analysis["reasoning"],
+        "tool_type": analysis["tool_type"],
+        "risk": analysis["risk"],
+    }
+
+
+def heuristic_key(command: str) -> Tuple[str, str, str]:
+    # Keyed by rule pack, so a swapped pack never serves stale verdicts
+    return AnalysisCache.make_key(
+        HEURISTIC, CommandAnalyzer.rules().digest, command
+    )
+
+
+def cached_analysis(command: str):
+    """Heuristic analysis served from the analysis cache when possible."""
+    key = heuristic_key(command)
+    analysis = analysis_cache.get(key)
+    if analysis is not None:
+        metrics.record_cache_hit()
+        return analysis
+    metrics.record_cache_miss()
+    analysis = timed_analysis(command)
+    analysis_cache.set(key, analysis)
+    return analysis
+
+
+def cached_batch_analysis(commands):
+    """Batch heuristic analysis; only cache misses reach the analyzer."""
+    analyses = {}
+    misses = []
+    for command in dict.fromkeys(commands):
+        analysis = analysis_cache.get(heuristic_key(command))
+        if analysis is not None:
+            metrics.record_cache_hit()
+            analyses[command] = analysis
+        else:
+            metrics.record_cache_miss()
+            misses.append(command)
+
+    start = time.perf_counter()
+    batch = CommandAnalyzer.analyze_batch(misses)
+    if misses:
+        metrics.record_analysis(time.perf_counter() - start)
+
+    for command, analysis in zip(misses, batch):
+        analysis_cache.set(heuristic_key(command), analysis)
+        analyses[command] = analysis
+    return [analyses[command] for command in commands]
+
+
+def parse_batch_commands(raw_data: bytes):
+    """
+    Accept a JSON array or an NDJSON body. Items are either command
+    strings or objects with a "command" field.
+    """
+    body = raw_data.strip()
+    if body.startswith(b"["):
+        items = orjson.loads(body)
+    else:
+        items = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+
+    commands = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("command")
+        if not isinstance(item, str):
+            raise ValueError("Each batch item must be a command string")
+        commands.append(item)
+
+    if len(commands) > settings.BATCH_MAX_COMMANDS:
+        raise ValueError(
+            f"Batch exceeds {settings.BATCH_MAX_COMMANDS} commands"
+        )
+    return commands
+
+
+def semantic_lookup(command: str):
+    """LLM insight of a similarly phrased earlier prompt, if any."""
+    if not semantic_cache.max_entries:
+        return None
+    hit = semantic_cache.lookup(command)
+    if hit is None:
+        metrics.record_semantic_miss()
+        return None
+    metrics.record_semantic_hit()
+    return hit[0]
+
+
+def semantic_store(command: str, reasoning: str) -> None:
+    semantic_cache.add(command, reasoning)
+    save_semantic_snapshot()
+
+
+def cached_llm_reasoning(command: str) -> str:
+    """
+    LLM insight served from the analysis cache, or the semantic cache
+    for rephrased prompts, when possible.
+    """
+    key = AnalysisCache.make_key(LLM, OLLAMA_MODEL, command)
+    reasoning = analysis_cache.get(key)
+    if reasoning is not None:
+        metrics.record_cache_hit()
+        return reasoning
+    metrics.record_cache_miss()
+    reasoning = semantic_lookup(command)
+    if reasoning is not None:
+        return reasoning
+
+    def fetch():
+        # Cached before the flight lands so late arrivals hit the cache
+        result = query_ollama(llm_prompt(command))
+        analysis_cache.set(key, result)
+        semantic_store(command, result)
+        return result
+
+    # Identical concurrent prompts share a single in-flight LLM call
+    reasoning, shared = llm_flight.do(key, fetch)
+    if shared:
+        metrics.record_llm_coalesced()
+    return reasoning
+
+
+def stream_llm_reasoning(command: str):
+    """
+    Yield LLM insight fragments, stopping at the truncation budget.
+    Cached insights are replayed as a single fragment.
+    """
+    key = AnalysisCache.make_key(LLM, OLLAMA_MODEL, command)
+    reasoning = analysis_cache.get(key)
+    if reasoning is not None:
+        metrics.record_cache_hit()
+        yield reasoning[:LLM_INSIGHT_CHARS]
+        return
+    metrics.record_cache_miss()
+    reasoning = semantic_lookup(command)
+    if reasoning is not None:
+        yield reasoning[:LLM_INSIGHT_CHARS]
+        return
+    if not llm_breaker.allow_request():
+        raise CircuitOpenError("LLM circuit open")
+    fragments = []
+    start = time.perf_counter()
+    try:
+        for fragment in ollama_client.stream(
+            llm_prompt(command), max_chars=LLM_INSIGHT_CHARS
+        ):
+            fragments.append(fragment)
+            yield fragment
+    except Exception:
+        llm_breaker.record_failure()
+        raise
+    except BaseException:
+        # Client went away mid-stream
+        llm_breaker.record_abandoned()
+        raise
+    finally:
+        metrics.record_llm_query(time.perf_counter() - start)
+    llm_breaker.record_success()
+    analysis_cache.set(key, "".join(fragments))
+    semantic_store(command, "".join(fragments))
+
+
+def is_local_client(address) -> bool:
+    """True for loopback peers; admin endpoints refuse everyone else."""
+    try:
+        return ipaddress.ip_address(address or "").is_loopback
+    except ValueError:
+        return False
+
+
+def ndjson_line(data) -> bytes:
+    return orjson.dumps(data) + b"\n"
+
+
+@app.before_request
+def start_request_trace():
+    g.trace = begin_trace(on_span=metrics.record_stage)
+    g.profile_id = None
+    if profiler is not None and request.endpoint not in UNTRACED_ENDPOINTS:
+        g.profile_id = profiler.start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    if request.endpoint in UNTRACED_ENDPOINTS:
+        return response
+    # Streamed bodies are still being produced; only their setup is timed
+    duration = g.trace.elapsed()
+    response.headers["Server-Timing"] = g.trace.server_timing()
+    metrics.record_request(duration, success=response.status_code < 400)
+    if g.profile_id is not None:
+        path = profiler.stop(
+            g.profile_id, duration, f"{request.method} {request.path}"
+        )
+        g.profile_id = None
+        if path:
+            logger.warning(
+                f"Slow request ({duration * 1000:.0f} ms) profiled to {path}"
+            )
+    return response
+
+
+@app.teardown_request
+def end_request_trace(exc):
+    if g.get("profile_id") is not None:
+        profiler.discard(g.profile_id)
+    end_trace()
 
 
 @app.route("/api/v1/health", methods=["GET"])
@@ -48,52 +389,181 @@ def health():
     return json_response({"status": "healthy", "mode": "enterprise-hybrid"})
 
 
+@app.route("/api/v1/metrics", methods=["GET"])
+def metrics_report():
+    return json_response(metrics.get_metrics())
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(
+        metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@app.route("/api/v1/rules", methods=["GET"])
+def rules_info():
+    return json_response(CommandAnalyzer.rules().info())
+
+
+@app.route("/api/v1/rules/reload", methods=["POST"])
+def rules_reload():
+    """Recompile the configured rule pack and swap it in atomically."""
+    if not is_local_client(request.remote_addr):
+        return json_response({"error": "Rule reload is local-only"}, status=403)
+    try:
+        return json_response(load_rules())
+    except Exception as e:
+        logger.error(f"Rule pack reload failed: {e}")
+        return json_response({"error": f"Rule pack reload failed: {e}"}, status=400)
+
+
 @app.route("/api/v1/analyze", methods=["POST"])
 def analyze():
     try:
-        raw_data = request.get_data()
-        data = orjson.loads(raw_data)
-        command_input = data.get("command", "")
+        with span("decode"):
+            raw_data = request.get_data()
+            data = orjson.loads(raw_data)
+            command_input = data.get("command", "")
 
         # 1. Scope Validation
-        valid_target, msg = TargetValidator.validate_target(command_input)
+        with span("validate"):
+            valid_target, msg = TargetValidator.validate_target(command_input)
         if not valid_target:
             return json_response({"error": msg}, status=403)
 
         # 2. Hybrid Engine Analysis (Fast-Path)
-        analysis = CommandAnalyzer.analyze(command_input)
+        with span("analyze"):
+            analysis = cached_analysis(command_input)
 
         response_payload = {
-            "llm_layer": {
-                "command": command_input,
-                "reasoning": analysis["reasoning"],
-                "tool_type": analysis["tool_type"],
-                "risk": analysis["risk"],
-            }
+            "llm_layer": build_llm_layer(command_input, analysis)
         }
 
         # 3. LLM Augmentation (if not simple conversation)
-        if (
-            analysis["tool_type"] not in ["conversation", "system"]
-            and analysis["allowed"]
-        ):
+        if needs_llm(analysis):
             try:
-                llm_reasoning = query_ollama(
-                    f"Explain security impact of: {command_input}"
+                with span("llm"):
+                    llm_reasoning = cached_llm_reasoning(command_input)
+                response_payload["llm_layer"]["reasoning"] += (
+                    f" | LLM Insight: {llm_reasoning[:LLM_INSIGHT_CHARS]}..."
                 )
-                response_payload["llm_layer"][
-                    "reasoning"
-                ] += f" | LLM Insight: {llm_reasoning[:100]}..."
             except Exception as e:
                 logger.error(f"LLM unavailable: {e}")
+                metrics.record_fallback()
                 response_payload["llm_layer"]["reasoning"] += " | LLM Offline"
 
-        return json_response(response_payload)
+        with span("encode"):
+            return json_response(response_payload)
+
+    except Exception as e:
+        logger.error(f"Analysis failed: {e}")
+        return json_response({"error": "Internal Server Error"}, status=500)
+
+
+@app.route("/api/v1/analyze/stream", methods=["POST"])
+def analyze_stream():
+    """
+    Streaming variant of /api/v1/analyze (NDJSON).
 
+    Emits an ``analysis`` event with the heuristic verdict immediately,
+    ``token`` events as LLM fragments arrive, and a final ``done`` event
+    carrying the same reasoning string /api/v1/analyze would return.
+    """
+    try:
+        with span("decode"):
+            data = orjson.loads(request.get_data())
+            command_input = data.get("command", "")
+
+        with span("validate"):
+            valid_target, msg = TargetValidator.validate_target(command_input)
+        if not valid_target:
+            return json_response({"error": msg}, status=403)
+
+        with span("analyze"):
+            analysis = cached_analysis(command_input)
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         return json_response({"error": "Internal Server Error"}, status=500)
 
+    def generate():
+        llm_layer = build_llm_layer(command_input, analysis)
+        yield ndjson_line({"event": "analysis", "llm_layer": llm_layer})
+
+        reasoning = llm_layer["reasoning"]
+        if needs_llm(analysis):
+            fragments = []
+            try:
+                for fragment in stream_llm_reasoning(command_input):
+                    fragments.append(fragment)
+                    yield ndjson_line({"event": "token", "text": fragment})
+                reasoning += f" | LLM Insight: {''.join(fragments)}..."
+            except Exception as e:
+                logger.error(f"LLM unavailable: {e}")
+                metrics.record_fallback()
+                yield ndjson_line({"event": "error", "message": "LLM Offline"})
+                reasoning += " | LLM Offline"
+
+        yield ndjson_line({"event": "done", "reasoning": reasoning})
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
+
+
+@app.route("/api/v1/analyze/batch", methods=["POST"])
+def analyze_batch():
+    """
+    Analyze many commands in one request.
+
+    Heuristics run over the whole batch in one pass; LLM augmentation is
+    spread over the shared pool of BATCH_LLM_CONCURRENCY workers, one
+    call per distinct command. Results stream back as NDJSON in input
+    order, each tagged with its index.
+    """
+    try:
+        with span("decode"):
+            commands = parse_batch_commands(request.get_data())
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    def generate():
+        scope = [TargetValidator.validate_target(c) for c in commands]
+        analyses = cached_batch_analysis(commands)
+
+        pending = {}
+        try:
+            for command, analysis, (valid, _) in zip(commands, analyses, scope):
+                if valid and needs_llm(analysis) and command not in pending:
+                    pending[command] = batch_pool.submit(cached_llm_reasoning, command)
+
+            for index, command in enumerate(commands):
+                valid, msg = scope[index]
+                if not valid:
+                    yield ndjson_line({"index": index, "error": msg})
+                    continue
+
+                llm_layer = build_llm_layer(command, analyses[index])
+                if command in pending:
+                    try:
+                        llm_reasoning = pending[command].result()
+                        llm_layer["reasoning"] += (
+                            f" | LLM Insight: {llm_reasoning[:LLM_INSIGHT_CHARS]}..."
+                        )
+                    except Exception as e:
+                        logger.error(f"LLM unavailable: {e}")
+                        metrics.record_fallback()
+                        llm_layer["reasoning"] += " | LLM Offline"
+                yield ndjson_line({"index": index, "llm_layer": llm_layer})
+        finally:
+            # A client that disconnects leaves nothing queued behind it
+            for future in pending.values():
+                future.cancel()
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
+
 
 if __name__ == "__main__":
     app.run(host=APP_HOST, port=APP_PORT)
@@ -31,6 +31,40 @@ class Config:
     # Security
     ENABLE_CORS = False
     ENABLE_HTTPS = True
+    
+    # LLM Client Pool (Ollama)
+    OLLAMA_CONNECT_TIMEOUT = 3
+    OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+    OLLAMA_BACKOFF_INITIAL = 0.5
+    OLLAMA_BACKOFF_MAX = 4
+    
+    # Concurrent LLM calls admitted by the async server before failing fast
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    
+    # LLM Circuit Breaker
+    LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+    LLM_BREAKER_COOLDOWN = int(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+    LLM_BREAKER_PROBE_INTERVAL = 5
+    
+    # Batch Analysis (Brain)
+    BATCH_MAX_COMMANDS = int(os.getenv("BATCH_MAX_COMMANDS", "10000"))
+    BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+    
+    # Analysis Cache (Brain)
+    ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+    ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+    
+    # Semantic LLM Cache (Brain); size 0 disables (off unless opted in)
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "0"))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+    SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+    SEMANTIC_CACHE_SNAPSHOT = os.getenv("SEMANTIC_CACHE_SNAPSHOT", "")
+    SEMANTIC_SNAPSHOT_INTERVAL = 60
+    
+    # Request Tracing (Brain); a slow threshold of 0 disables profiling
+    TRACE_PROFILE_SLOW_MS = int(os.getenv("TRACE_PROFILE_SLOW_MS", "0"))
+    TRACE_PROFILE_INTERVAL_MS = 5
+    TRACE_PROFILE_DIR = os.getenv("TRACE_PROFILE_DIR", "/tmp/kaos-profiles")
 
 
 class DevelopmentConfig(Config):
@@ -127,6 +161,8 @@ class TestingConfig(Config):
     OLLAMA_MODEL = "test-model"
     OLLAMA_TIMEOUT = 1
     OLLAMA_RETRIES = 1
+    OLLAMA_CONNECT_TIMEOUT = 1
+    OLLAMA_BACKOFF_INITIAL = 0.1
     
     # Frontend (ARM)
     SESSION_LOG = "/tmp/kaos_test_session.log"
@@ -0,0 +1,240 @@
+"""
+K.A.O.S. Arm Client - Brain Connection
+Persistent HTTP session to the Brain, backend health memory and an
+on-disk cache of recent analyses.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class BrainUnavailable(Exception):
+    """Raised when the Brain is known to be down or a call to it fails."""
+
+
+class BrainRejected(Exception):
+    """Raised when the Brain answers a request with a 4xx error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def normalize_command(command: str) -> str:
+    """Case-fold and collapse whitespace so trivial variants share a key."""
+    return " ".join(command.lower().split())
+
+
+class BrainHealth:
+    """
+    Remembers Brain failures so the CLI stops waiting on a dead backend.
+
+    After a failure the Brain is skipped for ``backoff_initial`` seconds,
+    doubling per consecutive failure up to ``backoff_max``. The first
+    call after the window is a normal attempt; success resets the state.
+    """
+
+    def __init__(
+        self,
+        backoff_initial: float = 2.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self._down_until = 0.0
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._clock() >= self._down_until
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return max(0.0, self._down_until - self._clock())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._down_until = 0.0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            backoff = min(
+                self.backoff_max,
+                self.backoff_initial * 2 ** (self.failures - 1),
+            )
+            self._down_until = self._clock() + backoff
+
+
+class AnalysisStore:
+    """
+    SQLite-backed cache of Brain analyses keyed by normalized command.
+
+    Bounded to ``max_entries`` (least recently used rows are deleted)
+    and ``ttl`` seconds. Survives restarts, so repeated prompts still
+    get a Brain answer while the Brain is offline.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500, ttl: float = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+            " created REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, command: str) -> Optional[Dict]:
+        key = normalize_command(command)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, created FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE analyses SET used = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, command: str, result: Dict) -> None:
+        key = normalize_command(command)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            self._db.execute(
+                "DELETE FROM analyses WHERE key NOT IN ("
+                " SELECT key FROM analyses ORDER BY used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class BrainClient:
+    """
+    Brain API client over one pooled keep-alive session.
+
+    Calls are skipped while ``health`` says the Brain is down.
+    Connection errors and 5xx answers count as failures; a 4xx answer
+    (e.g. a command outside the engagement scope) means the Brain is up
+    and is raised as BrainRejected. Connect and read timeouts are
+    separate, so a dead host fails in ``connect_timeout`` seconds
+    while a slow LLM answer can still take up to ``read_timeout``.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        store: Optional[AnalysisStore] = None,
+        health: Optional[BrainHealth] = None,
+        connect_timeout: float = 1.0,
+        read_timeout: float = 15.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.store = store
+        self.health = health or BrainHealth()
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, payload: Dict, stream: bool = False):
+        if not self.health.available():
+            raise BrainUnavailable(
+                f"Brain marked offline, retrying in {self.health.retry_in():.0f}s"
+            )
+        try:
+            response = self.session.post(
+                self.base_url + path, json=payload,
+                timeout=self.timeout, stream=stream,
+            )
+        except requests.exceptions.RequestException as e:
+            self.health.record_failure()
+            raise BrainUnavailable(str(e)) from e
+        if response.status_code >= 500:
+            response.close()
+            self.health.record_failure()
+            raise BrainUnavailable(f"Brain error {response.status_code}")
+        if response.status_code >= 400:
+            self.health.record_success()
+            try:
+                message = response.json().get("error") or response.text
+            except (ValueError, AttributeError):
+                message = response.text
+            response.close()
+            raise BrainRejected(response.status_code, message)
+        return response
+
+    def analyze(self, command: str, session_id: str = "cli-user") -> Dict:
+        """One-shot /api/v1/analyze call returning the llm_layer."""
+        response = self._post(
+            "/api/v1/analyze", {"command": command, "session_id": session_id}
+        )
+        try:
+            data = response.json()
+        except ValueError as e:
+            self.health.record_failure()
+            raise BrainUnavailable(f"Malformed Brain response: {e}") from e
+        self.health.record_success()
+        return data.get("llm_layer", {})
+
+    def stream(self, command: str, session_id: str = "cli-user") -> Iterator[Dict]:
+        """Yield /api/v1/analyze/stream events as they arrive."""
+        response = self._post(
+            "/api/v1/analyze/stream",
+            {"command": command, "session_id": session_id},
+            stream=True,
+        )
+        with response:
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.health.record_failure()
+                raise BrainUnavailable(str(e)) from e
+        self.health.record_success()
+
+    def cached(self, command: str) -> Optional[Dict]:
+        return self.store.get(command) if self.store else None
+
+    def remember(self, command: str, result: Dict) -> None:
+        if self.store:
+            self.store.set(command, result)
+
+    def close(self) -> None:
+        self.session.close()
+        if self.store:
+            self.store.close()
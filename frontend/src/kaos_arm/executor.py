@@ -0,0 +1,430 @@
+"""
+K.A.O.S. Arm Client - Execution Engine
+Runs commands with streamed output, optional wall-clock and CPU limits,
+and per-command resource usage from wait4().
+"""
+
+import fcntl
+import os
+import pty
+import resource
+import select
+import signal
+import subprocess
+import sys
+import termios
+import threading
+import time
+import tty
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+
+# Seconds between SIGTERM and SIGKILL once the wall-clock limit is hit
+KILL_GRACE = 2.0
+# Seconds to let output readers drain after the child exits (a daemonized
+# grandchild may hold the pipes open indefinitely)
+DRAIN_TIMEOUT = 1.0
+# Extra seconds between the soft (SIGXCPU) and hard (SIGKILL) CPU limit
+CPU_HARD_MARGIN = 5
+
+# on_line(stream, line) with stream "stdout" or "stderr"
+LineCallback = Callable[[str, str], None]
+
+
+@dataclass
+class ExecResult:
+    """Outcome and resource usage of one command."""
+
+    command: str
+    exit_code: Optional[int]  # negative: killed by that signal
+    wall_time: float = 0.0
+    user_time: float = 0.0
+    sys_time: float = 0.0
+    max_rss_kb: int = 0
+    timed_out: bool = False
+    cpu_limited: bool = False
+    error: Optional[str] = None
+
+    @property
+    def cpu_time(self) -> float:
+        return self.user_time + self.sys_time
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["cpu_time"] = round(self.cpu_time, 6)
+        return data
+
+
+def _limit_cpu(pid: int, cpu_limit: Optional[int]) -> None:
+    """
+    Set RLIMIT_CPU on a just-started child from the outside: the Arm runs
+    threads, so no Python code may run in the child between fork and exec.
+    """
+    if not cpu_limit:
+        return
+    try:
+        resource.prlimit(
+            pid, resource.RLIMIT_CPU, (cpu_limit, cpu_limit + CPU_HARD_MARGIN)
+        )
+    except ProcessLookupError:
+        pass  # already exited
+
+
+def copy_window_size(source_fd: int, target_fd: int) -> None:
+    """Give a pty the terminal's rows and columns (no-op off a terminal)."""
+    try:
+        size = fcntl.ioctl(source_fd, termios.TIOCGWINSZ, b"\0" * 8)
+        fcntl.ioctl(target_fd, termios.TIOCSWINSZ, size)
+    except OSError:
+        pass
+
+
+class Execution:
+    """
+    One running command in its own process group.
+
+    stdout and stderr are read by two threads in chunks: with ``echo``
+    the raw bytes go straight to the terminal (so prompts without a
+    newline still show), and every complete line is passed to
+    ``on_line``. ``wait`` reaps the child with ``os.wait4`` to collect
+    wall time, CPU time and peak RSS. ``wall_limit`` sends SIGTERM to
+    the group, then SIGKILL after ``KILL_GRACE``; ``cpu_limit`` sets
+    RLIMIT_CPU on the child right after it starts (with prlimit) so the
+    kernel enforces it.
+
+    With ``tty`` the command runs on a pseudo-terminal that becomes its
+    controlling terminal, so interactive and full-screen tools (ssh,
+    msfconsole, vim, top) behave as in a shell. Its output, stdout and
+    stderr merged, is copied from the pty to the terminal and to
+    ``on_line`` as "stdout"; ``run_foreground`` forwards keystrokes.
+
+    Peak RSS is the kernel's ``ru_maxrss``. Linux folds the memory image
+    a child inherits at fork into it, so a trivial command reports about
+    the Arm's own RSS; it is meaningful for commands larger than that.
+    """
+
+    def __init__(
+        self,
+        args: List[str],
+        command: Optional[str] = None,
+        on_line: Optional[LineCallback] = None,
+        echo: bool = True,
+        wall_limit: Optional[float] = None,
+        cpu_limit: Optional[int] = None,
+        stdin=None,
+        tty: bool = False,
+    ):
+        self.command = command or " ".join(args)
+        self.tty = tty
+        self.master_fd: Optional[int] = None
+        self.on_line = on_line
+        self.echo = echo
+        self.wall_limit = wall_limit or None
+        self.cpu_limit = cpu_limit or None
+        self._lock = threading.Lock()
+        self._wait_lock = threading.Lock()
+        self._reaped = False
+        self._result: Optional[ExecResult] = None
+        self._timed_out = False
+        self._timers: List[threading.Timer] = []
+
+        self.started = time.monotonic()
+        if tty:
+            self._start_tty(args)
+        else:
+            self._start_pipes(args, stdin)
+        for reader in self._readers:
+            reader.start()
+        if self.wall_limit:
+            self._schedule(self.wall_limit, self._expire)
+
+    def _start_pipes(self, args: List[str], stdin) -> None:
+        self.process = subprocess.Popen(
+            args,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        self.pid = self.process.pid
+        _limit_cpu(self.pid, self.cpu_limit)
+        self._readers = [
+            threading.Thread(
+                target=self._pump,
+                args=(self.process.stdout, "stdout", sys.stdout),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._pump,
+                args=(self.process.stderr, "stderr", sys.stderr),
+                daemon=True,
+            ),
+        ]
+
+    def _start_tty(self, args: List[str]) -> None:
+        master, slave = pty.openpty()
+        try:
+            copy_window_size(sys.__stdin__.fileno(), slave)
+            # As login_tty(): a new session opening the slave by name gets
+            # it as controlling terminal. posix_spawn does both in the
+            # child without running Python code there.
+            self.pid = os.posix_spawnp(
+                args[0], args, os.environ,
+                setsid=True,
+                file_actions=[
+                    (os.POSIX_SPAWN_OPEN, 0, os.ttyname(slave), os.O_RDWR, 0),
+                    (os.POSIX_SPAWN_DUP2, 0, 1),
+                    (os.POSIX_SPAWN_DUP2, 0, 2),
+                ],
+            )
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            # Only the child holds the slave, so EOF follows its exit
+            os.close(slave)
+        self.master_fd = master
+        self.process = None
+        _limit_cpu(self.pid, self.cpu_limit)
+        self._readers = [
+            threading.Thread(
+                target=self._pump_tty, args=(master, sys.stdout), daemon=True
+            ),
+        ]
+
+    @property
+    def done(self) -> bool:
+        return self._reaped
+
+    def signal(self, signum: int) -> bool:
+        """Signal the whole process group; False once it has been reaped."""
+        with self._lock:
+            if self._reaped:
+                return False
+            try:
+                os.killpg(self.pid, signum)
+            except ProcessLookupError:
+                return False
+            return True
+
+    def wait(self) -> ExecResult:
+        """
+        Reap the child and return its ExecResult. Safe to call again
+        after an interruption, and from any thread.
+        """
+        with self._wait_lock:
+            if self._result is None:
+                self._result = self._reap()
+            return self._result
+
+    def _reap(self) -> ExecResult:
+        while True:
+            _, status, usage = os.wait4(self.pid, os.WUNTRACED)
+            if not os.WIFSTOPPED(status):
+                break
+            # Suspended (e.g. Ctrl-Z in a pty); the Arm has no job
+            # control for foreground commands, so resume instead of hanging
+            self.signal(signal.SIGCONT)
+        wall = time.monotonic() - self.started
+        with self._lock:
+            # The pid may be reused from here on; stop signalling it
+            self._reaped = True
+        for timer in self._timers:
+            timer.cancel()
+        for reader in self._readers:
+            reader.join(DRAIN_TIMEOUT)
+
+        exit_code = os.waitstatus_to_exitcode(status)
+        if self.process is not None:
+            self.process.returncode = exit_code
+        cpu = usage.ru_utime + usage.ru_stime
+        return ExecResult(
+            command=self.command,
+            exit_code=exit_code,
+            wall_time=wall,
+            user_time=usage.ru_utime,
+            sys_time=usage.ru_stime,
+            max_rss_kb=usage.ru_maxrss,
+            timed_out=self._timed_out,
+            # SIGXCPU at the soft limit, SIGKILL if it was ignored up to
+            # the hard one (CPU accounting is tick-granular, allow a second)
+            cpu_limited=bool(self.cpu_limit) and (
+                exit_code == -signal.SIGXCPU
+                or (exit_code == -signal.SIGKILL and not self._timed_out
+                    and cpu >= self.cpu_limit + CPU_HARD_MARGIN - 1)
+            ),
+        )
+
+    def _schedule(self, delay: float, action: Callable[[], None]) -> None:
+        timer = threading.Timer(delay, action)
+        timer.daemon = True
+        self._timers.append(timer)
+        timer.start()
+
+    def _expire(self) -> None:
+        if self.signal(signal.SIGTERM):
+            self._timed_out = True
+            self._schedule(KILL_GRACE, lambda: self.signal(signal.SIGKILL))
+
+    @staticmethod
+    def _echo(terminal, chunk: bytes) -> None:
+        buffer = getattr(terminal, "buffer", None)
+        if buffer is not None:
+            buffer.write(chunk)
+        else:
+            terminal.write(chunk.decode("utf-8", "replace"))
+        terminal.flush()
+
+    def _pump(self, pipe, stream: str, terminal) -> None:
+        fd = pipe.fileno()
+        pending = b""
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            if self.echo:
+                self._echo(terminal, chunk)
+            if self.on_line is None:
+                continue
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                self.on_line(stream, line.decode("utf-8", "replace"))
+        if pending and self.on_line is not None:
+            self.on_line(stream, pending.decode("utf-8", "replace"))
+        pipe.close()
+
+    def _pump_tty(self, master_fd: int, terminal) -> None:
+        pending = b""
+        while True:
+            try:
+                chunk = os.read(master_fd, 65536)
+            except OSError:
+                # EIO once the last process holding the slave exits
+                break
+            if not chunk:
+                break
+            if self.echo:
+                self._echo(terminal, chunk)
+            if self.on_line is None:
+                continue
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                self.on_line("stdout", line.rstrip(b"\r").decode("utf-8", "replace"))
+        if pending and self.on_line is not None:
+            self.on_line("stdout", pending.rstrip(b"\r").decode("utf-8", "replace"))
+        os.close(master_fd)
+
+
+class _InputForwarder:
+    """Copies keystrokes from the terminal to a pty master on a thread."""
+
+    def __init__(self, master_fd: int, stdin_fd: int):
+        # Own copy of the master: the output reader closes the original
+        self.master_fd = os.dup(master_fd)
+        self.stdin_fd = stdin_fd
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                ready, _, _ = select.select([self.stdin_fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    return
+                data = os.read(self.stdin_fd, 1024)
+                if not data:
+                    return
+                os.write(self.master_fd, data)
+        except OSError:
+            return
+
+    def stop(self) -> None:
+        os.write(self._wake_w, b"x")
+        self._thread.join()
+        for fd in (self.master_fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+def _run_on_terminal(execution: Execution) -> ExecResult:
+    stdin_fd = sys.__stdin__.fileno()
+    saved = termios.tcgetattr(stdin_fd)
+    on_main_thread = threading.current_thread() is threading.main_thread()
+    if on_main_thread:
+        previous = signal.signal(
+            signal.SIGWINCH,
+            lambda *_: copy_window_size(stdin_fd, execution.master_fd),
+        )
+    # Raw mode: keys, Ctrl-C included, reach the command's own terminal
+    tty.setraw(stdin_fd)
+    forwarder = _InputForwarder(execution.master_fd, stdin_fd)
+    try:
+        return execution.wait()
+    finally:
+        forwarder.stop()
+        termios.tcsetattr(stdin_fd, termios.TCSADRAIN, saved)
+        if on_main_thread:
+            signal.signal(signal.SIGWINCH, previous)
+
+
+def run_foreground(execution: Execution) -> ExecResult:
+    """
+    Wait for a command in the foreground. On a pty the terminal is put in
+    raw mode and keystrokes are forwarded, so Ctrl-C is delivered by the
+    command's own terminal; otherwise Ctrl-C is forwarded to the
+    command's process group instead of interrupting the caller.
+    """
+    if execution.tty and sys.__stdin__.isatty():
+        return _run_on_terminal(execution)
+    while True:
+        try:
+            return execution.wait()
+        except KeyboardInterrupt:
+            execution.signal(signal.SIGINT)
+
+
+class ExecStats:
+    """Bounded history of ExecResults for the ``kali-stats`` built-in."""
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results: List[ExecResult] = []
+        self.total = 0
+        self.total_wall = 0.0
+        self.total_cpu = 0.0
+        self.peak_rss_kb = 0
+
+    def add(self, result: ExecResult) -> None:
+        with self._lock:
+            self._results.append(result)
+            del self._results[: -self.max_entries]
+            self.total += 1
+            self.total_wall += result.wall_time
+            self.total_cpu += result.cpu_time
+            self.peak_rss_kb = max(self.peak_rss_kb, result.max_rss_kb)
+
+    def recent(self) -> List[ExecResult]:
+        with self._lock:
+            return list(self._results)
+
+    def render(self, limit: int = 10) -> str:
+        lines = [
+            f"{'EXIT':>5} {'WALL':>9} {'CPU':>9} {'PEAK RSS':>10}  COMMAND"
+        ]
+        for result in self.recent()[-limit:]:
+            status = "T/O" if result.timed_out else (
+                "CPU" if result.cpu_limited else str(result.exit_code))
+            lines.append(
+                f"{status:>5} {result.wall_time:>8.2f}s {result.cpu_time:>8.2f}s "
+                f"{result.max_rss_kb / 1024:>8.1f}MB  {result.command}"
+            )
+        with self._lock:
+            lines.append(
+                f"{self.total} commands, {self.total_wall:.2f}s wall, "
+                f"{self.total_cpu:.2f}s CPU, peak RSS "
+                f"{self.peak_rss_kb / 1024:.1f}MB"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,187 @@
+"""
+K.A.O.S. Arm Client - Background Jobs
+Runs commands concurrently behind the prompt with bounded output buffers.
+"""
+
+import signal
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+QUEUED = "Queued"
+RUNNING = "Running"
+DONE = "Done"
+KILLED = "Killed"
+FAILED = "Failed"
+
+
+class Job:
+    """One background command and the last lines of its output."""
+
+    def __init__(self, job_id: int, command: str, args: List[str], buffer_lines: int):
+        self.id = job_id
+        self.command = command
+        self.args = args
+        self.status = QUEUED
+        self.execution = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished = threading.Event()
+        self.lines_seen = 0
+        self._buffer: Deque[str] = deque(maxlen=buffer_lines)
+        self._lock = threading.Lock()
+        self._attached: Optional[Callable[[str, str], None]] = None
+
+    @property
+    def active(self) -> bool:
+        return not self.finished.is_set()
+
+    def append(self, stream: str, line: str) -> None:
+        with self._lock:
+            self._buffer.append(line)
+            self.lines_seen += 1
+            if self._attached is not None:
+                self._attached(stream, line)
+
+    def attach(self, sink: Callable[[str, str], None]) -> List[str]:
+        """Route new lines to ``sink``; returns the buffered backlog."""
+        with self._lock:
+            self._attached = sink
+            return list(self._buffer)
+
+    def detach(self) -> None:
+        with self._lock:
+            self._attached = None
+
+    def output(self) -> List[str]:
+        with self._lock:
+            return list(self._buffer)
+
+    def signal(self, signum: int) -> bool:
+        execution = self.execution
+        return execution is not None and execution.signal(signum)
+
+    def describe(self) -> str:
+        if self.status == QUEUED:
+            detail = QUEUED
+        elif self.status == RUNNING:
+            detail = f"{RUNNING} {time.monotonic() - self.started:.0f}s"
+        elif self.status == DONE and self.result is not None:
+            code = self.result.exit_code
+            detail = DONE if code == 0 else f"Exit {code}"
+        else:
+            detail = self.status
+        return f"[{self.id}]  {detail:<12} {self.command}"
+
+
+class JobManager:
+    """
+    Background job table with a concurrency cap.
+
+    ``spawn(job, on_line)`` must start the command and return an object
+    with ``wait()`` and ``signal(signum)`` (an executor.Execution). At
+    most ``max_running`` jobs run at once; the rest are queued until a
+    slot frees up. Each job keeps its last ``buffer_lines`` output lines.
+    Finished jobs are announced once through ``take_finished`` and kept
+    (up to ``keep_finished``) so their output can still be viewed.
+    """
+
+    def __init__(
+        self,
+        spawn: Callable,
+        max_running: int = 4,
+        buffer_lines: int = 1000,
+        keep_finished: int = 20,
+        on_line: Optional[Callable[[Job, str, str], None]] = None,
+        on_exit: Optional[Callable[[Job], None]] = None,
+    ):
+        self.spawn = spawn
+        self.max_running = max_running
+        self.buffer_lines = buffer_lines
+        self.keep_finished = keep_finished
+        self.on_line = on_line
+        self.on_exit = on_exit
+        self._slots = threading.BoundedSemaphore(max_running)
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Job] = {}
+        self._finished: List[Job] = []
+        self._next_id = 1
+
+    def submit(self, command: str, args: List[str]) -> Job:
+        with self._lock:
+            job = Job(self._next_id, command, args, self.buffer_lines)
+            self._next_id += 1
+            self._jobs[job.id] = job
+        threading.Thread(
+            target=self._supervise, args=(job,),
+            name=f"arm-job-{job.id}", daemon=True,
+        ).start()
+        return job
+
+    def get(self, job_id: Optional[int] = None) -> Optional[Job]:
+        """Job by id, or the most recent job when ``job_id`` is None."""
+        with self._lock:
+            if job_id is None:
+                return self._jobs[max(self._jobs)] if self._jobs else None
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return [self._jobs[job_id] for job_id in sorted(self._jobs)]
+
+    def active(self) -> int:
+        """Jobs running or waiting for a slot."""
+        return sum(1 for job in self.list() if job.active)
+
+    def kill(self, job: Job, signum: int = signal.SIGTERM) -> bool:
+        """Signal a running job, or cancel it if it has not started yet."""
+        with job._lock:
+            if job.status == QUEUED:
+                job.status = KILLED
+                return True
+        return job.signal(signum)
+
+    def take_finished(self) -> List[Job]:
+        """Jobs finished since the last call (for prompt notifications)."""
+        with self._lock:
+            finished, self._finished = self._finished, []
+            return finished
+
+    def _supervise(self, job: Job) -> None:
+        with self._slots:
+            with job._lock:
+                cancelled = job.status == KILLED
+                if not cancelled:
+                    job.status = RUNNING
+                    job.started = time.monotonic()
+            if not cancelled:
+                try:
+                    job.execution = self.spawn(job, self._line_sink(job))
+                    job.result = job.execution.wait()
+                    job.status = DONE
+                except OSError as e:
+                    job.error = str(e)
+                    job.status = FAILED
+        if self.on_exit is not None:
+            self.on_exit(job)
+        with self._lock:
+            self._finished.append(job)
+        job.finished.set()
+        with self._lock:
+            self._prune()
+
+    def _line_sink(self, job: Job) -> Callable[[str, str], None]:
+        def sink(stream: str, line: str) -> None:
+            job.append(stream, line)
+            if self.on_line is not None:
+                self.on_line(job, stream, line)
+        return sink
+
+    def _prune(self) -> None:
+        done = [job_id for job_id, job in sorted(self._jobs.items())
+                if not job.active]
+        for job_id in done[: max(0, len(done) - self.keep_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,173 @@
+"""
+K.A.O.S. Arm Client - Session Journal
+Append-only NDJSON audit trail written by a background thread.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable
+
+_STOP = object()
+
+
+class SessionJournal:
+    """
+    Audit journal of commands, suggestions, confirmations and exit codes.
+
+    ``record`` only enqueues a dict and never touches the disk, so the
+    REPL pays no syscall per event. A writer thread drains the queue in
+    batches, writes one NDJSON line per record and flushes after every
+    batch. Written data is fsynced once per ``fsync_interval`` seconds,
+    covering every batch written in between with a single call.
+
+    Durability window: a crash of the Arm process loses only records
+    still in the queue (the writer wakes immediately, so normally none).
+    A power or kernel failure can additionally lose what was written in
+    the last ``fsync_interval`` seconds. ``close`` drains the queue and
+    fsyncs, so a clean ``kali-exit`` loses nothing.
+
+    The queue holds at most ``max_queue`` records. If the disk stalls
+    long enough to fill it, further records are dropped rather than
+    blocking the operator, and a ``journal_gap`` record with the count
+    is written once the writer catches up. Past ``max_bytes`` the file
+    is rotated to ``path.1`` ... ``path.<backups>``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 5,
+        fsync_interval: float = 1.0,
+        max_queue: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.fsync_interval = fsync_interval
+        self._clock = clock
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self.dropped = 0
+        self._reported_drops = 0
+        self.errors = 0
+        self._closed = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Open eagerly so a missing volume mount is reported at startup
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self._thread = threading.Thread(
+            target=self._run, name="arm-journal", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, kind: str, **fields) -> bool:
+        """Queue one event; returns False if it had to be dropped."""
+        if self._closed:
+            return False
+        with self._seq_lock:
+            self._seq += 1
+            entry = {"ts": round(self._clock(), 6), "seq": self._seq, "type": kind}
+        entry.update(fields)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain outstanding records, fsync and stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            # While unsynced data exists, wake up in time to fsync it
+            timeout = None
+            if self._dirty:
+                timeout = max(0.0, self._last_sync + self.fsync_interval
+                              - time.monotonic())
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                self._sync()
+                continue
+            while len(batch) < 512:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(entry is _STOP for entry in batch)
+            self._write([entry for entry in batch if entry is not _STOP],
+                        force_sync=stop)
+            if stop:
+                self._file.close()
+                return
+
+    def _write(self, batch, force_sync: bool = False) -> None:
+        if self.dropped > self._reported_drops:
+            gap = self.dropped - self._reported_drops
+            self._reported_drops = self.dropped
+            batch.insert(0, {"ts": round(self._clock(), 6), "seq": None,
+                             "type": "journal_gap", "dropped": gap})
+        try:
+            for entry in batch:
+                line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+                self._file.write(line)
+                self._size += len(line.encode("utf-8"))
+                if self._size >= self.max_bytes:
+                    self._rotate()
+            self._file.flush()
+            self._dirty = True
+            if force_sync or (time.monotonic() - self._last_sync
+                              >= self.fsync_interval):
+                self._sync()
+        except OSError:
+            self.errors += 1
+
+    def _sync(self) -> None:
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            self.errors += 1
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._file.flush()
+        self._sync()
+        # Files are renamed under the open handle, which is only swapped
+        # once the new file is open: if any step fails (ENOSPC, EACCES)
+        # writing carries on into the old handle
+        try:
+            # Already renamed away if the last reopen failed
+            if os.path.exists(self.path):
+                for index in range(self.backups - 1, 0, -1):
+                    source = f"{self.path}.{index}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{index + 1}")
+                if self.backups > 0:
+                    os.replace(self.path, self.path + ".1")
+                else:
+                    os.unlink(self.path)
+            new_file = open(self.path, "a", encoding="utf-8")
+        except OSError:
+            self.errors += 1
+        else:
+            self._file.close()
+            self._file = new_file
+        # On failure, retry after another max_bytes rather than per line
+        self._size = 0
@@ -5,23 +5,130 @@ Acts as the frontend CLI for the distributed system.
 Replicates the Kali Linux environment.
 """
 
+import atexit
 import os
 import time
-import subprocess
 import shlex
 import shutil
-import requests
-from datetime import datetime
+import signal
+import sqlite3
+import subprocess
+import sys
 import colorama
 from colorama import Fore, Style
 
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import ANSI
+except ImportError:
+    PromptSession = None
+
+from brain_client import (
+    AnalysisStore,
+    BrainClient,
+    BrainHealth,
+    BrainRejected,
+    BrainUnavailable,
+)
+from executor import ExecResult, ExecStats, Execution, run_foreground
+from jobs import JobManager
+from journal import SessionJournal
+from prefetch import Prefetcher
+
 # Initialize colorama for ANSI escape codes
 colorama.init()
 
 # Configuration
-SESSION_LOG = "/opt/arm/session.log"
+SESSION_LOG = os.getenv("SESSION_LOG", "/opt/arm/session.log")
+# Audit journal rotation and fsync cadence (the durability window)
+JOURNAL_MAX_BYTES = int(os.getenv("JOURNAL_MAX_BYTES", str(10 * 1024 * 1024)))
+JOURNAL_BACKUPS = int(os.getenv("JOURNAL_BACKUPS", "5"))
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("JOURNAL_FSYNC_INTERVAL", "1"))
 BRAIN_HOST = os.getenv("BRAIN_HOST", "127.0.0.1")
 BRAIN_PORT = os.getenv("BRAIN_PORT", "5000")
+# Stream LLM tokens as they arrive (set BRAIN_STREAM=0 for one-shot replies)
+BRAIN_STREAM = os.getenv("BRAIN_STREAM", "1") == "1"
+# Fail fast on a dead host; a slow LLM reply may still take BRAIN_READ_TIMEOUT
+BRAIN_CONNECT_TIMEOUT = float(os.getenv("BRAIN_CONNECT_TIMEOUT", "1"))
+BRAIN_READ_TIMEOUT = float(os.getenv("BRAIN_READ_TIMEOUT", "15"))
+# Skip the Brain this long after a failure (doubles per failure, capped)
+BRAIN_RETRY_AFTER = float(os.getenv("BRAIN_RETRY_AFTER", "2"))
+BRAIN_RETRY_MAX = float(os.getenv("BRAIN_RETRY_MAX", "60"))
+# On-disk cache of recent analyses (ANALYSIS_CACHE_SIZE=0 disables it)
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "/opt/arm/analysis_cache.db")
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "500"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+# Analyze the line being typed after this pause in seconds (0 disables);
+# needs prompt_toolkit and an interactive terminal
+PREFETCH_DELAY = float(os.getenv("ARM_PREFETCH_DELAY", "0.4"))
+# Per-command limits in seconds (0 = unlimited): wall clock and CPU time
+EXEC_TIMEOUT = float(os.getenv("ARM_EXEC_TIMEOUT", "0"))
+EXEC_CPU_LIMIT = int(os.getenv("ARM_EXEC_CPU_LIMIT", "0"))
+# Background jobs (command ending in "&"): concurrency cap and lines kept per job
+MAX_JOBS = int(os.getenv("ARM_MAX_JOBS", "4"))
+JOB_BUFFER_LINES = int(os.getenv("ARM_JOB_BUFFER_LINES", "1000"))
+BUILTINS = ("exit", "kali-exit", "kali-stats", "jobs", "fg")
+
+
+def build_brain_client():
+    """Creates the Brain client; runs without the disk cache if unwritable."""
+    store = None
+    if ANALYSIS_CACHE_SIZE > 0:
+        try:
+            store = AnalysisStore(
+                ANALYSIS_CACHE_PATH,
+                max_entries=ANALYSIS_CACHE_SIZE,
+                ttl=ANALYSIS_CACHE_TTL,
+            )
+        except (OSError, sqlite3.Error) as e:
+            print(Fore.YELLOW + "Analysis cache disabled: " + str(e) + Style.RESET_ALL)
+    return BrainClient(
+        f"http://{BRAIN_HOST}:{BRAIN_PORT}",
+        store=store,
+        health=BrainHealth(BRAIN_RETRY_AFTER, BRAIN_RETRY_MAX),
+        connect_timeout=BRAIN_CONNECT_TIMEOUT,
+        read_timeout=BRAIN_READ_TIMEOUT,
+    )
+
+
+brain = build_brain_client()
+journal = None
+exec_stats = ExecStats()
+
+
+def spawn_job(job, on_line):
+    """Starts a background job: no terminal echo and no stdin."""
+    return Execution(
+        job.args,
+        command=job.command,
+        on_line=on_line,
+        echo=False,
+        wall_limit=EXEC_TIMEOUT,
+        cpu_limit=EXEC_CPU_LIMIT,
+        stdin=subprocess.DEVNULL,
+    )
+
+
+def journal_job_output(job, stream, line):
+    audit("output", job=job.id, stream=stream, line=line)
+
+
+def journal_job_exit(job):
+    if job.result is not None:
+        exec_stats.add(job.result)
+        audit("exec", origin="job", job=job.id, **job.result.as_dict())
+    else:
+        audit("exec", origin="job", job=job.id, command=job.command,
+              error=job.error or "cancelled")
+
+
+jobs = JobManager(
+    spawn_job,
+    max_running=MAX_JOBS,
+    buffer_lines=JOB_BUFFER_LINES,
+    on_line=journal_job_output,
+    on_exit=journal_job_exit,
+)
 
 
 def print_banner():
@@ -34,55 +141,323 @@ def print_banner():
 
 def ensure_persistence():
     """
-    Write a timestamp to the session log.
+    Open the session journal and record the session start.
     This verifies volume mounting on the host.
     If this fails, the container may not be mounted correctly.
     """
+    global journal
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        entry = "[" + timestamp + "] Session started. Brain: "
-        entry = entry + BRAIN_HOST + ":" + BRAIN_PORT + "\n"
-        with open(SESSION_LOG, "a") as f:
-            f.write(entry)
+        journal = SessionJournal(
+            SESSION_LOG,
+            max_bytes=JOURNAL_MAX_BYTES,
+            backups=JOURNAL_BACKUPS,
+            fsync_interval=JOURNAL_FSYNC_INTERVAL,
+        )
     except IOError as e:
         print(Fore.RED + "ERROR: Failed to write to persistent storage: " + str(e) + Style.RESET_ALL)
+        return
+    atexit.register(journal.close)
+    audit("session_start", brain=BRAIN_HOST + ":" + BRAIN_PORT)
+
+
+def audit(kind, **fields):
+    """Queue an audit event; a no-op when the journal is unavailable."""
+    if journal is not None:
+        journal.record(kind, **fields)
+
+
+def journal_output(stream, line):
+    audit("output", stream=stream, line=line)
+
+
+def run_command(command_line, origin):
+    """
+    Executes a command line, streaming its output to the terminal and
+    the journal, and journals its exit code and resource usage.
+    A trailing "&" starts it as a background job instead.
+    Returns the ExecResult, or None if it was backgrounded or could not
+    be parsed.
+    """
+    background = command_line.endswith("&") and not command_line.endswith("&&")
+    if background:
+        command_line = command_line[:-1].rstrip()
+    try:
+        args = shlex.split(command_line)
+    except ValueError:
+        args = []
+    if not args:
+        label = "proposed command" if origin == "brain" else "command"
+        print(Fore.RED + "Failed to parse " + label + "." + Style.RESET_ALL)
+        audit("exec", command=command_line, origin=origin, error="parse")
+        return None
+
+    if background:
+        state = "queued" if jobs.active() >= MAX_JOBS else "started"
+        job = jobs.submit(command_line, args)
+        print(Fore.GREEN + f"[{job.id}] {state}: {command_line}" + Style.RESET_ALL)
+        audit("job_start", job=job.id, command=command_line, origin=origin)
+        return None
+
+    try:
+        execution = Execution(
+            args,
+            command=command_line,
+            on_line=journal_output,
+            wall_limit=EXEC_TIMEOUT,
+            cpu_limit=EXEC_CPU_LIMIT,
+            # A pty keeps interactive tools (ssh, msfconsole, vim) working
+            tty=sys.stdin.isatty() and sys.stdout.isatty(),
+        )
+    except OSError as e:
+        print(Fore.RED + "Error executing command: " + str(e) + Style.RESET_ALL)
+        result = ExecResult(command_line, 127, error=str(e))
+    else:
+        result = run_foreground(execution)
+        if result.timed_out:
+            print(Fore.RED + f"Command timed out after {EXEC_TIMEOUT:g}s." + Style.RESET_ALL)
+        elif result.cpu_limited:
+            print(Fore.RED + f"Command exceeded its {EXEC_CPU_LIMIT}s CPU limit." + Style.RESET_ALL)
+        elif result.exit_code:
+            err = "Error executing command: exit status " + str(result.exit_code)
+            print(Fore.RED + err + Style.RESET_ALL)
+
+    exec_stats.add(result)
+    audit("exec", origin=origin, **result.as_dict())
+    return result
+
+
+def parse_job_id(arg):
+    """Accepts "%N" or "N"; None for anything else."""
+    arg = arg[1:] if arg.startswith("%") else arg
+    return int(arg) if arg.isdigit() else None
+
+
+def print_job_line(stream, line):
+    print(line, file=sys.stderr if stream == "stderr" else sys.stdout, flush=True)
+
+
+def foreground_job(job):
+    """
+    Replays a job's buffered output, then follows it live until it ends.
+    Ctrl-C is forwarded to the job.
+    """
+    for line in job.attach(print_job_line):
+        print(line)
+    try:
+        while True:
+            try:
+                job.finished.wait()
+                break
+            except KeyboardInterrupt:
+                jobs.kill(job, signal.SIGINT)
+    finally:
+        job.detach()
+    print(Fore.YELLOW + job.describe() + Style.RESET_ALL)
+
+
+def job_builtin(user_input):
+    """
+    Handles the jobs, fg and "kill %N" built-ins.
+    Returns False if the line is not a job built-in.
+    """
+    words = user_input.split()
+    if words[0] == "jobs":
+        for job in jobs.list():
+            print(job.describe())
+        return True
+
+    if words[0] == "fg":
+        job_id = parse_job_id(words[1]) if len(words) > 1 else None
+        job = jobs.get(job_id)
+        if job is None:
+            print(Fore.RED + "fg: no such job" + Style.RESET_ALL)
+        else:
+            foreground_job(job)
+        return True
+
+    # Plain "kill PID" still goes to /bin/kill
+    targets = [parse_job_id(word) for word in words[1:] if word.startswith("%")]
+    if words[0] != "kill" or not targets:
+        return False
+    signum = signal.SIGTERM
+    for word in words[1:]:
+        if word.startswith("-") and word[1:].isdigit():
+            signum = int(word[1:])
+        elif word.startswith("-") and hasattr(signal, "SIG" + word[1:].upper()):
+            signum = getattr(signal, "SIG" + word[1:].upper())
+    for job_id in targets:
+        job = jobs.get(job_id) if job_id is not None else None
+        if job is None or not jobs.kill(job, signum):
+            print(Fore.RED + "kill: no such running job" + Style.RESET_ALL)
+    return True
+
+
+def announce_finished_jobs():
+    """Reports jobs finished since the last prompt, like a shell does."""
+    for job in jobs.take_finished():
+        print(Fore.YELLOW + job.describe() + Style.RESET_ALL)
+
+
+def offline_analysis(command_input, error):
+    """
+    Answer used while the Brain is unreachable: a previous Brain answer
+    for this prompt from the disk cache, else the local rules. An online
+    Brain is always asked, since scope and rules may have changed.
+    """
+    print(Fore.RED + "⚠️ Brain offline: " + str(error) + Style.RESET_ALL)
+    cached = brain.cached(command_input)
+    if cached is None:
+        return local_fallback(command_input)
+    print(Fore.GREEN + "⚡ Cached analysis" + Style.RESET_ALL)
+    return cached
+
+
+def rejected_analysis(command_input, error):
+    """Shows a Brain rejection (e.g. out of scope) as is; returns None."""
+    print(Fore.RED + "⛔ Brain rejected: " + error.message + Style.RESET_ALL)
+    audit("rejected", input=command_input, status=error.status,
+          error=error.message)
 
 
 def brain_analysis(command_input):
     """
     Sends the command to the Brain backend for analysis.
-    Falls back to local rules if the Brain is offline.
+    Falls back to cached answers or local rules if the Brain is offline;
+    returns None if the Brain rejects the request.
     """
-    url = f"http://{BRAIN_HOST}:{BRAIN_PORT}/api/v1/analyze"
-    payload = {"command": command_input, "session_id": "cli-user"}
+    try:
+        llm_layer = brain.analyze(command_input)
+    except BrainUnavailable as e:
+        return offline_analysis(command_input, e)
+    except BrainRejected as e:
+        return rejected_analysis(command_input, e)
+
+    result = {
+        "proposed_command": llm_layer.get("command"),
+        "reasoning": llm_layer.get("reasoning"),
+    }
+    brain.remember(command_input, result)
+    return result
+
+
+def stream_brain_analysis(command_input):
+    """
+    Streams the analysis from the Brain and renders it while it arrives:
+    the heuristic verdict first, then LLM tokens one by one.
+    Falls back like brain_analysis.
+    """
+    proposed_cmd = command_input
+    reasoning = ""
+    insight_started = False
+    failed = False
 
     try:
-        response = requests.post(url, json=payload, timeout=2)
-        response.raise_for_status()
-        data = response.json()
-
-        # Parse Backend Schema
-        llm_layer = data.get("llm_layer", {})
-        return {
-            "proposed_command": llm_layer.get("command"),
-            "reasoning": llm_layer.get("reasoning"),
-        }
-    except requests.exceptions.RequestException as e:
-        print(Fore.RED + "⚠️ Brain offline: " + str(e) + Style.RESET_ALL)
-
-        # Fallback Logic
-        proposed_cmd = "echo 'Analysis failed: " + command_input + "'"
-        lower_input = command_input.lower()
-
-        if "scan" in lower_input:
-            proposed_cmd = "nmap -sV localhost"
-        elif "ip" in lower_input or "address" in lower_input:
-            proposed_cmd = "ip a"
-
-        return {
-            "proposed_command": proposed_cmd,
-            "reasoning": "Offline fallback rule applied.",
-        }
+        for event in brain.stream(command_input):
+            kind = event.get("event")
+
+            if kind == "analysis":
+                llm_layer = event.get("llm_layer", {})
+                proposed_cmd = llm_layer.get("command")
+                reasoning = llm_layer.get("reasoning", "")
+                print("🤖 AI Reasoning: ")
+                print(Fore.CYAN + reasoning, end="", flush=True)
+            elif kind == "token":
+                if not insight_started:
+                    print("\n💡 LLM Insight: ", end="", flush=True)
+                    insight_started = True
+                print(event.get("text", ""), end="", flush=True)
+            elif kind == "error":
+                failed = True
+                print(" | " + event.get("message", ""), end="", flush=True)
+            elif kind == "done":
+                reasoning = event.get("reasoning", reasoning)
+    except BrainUnavailable as e:
+        print(Style.RESET_ALL, end="")
+        return offline_analysis(command_input, e)
+    except BrainRejected as e:
+        return rejected_analysis(command_input, e)
+
+    print(Style.RESET_ALL)
+    result = {"proposed_command": proposed_cmd, "reasoning": reasoning}
+    # Answers degraded by an LLM error are not worth replaying
+    if not failed:
+        brain.remember(command_input, result)
+    return dict(result, rendered=True)
+
+
+def is_natural_language(line):
+    """True for lines routed to the Brain rather than executed directly."""
+    words = line.split()
+    return bool(words) and words[0] not in BUILTINS and not shutil.which(words[0])
+
+
+def speculative_analysis(command_input, cancelled):
+    """
+    Silent Brain analysis for the prefetcher. Streams so a stale request
+    can be abandoned mid-answer; returns None if cancelled, offline or
+    rejected, leaving the submitted line to the normal path.
+    """
+    result = {"proposed_command": command_input, "reasoning": ""}
+    try:
+        for event in brain.stream(command_input):
+            if cancelled():
+                return None
+            kind = event.get("event")
+            if kind == "analysis":
+                llm_layer = event.get("llm_layer", {})
+                result["proposed_command"] = llm_layer.get("command")
+                result["reasoning"] = llm_layer.get("reasoning", "")
+            elif kind == "error":
+                return None
+            elif kind == "done":
+                result["reasoning"] = event.get("reasoning", result["reasoning"])
+    except (BrainUnavailable, BrainRejected):
+        return None
+    return result
+
+
+def build_line_reader():
+    """
+    Returns (read_line, prefetcher). With prompt_toolkit on a terminal,
+    every edit feeds the prefetcher; otherwise plain input() is used.
+    """
+    if PromptSession is None or PREFETCH_DELAY <= 0 or not sys.stdin.isatty():
+        return (lambda prompt: input(prompt)), None
+
+    prefetcher = Prefetcher(
+        speculative_analysis, delay=PREFETCH_DELAY, accept=is_natural_language
+    )
+    session = PromptSession()
+    session.default_buffer.on_text_changed += (
+        lambda buffer: prefetcher.update(buffer.text)
+    )
+    return (lambda prompt: session.prompt(ANSI(prompt))), prefetcher
+
+
+def prefetched_analysis(prefetcher, command_input):
+    """Takes a speculative result for the submitted line, if there is one."""
+    if prefetcher is None:
+        return None
+    result = prefetcher.take(command_input, timeout=BRAIN_READ_TIMEOUT)
+    if result is not None:
+        brain.remember(command_input, result)
+    return result
+
+
+def local_fallback(command_input):
+    """Offline rules used when the Brain cannot be reached."""
+    proposed_cmd = "echo 'Analysis failed: " + command_input + "'"
+    lower_input = command_input.lower()
+
+    if "scan" in lower_input:
+        proposed_cmd = "nmap -sV localhost"
+    elif "ip" in lower_input or "address" in lower_input:
+        proposed_cmd = "ip a"
+
+    return {
+        "proposed_command": proposed_cmd,
+        "reasoning": "Offline fallback rule applied.",
+    }
 
 
 def get_kali_prompt():
@@ -106,11 +481,13 @@ def get_kali_prompt():
 def main():
     print_banner()
     ensure_persistence()
+    read_line, prefetcher = build_line_reader()
 
     while True:
         try:
+            announce_finished_jobs()
             # 1. The Prompt (Visual Replica)
-            user_input = input(get_kali_prompt()).strip()
+            user_input = read_line(get_kali_prompt()).strip()
 
             if not user_input:
                 continue
@@ -130,8 +507,20 @@ def main():
                     + "Session ended. Shutting down container..."
                     + Style.RESET_ALL
                 )
+                # Jobs run in their own sessions and would outlive the Arm
+                for job in jobs.list():
+                    if job.active:
+                        jobs.kill(job)
+                audit("session_end")
                 break
 
+            if user_input == "kali-stats":
+                print(exec_stats.render())
+                continue
+
+            if job_builtin(user_input):
+                continue
+
             # 3. Command Heuristics & Dispatch
             first_word = user_input.split()[0] if user_input else ""
 
@@ -139,39 +528,39 @@ def main():
                 # Reflex Loop: Trusted Execution (No Confirmation)
                 msg = Fore.GREEN + "⚡ Executing: " + user_input + Style.RESET_ALL
                 print(msg)
-                try:
-                    args = shlex.split(user_input)
-                    subprocess.run(args, check=True)
-                except subprocess.CalledProcessError as e:
-                    err = Fore.RED + "Error executing command: " + str(e) + Style.RESET_ALL
-                    print(err)
-                except ValueError:
-                    print(Fore.RED + "Failed to parse command." + Style.RESET_ALL)
+                audit("command", input=user_input, route="reflex")
+                run_command(user_input, "reflex")
                 continue
 
             # Cognition Loop: Natural Language -> Brain API
-            response = brain_analysis(user_input)
+            audit("command", input=user_input, route="brain")
+            # (the answer may already be prefetched while the line was typed)
+            response = prefetched_analysis(prefetcher, user_input)
+            if response is None and BRAIN_STREAM:
+                response = stream_brain_analysis(user_input)
+            elif response is None:
+                response = brain_analysis(user_input)
+            if response is None:
+                continue
             proposed_cmd = response.get("proposed_command")
             reasoning = response.get("reasoning", "No reasoning provided.")
 
-            print("🤖 AI Reasoning: ")
-            print(Fore.CYAN + str(reasoning) + Style.RESET_ALL)
+            if not response.get("rendered"):
+                print("🤖 AI Reasoning: ")
+                print(Fore.CYAN + str(reasoning) + Style.RESET_ALL)
             print("🤖 AI Suggests: ")
             print(Fore.CYAN + str(proposed_cmd) + Style.RESET_ALL)
+            audit("suggestion", input=user_input, proposed_command=proposed_cmd,
+                  reasoning=reasoning)
 
             # 4. Safety Loop (Human-in-the-Loop / English UI)
             confirm = input("Execute this command? [Y/n]: ").strip().upper()
+            audit("confirm", proposed_command=proposed_cmd, answer=confirm,
+                  accepted=confirm == "Y")
 
             if confirm == "Y":  # 'Y' stands for 'Yes'
                 # 5. Execution Phase
-                try:
-                    args = shlex.split(proposed_cmd)
-                    subprocess.run(args, check=True)
-                except subprocess.CalledProcessError as e:
-                        err = Fore.RED + "Error executing command: " + str(e) + Style.RESET_ALL
-                        print(err)
-                except ValueError:
-                    print(Fore.RED + "Failed to parse proposed command." + Style.RESET_ALL)
+                run_command(proposed_cmd, "brain")
             else:
                 print(f"{Fore.YELLOW}Command cancelled.{Style.RESET_ALL}")
 
@@ -179,8 +568,13 @@ def main():
             print("\n" + Fore.YELLOW + "Use 'kali-exit' to terminate." + Style.RESET_ALL)
             continue
         except KeyboardInterrupt:
+            if prefetcher is not None:
+                prefetcher.cancel()
             print("\n" + Fore.YELLOW + "Use 'kali-exit' to terminate." + Style.RESET_ALL)
 
+    if journal is not None:
+        journal.close()
+
 
 if __name__ == "__main__":
     main()
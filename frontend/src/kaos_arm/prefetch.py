@@ -0,0 +1,163 @@
+"""
+K.A.O.S. Arm Client - Speculative Prefetch
+Starts the Brain analysis while the operator is still typing, so the
+answer is often ready by the time Enter is pressed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# fetch(text, cancelled) -> result or None; should poll cancelled() often
+Fetch = Callable[[str, Callable[[], bool]], Optional[Dict]]
+
+
+def normalize_line(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class Prefetcher:
+    """
+    Debounced, latest-wins background analysis of the line being typed.
+
+    ``update`` is called on every keystroke; once the text has been
+    unchanged for ``delay`` seconds a single worker thread runs
+    ``fetch`` for it. Only one request is in flight at a time. Text that
+    changes before its pause is over is never sent, and a request whose
+    text is no longer current is told to stop through ``cancelled``.
+    ``take`` returns the result for a submitted line, waiting for the
+    in-flight request if it is for that same line. Results older than
+    ``max_age`` seconds are discarded, so a line left sitting at the
+    prompt is analyzed afresh rather than answered from an old reply.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        delay: float = 0.4,
+        min_chars: int = 4,
+        accept: Callable[[str], bool] = lambda text: True,
+        max_results: int = 8,
+        max_age: float = 5.0,
+    ):
+        self.fetch = fetch
+        self.delay = delay
+        self.min_chars = min_chars
+        self.accept = accept
+        self.max_results = max_results
+        self.max_age = max_age
+        self._cond = threading.Condition()
+        self._latest: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._due = 0.0
+        self._inflight: Optional[str] = None
+        # key -> (monotonic time fetched, result)
+        self._results: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._closed = False
+        self.fetched = 0
+        self.cancelled = 0
+        self._thread = threading.Thread(
+            target=self._run, name="arm-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def update(self, text: str) -> None:
+        """Record the current line; restarts the typing-pause timer."""
+        key = normalize_line(text)
+        with self._cond:
+            if key == self._latest:
+                return
+            self._latest = key
+            if len(key) < self.min_chars or self._fresh(key):
+                self._pending = None
+            else:
+                self._pending = text
+                self._due = time.monotonic() + self.delay
+            self._cond.notify_all()
+
+    def take(self, text: str, timeout: float = 15.0) -> Optional[Dict]:
+        """
+        Result for a submitted line, or None if it was never prefetched.
+        Pending and stale requests are dropped either way.
+        """
+        key = normalize_line(text)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._latest = key
+            self._pending = None
+            self._cond.notify_all()
+            while self._inflight == key and key not in self._results:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            entry = self._results.pop(key, None)
+            self._latest = None
+            if entry is None or time.monotonic() - entry[0] > self.max_age:
+                return None
+            return entry[1]
+
+    def cancel(self) -> None:
+        """Forget the current line (e.g. on Ctrl-C)."""
+        with self._cond:
+            self._latest = None
+            self._pending = None
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._latest = None
+            self._pending = None
+            self._cond.notify_all()
+        self._thread.join(timeout=1)
+
+    def _fresh(self, key: str) -> bool:
+        """True if an unexpired result is stored; drops an expired one."""
+        entry = self._results.get(key)
+        if entry is None:
+            return False
+        if time.monotonic() - entry[0] > self.max_age:
+            del self._results[key]
+            return False
+        return True
+
+    def _is_stale(self, key: str) -> bool:
+        with self._cond:
+            return self._closed or self._latest != key
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending is not None:
+                        wait = self._due - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                text, self._pending = self._pending, None
+                key = normalize_line(text)
+                self._inflight = key
+
+            result = None
+            try:
+                if self.accept(text):
+                    result = self.fetch(text, lambda: self._is_stale(key))
+            except Exception:
+                result = None
+
+            with self._cond:
+                self._inflight = None
+                if result is not None:
+                    self.fetched += 1
+                    self._results[key] = (time.monotonic(), result)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+                elif self._latest != key:
+                    self.cancelled += 1
+                self._cond.notify_all()
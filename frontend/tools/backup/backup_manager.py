@@ -12,56 +12,155 @@ import argparse
 from datetime import datetime
 import glob
 
+from compression import CODECS, EXTENSIONS, open_compressed
+from incremental import ChunkStore
+from tee_writer import GpgPipeSigner, TeeWriter, blake3
+
 # Configuration
 BACKUP_DIR = "/opt/arm/backups"
 SOURCE_DIR = "/opt/arm"
 MAX_BACKUPS = 5
+INCREMENTAL_DIR = os.path.join(BACKUP_DIR, "incremental")
 GPG_HOME = "/root/.gnupg"
 
 
-def create_backup(dev_mode=False):
-    """Create a timestamped tar.gz backup of the source directory.
+def create_backup(dev_mode=False, codec="gzip", level=None, threads=None,
+                  use_blake3=False):
+    """Create a timestamped tar.gz (or tar.zst) backup of the source
+    directory.
 
-    The archive is stored under BACKUP_DIR and will be signed.
+    The tar stream is compressed on `threads` cores and written straight
+    to disk. The same pass hashes and signs it, so the archive is never
+    read back. The archive is stored under BACKUP_DIR.
     """
     if not os.path.exists(BACKUP_DIR):
         os.makedirs(BACKUP_DIR)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"kaos_arm_backup_{timestamp}.tar.gz"
+    filename = f"kaos_arm_backup_{timestamp}{EXTENSIONS[codec]}"
     filepath = os.path.join(BACKUP_DIR, filename)
+    partial = filepath + ".part"
+    algorithms = ("sha256", "blake3") if use_blake3 else ("sha256",)
 
     print("Creating backup: " + filepath)
+    signer = open_signer(filepath, dev_mode)
+
+    # Create the tarball archive; renamed into place only when complete
+    try:
+        with open(partial, "wb") as out:
+            tee = TeeWriter(out, algorithms, sinks=[signer] if signer else [])
+            stream = open_compressed(tee, codec, level, threads)
+            with tarfile.open(fileobj=stream, mode="w|") as tar:
+                tar.add(
+                    SOURCE_DIR,
+                    arcname=os.path.basename(SOURCE_DIR),
+                    filter=skip_backups,
+                )
+            stream.close()
+        os.replace(partial, filepath)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        if signer:
+            signer.close()
+            if os.path.exists(signer.output):
+                os.remove(signer.output)
+        raise
 
-    # Create the tarball archive
-    with tarfile.open(filepath, "w:gz") as tar:
-        tar.add(SOURCE_DIR, arcname=os.path.basename(SOURCE_DIR))
+    # Finish the streamed signature
+    if signer:
+        if not signer.close():
+            print("ERROR: Failed to sign backup.")
+            sys.exit(1)
+        print("Signature created successfully.")
 
-    # Sign the backup artifact
-    sign_backup(filepath, dev_mode)
+    for name, digest in tee.hexdigests().items():
+        with open(f"{filepath}.{name}", "w") as f:
+            f.write(f"{digest}  {filename}\n")
+        print(f"{name.upper()}: {digest}")
+    print(f"Wrote {tee.bytes_written / (1024 * 1024):.1f} MB")
 
     return filepath
 
 
-def sign_backup(filepath, dev_mode):
-    """Signs the backup file using GPG."""
-    gpg = gnupg.GPG(gnupghome=GPG_HOME)
+def create_incremental_backup(dev_mode=False, level=None):
+    """Snapshot the source directory into the chunk store.
+
+    Only files whose size or mtime changed since the last snapshot are
+    read; the signed artifact is the snapshot manifest.
+    """
+    store = ChunkStore(INCREMENTAL_DIR, level or 6)
+    print("Creating incremental snapshot in " + INCREMENTAL_DIR)
+    manifest, stats = store.backup(SOURCE_DIR, exclude=[BACKUP_DIR])
+    print(
+        f"{stats['files']} files ({stats['unchanged']} unchanged), "
+        f"{stats['chunks_new']} new chunks, "
+        f"{stats['bytes_stored'] / (1024 * 1024):.1f} MB stored"
+    )
+
+    sign_backup(manifest, dev_mode)
+
+    return manifest
 
+
+def restore_backup(name, target):
+    """Rebuild an incremental snapshot into the target directory."""
+    store = ChunkStore(INCREMENTAL_DIR)
+    if name == "latest":
+        snapshots = store.snapshots()
+        if not snapshots:
+            raise FileNotFoundError("No incremental snapshots found")
+        name = snapshots[-1]
+    print(f"Restoring snapshot {name} to {target}...")
+    count = store.restore(name, target)
+    print(f"Restored {count} files.")
+
+
+def skip_backups(tarinfo):
+    """Keeps BACKUP_DIR (inside SOURCE_DIR) out of the archive."""
+    backups = os.path.relpath(BACKUP_DIR, os.path.dirname(SOURCE_DIR))
+    if tarinfo.name == backups or tarinfo.name.startswith(backups + "/"):
+        return None
+    return tarinfo
+
+
+def check_signing_keys(gpg, dev_mode):
+    """Returns True if GPG keys exist; exits unless in DEV MODE."""
     # Check for existing private keys
     keys = gpg.list_keys()
     if not keys:
         if dev_mode:
             print("WARNING: No GPG keys found. Skipping signature (DEV MODE).")
-            return
+            return False
         else:
             print("CRITICAL: No GPG keys found! Cannot sign backup.")
             sys.exit(1)
+    return True
+
+
+def open_signer(filepath, dev_mode):
+    """Starts a streaming detached signature for a backup being written.
+
+    Returns None when signing is skipped in DEV MODE.
+    """
+    gpg = gnupg.GPG(gnupghome=GPG_HOME)
+    if not check_signing_keys(gpg, dev_mode):
+        return None
+    print("Signing " + filepath + " while writing...")
+    return GpgPipeSigner(gpg, f"{filepath}.sig")
+
+
+def sign_backup(filepath, dev_mode):
+    """Signs the backup file using GPG."""
+    gpg = gnupg.GPG(gnupghome=GPG_HOME)
+    if not check_signing_keys(gpg, dev_mode):
+        return
 
     print("Signing " + filepath + "...")
     with open(filepath, "rb") as f:
         status = gpg.sign_file(f, detach=True, output=f"{filepath}.sig")
 
-    if status.status != "sig created":
+    if not status:
         print("ERROR: Failed to sign backup.")
         sys.exit(1)
     print("Signature created successfully.")
@@ -72,8 +171,10 @@ def rotate_backups():
     MAX_BACKUPS.
     """
     print("Rotating backups...")
-    # Find all tar.gz files
-    files = glob.glob(os.path.join(BACKUP_DIR, "*.tar.gz"))
+    # Find all backup archives
+    files = []
+    for extension in EXTENSIONS.values():
+        files += glob.glob(os.path.join(BACKUP_DIR, "*" + extension))
     files.sort(key=os.path.getmtime)
 
     if len(files) > MAX_BACKUPS:
@@ -81,23 +182,71 @@ def rotate_backups():
         for f in to_delete:
             print(f"Removing old backup: {f}")
             os.remove(f)
-            # Remove associated signature file if it exists
-            if os.path.exists(f + ".sig"):
-                os.remove(f + ".sig")
+            # Remove associated signature and checksum files if they exist
+            for suffix in (".sig", ".sha256", ".blake3"):
+                if os.path.exists(f + suffix):
+                    os.remove(f + suffix)
     else:
         print("No rotation needed.")
 
 
+def rotate_incremental():
+    """Keep the last MAX_BACKUPS snapshots and garbage-collect chunks
+    that no remaining snapshot references.
+    """
+    print("Rotating incremental snapshots...")
+    removed, chunks = ChunkStore(INCREMENTAL_DIR).rotate(MAX_BACKUPS)
+    print(f"Removed {removed} snapshots and {chunks} unreferenced chunks.")
+
+
 def main():
     parser = argparse.ArgumentParser(description="K.A.O.S. Backup Manager")
     parser.add_argument(
         "--dev", action="store_true", help="Skip GPG check for development"
     )
+    parser.add_argument(
+        "--codec", choices=CODECS, default="gzip",
+        help="Compression codec (zstd needs the zstandard package)",
+    )
+    parser.add_argument(
+        "--level", type=int, help="Compression level (gzip 1-9, zstd 1-22)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=os.cpu_count(),
+        help="Compression threads (default: all cores)",
+    )
+    parser.add_argument(
+        "--blake3", action="store_true",
+        help="Also write a BLAKE3 checksum (needs the blake3 package)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Store a deduplicated snapshot instead of a full archive",
+    )
+    parser.add_argument(
+        "--restore", metavar="SNAPSHOT",
+        help="Restore an incremental snapshot ('latest' for the newest)",
+    )
+    parser.add_argument(
+        "--target", default=".", help="Directory to restore into"
+    )
     args = parser.parse_args()
+    if args.blake3 and blake3 is None:
+        parser.error("--blake3 requires the 'blake3' package")
 
     try:
-        create_backup(args.dev)
-        rotate_backups()
+        if args.restore:
+            restore_backup(args.restore, args.target)
+            return
+        if args.incremental:
+            create_incremental_backup(args.dev, args.level)
+            rotate_incremental()
+        else:
+            create_backup(
+                args.dev, args.codec, args.level, args.threads,
+                use_blake3=args.blake3,
+            )
+            rotate_backups()
         print("Backup process completed successfully.")
     except Exception as e:
         print(f"Backup failed: {e}")
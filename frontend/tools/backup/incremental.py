@@ -0,0 +1,321 @@
+"""
+K.A.O.S. Incremental Backups
+Content-defined chunking into a hash-addressed chunk store; each backup
+is a small JSON manifest of the files and the chunks they are made of.
+"""
+
+import hashlib
+import json
+import os
+import random
+import stat
+import tempfile
+import zlib
+from datetime import datetime
+
+try:
+    # Compiled FastCDC (pip install fastcdc); the pure-Python module it
+    # falls back to is no faster than iter_chunks, so only this one is used
+    from fastcdc.fastcdc_cy import fastcdc_cy
+except ImportError:
+    fastcdc_cy = None
+
+MANIFEST_FORMAT = 1
+
+# FastCDC parameters: chunks are 16 KiB - 256 KiB, about 64 KiB on average
+MIN_SIZE = 16 * 1024
+AVG_SIZE = 64 * 1024
+MAX_SIZE = 256 * 1024
+READ_SIZE = 4 * 1024 * 1024
+# Without fastcdc, the Python chunker runs at a few MB/s; larger files are
+# cut at fixed MAX_SIZE offsets instead (unchanged regions still dedupe,
+# but an insertion shifts every chunk after it)
+PY_CDC_LIMIT = 64 * 1024 * 1024
+_M64 = (1 << 64) - 1
+# Normalized chunking: a stricter mask below AVG_SIZE and a looser one
+# above it pull chunk sizes towards the average
+_MASK_S = ((1 << 18) - 1) << 46
+_MASK_L = ((1 << 14) - 1) << 50
+# Fixed seed: the same content must always cut at the same offsets
+_GEAR = [random.Random(0x4B414F53 + i).getrandbits(64) for i in range(256)]
+
+
+def cut_point(data, start, end):
+    """Offset of the first chunk boundary in data[start:end]."""
+    size = end - start
+    if size <= MIN_SIZE:
+        return end
+    limit = start + min(size, MAX_SIZE)
+    normal = start + min(size, AVG_SIZE)
+    gear = _GEAR
+    h = 0
+    i = start + MIN_SIZE
+    while i < normal:
+        h = ((h << 1) + gear[data[i]]) & _M64
+        if not h & _MASK_S:
+            return i + 1
+        i += 1
+    while i < limit:
+        h = ((h << 1) + gear[data[i]]) & _M64
+        if not h & _MASK_L:
+            return i + 1
+        i += 1
+    return limit
+
+
+def iter_chunks(f):
+    """Yield the content-defined chunks of a binary file object."""
+    buffer = b""
+    pos = 0
+    eof = False
+    while True:
+        if not eof and len(buffer) - pos < MAX_SIZE:
+            data = f.read(READ_SIZE)
+            eof = not data
+            buffer = buffer[pos:] + data
+            pos = 0
+            continue
+        if pos == len(buffer):
+            return
+        cut = cut_point(buffer, pos, len(buffer))
+        yield buffer[pos:cut]
+        pos = cut
+
+
+def chunk_file(path, size):
+    """Yield the chunks of the file at ``path`` (``size`` bytes long)."""
+    if size == 0:
+        return
+    if fastcdc_cy is not None:
+        for chunk in fastcdc_cy(path, min_size=MIN_SIZE, avg_size=AVG_SIZE,
+                                max_size=MAX_SIZE, fat=True):
+            yield chunk.data
+        return
+    with open(path, "rb") as f:
+        if size > PY_CDC_LIMIT:
+            yield from iter(lambda: f.read(MAX_SIZE), b"")
+        else:
+            yield from iter_chunks(f)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ChunkStore:
+    """
+    Hash-addressed store under ``root``::
+
+        chunks/ab/<sha256>      zlib-compressed chunk
+        snapshots/<name>.json   manifest of one backup
+
+    Chunks are written once and shared by every snapshot that uses them.
+    """
+
+    def __init__(self, root, level=6):
+        self.root = root
+        self.level = level
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.snapshot_dir = os.path.join(root, "snapshots")
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def put(self, chunk):
+        """Store a chunk unless already present; returns (digest, new)."""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        _write_atomic(path, zlib.compress(chunk, self.level))
+        return digest, True
+
+    def get(self, digest):
+        with open(self.chunk_path(digest), "rb") as f:
+            chunk = zlib.decompress(f.read())
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise ValueError(f"Corrupt chunk {digest}")
+        return chunk
+
+    def snapshots(self):
+        """Snapshot names, oldest first."""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(
+            name[:-5] for name in os.listdir(self.snapshot_dir)
+            if name.endswith(".json")
+        )
+
+    def manifest_path(self, name):
+        return os.path.join(self.snapshot_dir, name + ".json")
+
+    def load_manifest(self, name):
+        with open(self.manifest_path(name)) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"Unsupported manifest format in {name}")
+        return manifest
+
+    def save_manifest(self, name, manifest):
+        path = self.manifest_path(name)
+        _write_atomic(path, json.dumps(manifest, indent=1).encode("utf-8"))
+        return path
+
+    def backup(self, source, exclude=(), name=None):
+        """
+        Snapshot ``source``. Files whose size and mtime match the latest
+        snapshot reuse its chunk list without being read. Returns
+        (manifest path, stats dict).
+        """
+        name = name or datetime.now().strftime("%Y%m%d_%H%M%S")
+        previous = {}
+        snapshots = self.snapshots()
+        if snapshots:
+            for entry in self.load_manifest(snapshots[-1])["entries"]:
+                previous[entry["path"]] = entry
+
+        stats = {"files": 0, "unchanged": 0, "chunks_new": 0,
+                 "bytes_read": 0, "bytes_stored": 0}
+        entries = []
+        excluded = {os.path.abspath(path) for path in exclude}
+        excluded.add(os.path.abspath(self.root))
+        source = os.path.abspath(source)
+
+        for dirpath, dirnames, filenames in os.walk(source):
+            rel_dir = os.path.relpath(dirpath, source)
+            if rel_dir != ".":
+                st = os.lstat(dirpath)
+                entries.append({"path": rel_dir, "type": "dir",
+                                "mode": stat.S_IMODE(st.st_mode),
+                                "mtime_ns": st.st_mtime_ns})
+            # os.walk lists symlinks to directories as directories
+            subdirs = []
+            for d in sorted(dirnames):
+                full = os.path.join(dirpath, d)
+                if full in excluded:
+                    continue
+                if os.path.islink(full):
+                    entries.append({
+                        "path": os.path.normpath(os.path.join(rel_dir, d)),
+                        "type": "symlink", "target": os.readlink(full),
+                    })
+                else:
+                    subdirs.append(d)
+            dirnames[:] = subdirs
+            for filename in sorted(filenames):
+                full = os.path.join(dirpath, filename)
+                if full in excluded:
+                    continue
+                rel = os.path.normpath(os.path.join(rel_dir, filename))
+                st = os.lstat(full)
+                if stat.S_ISLNK(st.st_mode):
+                    entries.append({"path": rel, "type": "symlink",
+                                    "target": os.readlink(full)})
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                stats["files"] += 1
+                entry = {"path": rel, "type": "file",
+                         "mode": stat.S_IMODE(st.st_mode),
+                         "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+                old = previous.get(rel)
+                if (old is not None and old["type"] == "file"
+                        and old["size"] == st.st_size
+                        and old["mtime_ns"] == st.st_mtime_ns):
+                    entry["chunks"] = old["chunks"]
+                    stats["unchanged"] += 1
+                else:
+                    entry["chunks"] = self._store_file(full, st.st_size, stats)
+                entries.append(entry)
+
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "name": name,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "source": source,
+            "entries": entries,
+        }
+        return self.save_manifest(name, manifest), stats
+
+    def _store_file(self, path, size, stats):
+        digests = []
+        for chunk in chunk_file(path, size):
+            digest, new = self.put(chunk)
+            digests.append(digest)
+            stats["bytes_read"] += len(chunk)
+            if new:
+                stats["chunks_new"] += 1
+                stats["bytes_stored"] += len(chunk)
+        return digests
+
+    def restore(self, name, target):
+        """Rebuild snapshot ``name`` under ``target``; returns file count."""
+        manifest = self.load_manifest(name)
+        target = os.path.abspath(target)
+        os.makedirs(target, exist_ok=True)
+        restored = 0
+        directories = []
+        for entry in manifest["entries"]:
+            path = os.path.normpath(os.path.join(target, entry["path"]))
+            if os.path.commonpath([target, path]) != target:
+                raise ValueError(f"Unsafe path in manifest: {entry['path']}")
+            if entry["type"] == "dir":
+                os.makedirs(path, exist_ok=True)
+                directories.append((path, entry))
+            elif entry["type"] == "symlink":
+                if os.path.lexists(path):
+                    os.remove(path)
+                os.symlink(entry["target"], path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    for digest in entry["chunks"]:
+                        f.write(self.get(digest))
+                os.chmod(path, entry["mode"])
+                os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+                restored += 1
+        # Directory metadata last, once their contents are in place
+        for path, entry in reversed(directories):
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        return restored
+
+    def rotate(self, keep):
+        """
+        Drop all but the newest ``keep`` snapshots, then delete chunks no
+        remaining snapshot references. Returns (snapshots, chunks) removed.
+        """
+        snapshots = self.snapshots()
+        expired = snapshots[:-keep] if keep > 0 else snapshots
+        for name in expired:
+            for path in (self.manifest_path(name),
+                         self.manifest_path(name) + ".sig"):
+                if os.path.exists(path):
+                    os.remove(path)
+        return len(expired), self.collect_garbage()
+
+    def collect_garbage(self):
+        """Mark and sweep: remove chunks unused by every manifest."""
+        live = set()
+        for name in self.snapshots():
+            for entry in self.load_manifest(name)["entries"]:
+                live.update(entry.get("chunks", ()))
+        removed = 0
+        if not os.path.isdir(self.chunk_dir):
+            return removed
+        for prefix in os.listdir(self.chunk_dir):
+            directory = os.path.join(self.chunk_dir, prefix)
+            for digest in os.listdir(directory):
+                if digest not in live:
+                    os.remove(os.path.join(directory, digest))
+                    removed += 1
+        return removed
@@ -0,0 +1,140 @@
+"""
+K.A.O.S. Tee Writer
+Hashes, counts and signs archive bytes while they are being written,
+so a finished archive never has to be read back.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Read size for verification when a file cannot be memory-mapped
+READ_BUFFER = 4 * 1024 * 1024
+
+
+def new_hashers(algorithms):
+    """Hash objects by name; "blake3" needs the optional blake3 package."""
+    hashers = {}
+    for name in algorithms:
+        if name == "blake3":
+            if blake3 is None:
+                raise RuntimeError("blake3 hashing requires the 'blake3' package")
+            hashers[name] = blake3.blake3()
+        else:
+            hashers[name] = hashlib.new(name)
+    return hashers
+
+
+class TeeWriter:
+    """
+    Write-only file object that forwards every write to ``fileobj``,
+    feeds the same bytes to each hasher and to any extra ``sinks`` (for
+    example a GpgPipeSigner), and counts them.
+    """
+
+    def __init__(self, fileobj, algorithms=("sha256",), sinks=()):
+        self.fileobj = fileobj
+        self.hashers = new_hashers(algorithms)
+        self.sinks = list(sinks)
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.fileobj.write(data)
+        for hasher in self.hashers.values():
+            hasher.update(data)
+        for sink in self.sinks:
+            sink.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def tell(self):
+        return self.bytes_written
+
+    def hexdigests(self):
+        return {name: h.hexdigest() for name, h in self.hashers.items()}
+
+
+class GpgPipeSigner:
+    """
+    Detached GPG signature computed from a stream: written bytes go
+    through an OS pipe into ``gpg.sign_file`` running on a thread, so the
+    signature is ready when the archive is, without rereading it.
+
+    ``gpg`` is a python-gnupg ``GPG`` instance. Check that a signing key
+    exists first: if gpg stops early, the rest of the stream is drained
+    and discarded so the writer never blocks, and ``close`` reports it.
+    """
+
+    def __init__(self, gpg, output, **sign_options):
+        self.output = output
+        self.status = None
+        self.error = None
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb")
+        self._writer = os.fdopen(write_fd, "wb")
+        self._thread = threading.Thread(
+            target=self._sign, args=(gpg, sign_options),
+            name="gpg-sign", daemon=True,
+        )
+        self._thread.start()
+
+    def write(self, data):
+        self._writer.write(data)
+
+    def close(self):
+        """Finish the stream; returns True if the signature was created."""
+        if not self._writer.closed:
+            self._writer.close()
+        self._thread.join()
+        # Sign results are truthy once gpg reported a signature fingerprint
+        return bool(self.status)
+
+    def _sign(self, gpg, sign_options):
+        try:
+            self.status = gpg.sign_file(
+                self._reader, detach=True, output=self.output, **sign_options
+            )
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self._reader.closed:
+                while self._reader.read(READ_BUFFER):
+                    pass
+                self._reader.close()
+
+
+def file_digests(path, algorithms=("sha256",)):
+    """
+    Hash a file in one pass for verification: memory-mapped so the hash
+    reads straight from the page cache, or through large buffers when the
+    file cannot be mapped (e.g. empty files).
+    """
+    hashers = new_hashers(algorithms)
+    with open(path, "rb") as f:
+        try:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            view = None
+        if view is not None:
+            with view:
+                if hasattr(view, "madvise"):
+                    view.madvise(mmap.MADV_SEQUENTIAL)
+                for hasher in hashers.values():
+                    hasher.update(view)
+        else:
+            for block in iter(lambda: f.read(READ_BUFFER), b""):
+                for hasher in hashers.values():
+                    hasher.update(block)
+    return {name: h.hexdigest() for name, h in hashers.items()}
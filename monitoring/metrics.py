@@ -3,147 +3,394 @@ K.A.O.S. Monitoring & Observability Configuration
 Prometheus metrics, logging, and health checks
 """
 
-import time
-from typing import Dict, Any
+import itertools
+import threading
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 
-class MetricsCollector:
-    """Centralized metrics collection"""
-    
+COUNTERS = (
+    "requests_total",
+    "requests_success",
+    "requests_error",
+    "llm_queries",
+    "llm_coalesced",
+    "llm_breaker_opens",
+    "fallback_activations",
+    "analysis_cache_hits",
+    "analysis_cache_misses",
+    "semantic_cache_hits",
+    "semantic_cache_misses",
+)
+
+# Fixed latency buckets (seconds), shared by every histogram
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+HISTOGRAMS = (
+    "request_duration_seconds",
+    "llm_latency_seconds",
+    "analyzer_duration_seconds",
+    "stage_duration_seconds",
+)
+
+METRIC_HELP = {
+    "requests_total": "API requests handled",
+    "requests_success": "API requests answered without error",
+    "requests_error": "API requests answered with an error",
+    "llm_queries": "LLM queries issued",
+    "llm_coalesced": "LLM calls answered by an identical in-flight call",
+    "llm_breaker_opens": "Times the LLM circuit breaker opened",
+    "fallback_activations": "Heuristic-only fallbacks",
+    "analysis_cache_hits": "Analysis cache hits",
+    "analysis_cache_misses": "Analysis cache misses",
+    "semantic_cache_hits": "LLM answers served by a similar cached prompt",
+    "semantic_cache_misses": "Semantic cache lookups without a close match",
+    "request_duration_seconds": "API request latency",
+    "llm_latency_seconds": "LLM query latency",
+    "analyzer_duration_seconds": "Heuristic analyzer latency",
+    "stage_duration_seconds": "Per-stage latency inside API requests",
+}
+
+# Histogram key: (metric name, sorted label pairs)
+HistogramKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class _Shard:
+    """One stripe of counters and histograms guarded by its own lock."""
+
+    __slots__ = ("lock", "counters", "histograms")
+
     def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # key -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[HistogramKey, List[float]] = {}
+
+
+class MetricsCollector:
+    """
+    Centralized metrics collection.
+
+    Writes go to one of ``shards`` stripes, assigned round-robin to each
+    thread on its first write (thread ids are page-aligned addresses, so
+    ``get_ident() % shards`` would put every thread on one stripe). Each
+    stripe has its own (normally uncontended) lock, and they are only
+    merged when a snapshot is scraped. The stripe count is fixed, so memory stays
+    bounded under gevent where every request is a new greenlet.
+    """
+
+    def __init__(self, shards: int = 16):
         """Initialize metrics"""
-        self.metrics = {
-            "requests_total": 0,
-            "requests_success": 0,
-            "requests_error": 0,
-            "request_duration_sum": 0.0,
-            "llm_queries": 0,
-            "llm_latency_sum": 0.0,
-            "fallback_activations": 0,
-            "analysis_cache_hits": 0,
-            "analysis_cache_misses": 0,
-        }
+        self._shard_count = shards
+        self._shards = [_Shard() for _ in range(shards)]
+        self._local = threading.local()
+        self._next_shard = itertools.count()
+        self.llm_breaker_state = "closed"
         self.start_time = datetime.now()
 
+    def _shard(self) -> _Shard:
+        # The index, not the shard, is kept so reset() takes effect
+        index = getattr(self._local, "index", None)
+        if index is None:
+            index = next(self._next_shard) % self._shard_count
+            self._local.index = index
+        return self._shards[index]
+
+    def increment(self, name: str, value: int = 1) -> None:
+        shard = self._shard()
+        with shard.lock:
+            shard.counters[name] += value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Record a latency sample (seconds) into a fixed-bucket histogram"""
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        index = bisect_left(LATENCY_BUCKETS, value)
+        shard = self._shard()
+        with shard.lock:
+            histogram = shard.histograms.get(key)
+            if histogram is None:
+                histogram = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+                shard.histograms[key] = histogram
+            histogram[index] += 1
+            histogram[-1] += value
+
     def record_request(
         self,
         duration: float,
         success: bool = True,
     ) -> None:
         """Record API request metrics"""
-        self.metrics["requests_total"] += 1
-        if success:
-            self.metrics["requests_success"] += 1
-        else:
-            self.metrics["requests_error"] += 1
-        self.metrics["request_duration_sum"] += duration
+        shard = self._shard()
+        with shard.lock:
+            shard.counters["requests_total"] += 1
+            if success:
+                shard.counters["requests_success"] += 1
+            else:
+                shard.counters["requests_error"] += 1
+        self.observe("request_duration_seconds", duration)
 
     def record_llm_query(self, latency: float) -> None:
         """Record LLM query metrics"""
-        self.metrics["llm_queries"] += 1
-        self.metrics["llm_latency_sum"] += latency
+        self.increment("llm_queries")
+        self.observe("llm_latency_seconds", latency)
+
+    def record_analysis(self, duration: float) -> None:
+        """Record heuristic analyzer latency"""
+        self.observe("analyzer_duration_seconds", duration)
+
+    def record_stage(self, stage: str, duration: float) -> None:
+        """Record the latency of one pipeline stage of a request"""
+        self.observe("stage_duration_seconds", duration, {"stage": stage})
+
+    def record_llm_coalesced(self) -> None:
+        """Record an LLM call answered by an identical in-flight call"""
+        self.increment("llm_coalesced")
+
+    def record_breaker_state(self, state: str) -> None:
+        """Record an LLM circuit breaker transition"""
+        if state == "open" and self.llm_breaker_state != "open":
+            self.increment("llm_breaker_opens")
+        self.llm_breaker_state = state
 
     def record_fallback(self) -> None:
         """Record fallback activation"""
-        self.metrics["fallback_activations"] += 1
+        self.increment("fallback_activations")
 
     def record_cache_hit(self) -> None:
         """Record cache hit"""
-        self.metrics["analysis_cache_hits"] += 1
+        self.increment("analysis_cache_hits")
 
     def record_cache_miss(self) -> None:
         """Record cache miss"""
-        self.metrics["analysis_cache_misses"] += 1
+        self.increment("analysis_cache_misses")
+
+    def record_semantic_hit(self) -> None:
+        """Record an LLM answer served by a similar cached prompt"""
+        self.increment("semantic_cache_hits")
+
+    def record_semantic_miss(self) -> None:
+        """Record a semantic cache lookup without a close match"""
+        self.increment("semantic_cache_misses")
+
+    def _merge(
+        self,
+    ) -> Tuple[Dict[str, int], Dict[HistogramKey, List[float]]]:
+        counters = dict.fromkeys(COUNTERS, 0)
+        histograms: Dict[HistogramKey, List[float]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for name, value in shard.counters.items():
+                    counters[name] += value
+                for key, values in shard.histograms.items():
+                    merged = histograms.setdefault(
+                        key, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+                    )
+                    for index, value in enumerate(values):
+                        merged[index] += value
+        return counters, histograms
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Merged counters plus latency sums (legacy flat view)"""
+        counters, histograms = self._merge()
+        empty = [0.0]
+        counters["request_duration_sum"] = histograms.get(
+            ("request_duration_seconds", ()), empty
+        )[-1]
+        counters["llm_latency_sum"] = histograms.get(
+            ("llm_latency_seconds", ()), empty
+        )[-1]
+        return counters
+
+    @staticmethod
+    def _quantile(histogram: List[float], q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        counts = histogram[:-1]
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index > 0 else 0.0
+                if index >= len(LATENCY_BUCKETS):
+                    return lower
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+    def _latency_summary(self, histogram) -> Dict[str, float]:
+        if histogram is None:
+            return {"avg_ms": 0, "p50_ms": 0, "p95_ms": 0, "p99_ms": 0}
+        count = sum(histogram[:-1])
+        return {
+            "avg_ms": histogram[-1] / count * 1000 if count else 0,
+            "p50_ms": self._quantile(histogram, 0.50) * 1000,
+            "p95_ms": self._quantile(histogram, 0.95) * 1000,
+            "p99_ms": self._quantile(histogram, 0.99) * 1000,
+        }
 
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics snapshot"""
+        counters, histograms = self._merge()
         uptime = (
             datetime.now() - self.start_time
         ).total_seconds()
-        
-        avg_request_duration = (
-            self.metrics["request_duration_sum"]
-            / self.metrics["requests_total"]
-            if self.metrics["requests_total"] > 0 else 0
+
+        request_latency = self._latency_summary(
+            histograms.get(("request_duration_seconds", ()))
         )
-        
-        avg_llm_latency = (
-            self.metrics["llm_latency_sum"]
-            / self.metrics["llm_queries"]
-            if self.metrics["llm_queries"] > 0 else 0
+        llm_latency = self._latency_summary(
+            histograms.get(("llm_latency_seconds", ()))
+        )
+        analyzer_latency = self._latency_summary(
+            histograms.get(("analyzer_duration_seconds", ()))
+        )
+
+        stages = {
+            dict(labels)["stage"]: {
+                "count": int(sum(histogram[:-1])),
+                **self._latency_summary(histogram),
+            }
+            for (name, labels), histogram in histograms.items()
+            if name == "stage_duration_seconds"
+        }
+
+        requests_total = counters["requests_total"]
+        cache_lookups = (
+            counters["analysis_cache_hits"]
+            + counters["analysis_cache_misses"]
         )
-        
-        cache_hit_rate = (
-            self.metrics["analysis_cache_hits"]
-            / (
-                self.metrics["analysis_cache_hits"]
-                + self.metrics["analysis_cache_misses"]
-            )
-            if (
-                self.metrics["analysis_cache_hits"]
-                + self.metrics["analysis_cache_misses"]
-            ) > 0 else 0
+        semantic_lookups = (
+            counters["semantic_cache_hits"]
+            + counters["semantic_cache_misses"]
         )
-        
+
         return {
             "uptime_seconds": uptime,
             "requests": {
-                "total": self.metrics["requests_total"],
-                "success": self.metrics["requests_success"],
-                "error": self.metrics["requests_error"],
+                "total": requests_total,
+                "success": counters["requests_success"],
+                "error": counters["requests_error"],
                 "error_rate": (
-                    self.metrics["requests_error"]
-                    / self.metrics["requests_total"]
-                    if self.metrics["requests_total"] > 0 else 0
+                    counters["requests_error"] / requests_total
+                    if requests_total > 0 else 0
                 ),
-                "avg_duration_ms": avg_request_duration * 1000,
+                "avg_duration_ms": request_latency["avg_ms"],
+                "p50_ms": request_latency["p50_ms"],
+                "p95_ms": request_latency["p95_ms"],
+                "p99_ms": request_latency["p99_ms"],
             },
             "llm": {
-                "queries_total": self.metrics["llm_queries"],
-                "avg_latency_ms": avg_llm_latency * 1000,
+                "queries_total": counters["llm_queries"],
+                "avg_latency_ms": llm_latency["avg_ms"],
+                "p95_ms": llm_latency["p95_ms"],
+                "p99_ms": llm_latency["p99_ms"],
+                "coalesced_total": counters["llm_coalesced"],
+                "breaker_state": self.llm_breaker_state,
+                "breaker_opens": counters["llm_breaker_opens"],
             },
+            "analyzer": {
+                "avg_ms": analyzer_latency["avg_ms"],
+                "p95_ms": analyzer_latency["p95_ms"],
+                "p99_ms": analyzer_latency["p99_ms"],
+            },
+            "stages": stages,
             "fallback": {
-                "activations": self.metrics[
-                    "fallback_activations"
-                ],
+                "activations": counters["fallback_activations"],
                 "fallback_rate": (
-                    self.metrics["fallback_activations"]
-                    / self.metrics["requests_total"]
-                    if self.metrics["requests_total"] > 0 else 0
+                    counters["fallback_activations"] / requests_total
+                    if requests_total > 0 else 0
                 ),
             },
             "cache": {
-                "hits": self.metrics["analysis_cache_hits"],
-                "misses": self.metrics[
-                    "analysis_cache_misses"
-                ],
-                "hit_rate": cache_hit_rate,
+                "hits": counters["analysis_cache_hits"],
+                "misses": counters["analysis_cache_misses"],
+                "hit_rate": (
+                    counters["analysis_cache_hits"] / cache_lookups
+                    if cache_lookups > 0 else 0
+                ),
+                "semantic_hits": counters["semantic_cache_hits"],
+                "semantic_misses": counters["semantic_cache_misses"],
+                "semantic_hit_rate": (
+                    counters["semantic_cache_hits"] / semantic_lookups
+                    if semantic_lookups > 0 else 0
+                ),
             },
         }
 
+    def render_prometheus(self, prefix: str = "kaos") -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        counters, histograms = self._merge()
+        lines = []
+
+        for name in COUNTERS:
+            metric = f"{prefix}_{name}"
+            if not metric.endswith("_total"):
+                metric += "_total"
+            lines.append(f"# HELP {metric} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counters[name]}")
+
+        announced = set()
+        for name, labels in sorted(histograms):
+            metric = f"{prefix}_{name}"
+            values = histograms[(name, labels)]
+            if name not in announced:
+                announced.add(name)
+                lines.append(f"# HELP {metric} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+            label_text = "".join(f'{key}="{value}",' for key, value in labels)
+            series = f"{{{label_text.rstrip(',')}}}" if labels else ""
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                cumulative += count
+                lines.append(
+                    f'{metric}_bucket{{{label_text}le="{bound}"}} {cumulative}'
+                )
+            cumulative += values[len(LATENCY_BUCKETS)]
+            lines.append(f'{metric}_bucket{{{label_text}le="+Inf"}} {cumulative}')
+            lines.append(f"{metric}_sum{series} {values[-1]}")
+            lines.append(f"{metric}_count{series} {cumulative}")
+
+        lines.append(f"# HELP {prefix}_llm_breaker_open LLM circuit breaker is open")
+        lines.append(f"# TYPE {prefix}_llm_breaker_open gauge")
+        lines.append(
+            f"{prefix}_llm_breaker_open "
+            f"{int(self.llm_breaker_state == 'open')}"
+        )
+        uptime = (datetime.now() - self.start_time).total_seconds()
+        lines.append(f"# HELP {prefix}_uptime_seconds Process uptime")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {uptime}")
+        return "\n".join(lines) + "\n"
+
     def reset(self) -> None:
         """Reset metrics"""
-        self.metrics = {
-            "requests_total": 0,
-            "requests_success": 0,
-            "requests_error": 0,
-            "request_duration_sum": 0.0,
-            "llm_queries": 0,
-            "llm_latency_sum": 0.0,
-            "fallback_activations": 0,
-            "analysis_cache_hits": 0,
-            "analysis_cache_misses": 0,
-        }
+        self._shards = [_Shard() for _ in range(self._shard_count)]
 
 
 # Global metrics instance
 _metrics_instance = None
+_metrics_lock = threading.Lock()
 
 
 def get_metrics_collector() -> MetricsCollector:
     """Get or create metrics collector singleton"""
     global _metrics_instance
     if _metrics_instance is None:
-        _metrics_instance = MetricsCollector()
+        with _metrics_lock:
+            if _metrics_instance is None:
+                _metrics_instance = MetricsCollector()
     return _metrics_instance
@@ -5,13 +5,32 @@ Author: K.A.O.S. DevOps Team
 Purpose: Master backup utility for generating release source archives.
 """
 
+import os
 import sys
+import gzip
+import argparse
 import tarfile
-import hashlib
 import logging
 from datetime import datetime
 from pathlib import Path
 
+from source_tree import (
+    DEFAULT_EXCLUDES,
+    ExclusionRules,
+    add_entries_normalized,
+    add_tree,
+    load_manifest,
+    save_manifest,
+    scan_tree,
+    tree_key,
+)
+
+# The tee-writer stage is shared with the backup tools
+sys.path.append(
+    str(Path(__file__).resolve().parents[2] / "frontend" / "tools" / "backup")
+)
+from tee_writer import TeeWriter, blake3, file_digests  # noqa: E402
+
 # Configure Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,52 +39,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ArtifactGen")
 
+# Reproducible mode: file manifest of the last run, kept in the backups dir
+MANIFEST_NAME = ".artifact_manifest.json"
+GZIP_LEVEL = 9
+
+
+def verify_archive(archive_path: Path) -> bool:
+    """Checks an archive against its .sha256 (and .blake3) sidecars."""
+    algorithms = [
+        name for name in ("sha256", "blake3")
+        if Path(f"{archive_path}.{name}").exists()
+    ]
+    if not algorithms:
+        logger.error(f"❌ No checksum files found for {archive_path.name}")
+        return False
+    actual = file_digests(archive_path, algorithms)
+    for name in algorithms:
+        expected = Path(f"{archive_path}.{name}").read_text().split()[0]
+        if actual[name] != expected:
+            logger.error(f"❌ {name.upper()} mismatch for {archive_path.name}")
+            return False
+        logger.info(f"✅ {name.upper()} verified: {expected}")
+    return True
+
+
+def load_exclusions(exclude_files) -> ExclusionRules:
+    """Default exclusions plus .gitignore-style pattern files."""
+    rules = ExclusionRules(DEFAULT_EXCLUDES)
+    for path in exclude_files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                rules.add(line)
+    return rules
+
+
+def write_checksums(backup_dir: Path, archive_filename: str, digests: dict):
+    """Writes `<archive>.<algorithm>` files in sha256sum format."""
+    for name, file_hash in digests.items():
+        hash_filename = f"{archive_filename}.{name}"
+        hash_path = backup_dir / hash_filename
 
-def calculate_sha256(file_path: Path) -> str:
-    """Calculates SHA256 hash of a file."""
-    sha256_hash = hashlib.sha256()
-    try:
-        with open(file_path, "rb") as f:
-            # Read in 4K chunks
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    except IOError as e:
-        logger.error(f"Error reading file for checksum: {e}")
-        sys.exit(1)
-
-
-def get_exclusion_filter():
-    """
-    Returns a filter function for tarfile.add to exclude specific patterns.
-    """
-
-    def filter_func(tarinfo):
-        name = tarinfo.name
-        # tarinfo.name is the path inside the archive (e.g., ./folder/file)
-
-        # Check for file extensions
-        if name.endswith(".pyc") or name.endswith(".log"):
-            return None
+        with open(hash_path, "w") as f:
+            f.write(f"{file_hash}  {archive_filename}\n")
 
-        # Check for directory/file names in the path
-        path = Path(name)
-        parts = path.parts
+        logger.info(f"✅ Checksum saved to: {hash_filename}")
+        logger.info(f"#️⃣  {name.upper()}: {file_hash}")
 
-        # Exclusions list (Directories)
-        exclusions = {".git", ".venv", "venv", "__pycache__", "backups"}
 
-        # If any part of the path matches an exclusion, skip it
-        for part in parts:
-            if part in exclusions:
-                return None
+def build_reproducible(project_root: Path, backup_dir: Path, rules, algorithms):
+    """
+    Builds a byte-for-byte reproducible archive named after its content.
 
-        return tarinfo
+    Entries are sorted, owners dropped, modes reduced to 0644/0755 and
+    mtimes set to SOURCE_DATE_EPOCH (default 0), and the gzip header
+    carries no name or timestamp. Files whose size and mtime match the
+    manifest of the previous run are not rehashed; if nothing changed,
+    the previous archive is reused without writing anything.
+    """
+    mtime = int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
+    manifest_path = backup_dir / MANIFEST_NAME
+    previous = load_manifest(manifest_path)
+
+    entries, hashed = scan_tree(
+        project_root, rules, lambda path: file_digests(path)["sha256"], previous
+    )
+    key = tree_key(entries, mtime=mtime, gzip_level=GZIP_LEVEL)
+    logger.info(f"🔎 Scanned {len(entries)} entries ({hashed} hashed)")
+
+    if previous and previous.get("key") == key:
+        archive_filename = previous["archive"]
+        archive_path = backup_dir / archive_filename
+        if archive_path.exists() and all(
+            Path(f"{archive_path}.{name}").exists() for name in algorithms
+        ):
+            save_manifest(manifest_path, dict(previous, entries=entries))
+            logger.info(f"♻️  Sources unchanged, reusing: {archive_filename}")
+            logger.info(f"#️⃣  SHA256: {previous['sha256']}")
+            return
+
+    archive_filename = f"{project_root.name}_source_{key[:16]}.tar.gz"
+    archive_path = backup_dir / archive_filename
+    logger.info(f"📍 Destination: {archive_path}")
 
-    return filter_func
+    with open(archive_path, "wb") as out:
+        tee = TeeWriter(out, algorithms)
+        # filename="" and mtime=0 keep the gzip header constant
+        with gzip.GzipFile(
+            filename="", mode="wb", fileobj=tee, mtime=0,
+            compresslevel=GZIP_LEVEL,
+        ) as gz:
+            with tarfile.open(
+                fileobj=gz, mode="w", format=tarfile.PAX_FORMAT
+            ) as tar:
+                count = add_entries_normalized(
+                    tar, project_root, entries, mtime=mtime
+                )
+
+    size_mb = tee.bytes_written / (1024 * 1024)
+    logger.info(
+        f"✅ Archive created successfully ({count} entries, {size_mb:.2f} MB)"
+    )
+    digests = tee.hexdigests()
+    write_checksums(backup_dir, archive_filename, digests)
+    save_manifest(manifest_path, {
+        "key": key,
+        "archive": archive_filename,
+        "sha256": digests["sha256"],
+        "entries": entries,
+    })
 
 
 def main():
+    parser = argparse.ArgumentParser(description="K.A.O.S. Artifact Generator")
+    parser.add_argument(
+        "--blake3", action="store_true",
+        help="Also write a BLAKE3 checksum (needs the blake3 package)",
+    )
+    parser.add_argument(
+        "--verify", type=Path, metavar="ARCHIVE",
+        help="Verify an existing archive against its checksum files",
+    )
+    parser.add_argument(
+        "--exclude-from", action="append", default=[], metavar="FILE",
+        help="Also exclude the .gitignore-style patterns in FILE",
+    )
+    parser.add_argument(
+        "--reproducible", action="store_true",
+        help="Build a deterministic archive; reuse it if sources are unchanged",
+    )
+    args = parser.parse_args()
+    if args.blake3 and blake3 is None:
+        parser.error("--blake3 requires the 'blake3' package")
+
+    if args.verify:
+        sys.exit(0 if verify_archive(args.verify) else 1)
+
     # 1. Directory Setup
     script_location = Path(__file__).resolve()
     if script_location.parent.name == "tools":
@@ -76,33 +184,35 @@ def main():
     backup_dir = project_root / "backups"
     backup_dir.mkdir(exist_ok=True)
 
-    # 2. Archive Creation
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    archive_filename = f"{project_root.name}_source_{timestamp}.tar.gz"
-    archive_path = backup_dir / archive_filename
+    algorithms = ("sha256", "blake3") if args.blake3 else ("sha256",)
+    rules = load_exclusions(args.exclude_from)
 
     logger.info(f"📦 Starting archive creation for: {project_root}")
-    logger.info(f"📍 Destination: {archive_path}")
 
     try:
-        with tarfile.open(archive_path, "w:gz") as tar:
-            tar.add(project_root, arcname=".", filter=get_exclusion_filter())
-
-        size_mb = archive_path.stat().st_size / (1024 * 1024)
-        logger.info(f"✅ Archive created successfully ({size_mb:.2f} MB)")
+        if args.reproducible:
+            build_reproducible(project_root, backup_dir, rules, algorithms)
+            return
+
+        # 2. Archive Creation
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archive_filename = f"{project_root.name}_source_{timestamp}.tar.gz"
+        archive_path = backup_dir / archive_filename
+        logger.info(f"📍 Destination: {archive_path}")
+
+        # Checksums are computed on the bytes as they are written
+        with open(archive_path, "wb") as out:
+            tee = TeeWriter(out, algorithms)
+            with tarfile.open(fileobj=tee, mode="w:gz") as tar:
+                count = add_tree(tar, project_root, rules)
+
+        size_mb = tee.bytes_written / (1024 * 1024)
+        logger.info(
+            f"✅ Archive created successfully ({count} entries, {size_mb:.2f} MB)"
+        )
 
         # 3. Integrity Verification
-        logger.info("🔐 Generating SHA256 checksum...")
-        file_hash = calculate_sha256(archive_path)
-
-        hash_filename = f"{archive_filename}.sha256"
-        hash_path = backup_dir / hash_filename
-
-        with open(hash_path, "w") as f:
-            f.write(f"{file_hash}  {archive_filename}\n")
-
-        logger.info(f"✅ Checksum saved to: {hash_filename}")
-        logger.info(f"#️⃣  SHA256: {file_hash}")
+        write_checksums(backup_dir, archive_filename, tee.hexdigests())
 
     except Exception as e:
         logger.error(f"❌ Operation failed: {e}")
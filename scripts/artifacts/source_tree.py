@@ -0,0 +1,384 @@
+"""
+K.A.O.S. Source Tree Walker
+.gitignore-style exclusion rules and a pruning, parallel-stat directory
+walk that feeds tar archives, plus the cached file manifest behind
+reproducible archives.
+"""
+
+import grp
+import hashlib
+import json
+import os
+import pwd
+import re
+import stat
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Same exclusions the generator has always applied
+DEFAULT_EXCLUDES = (
+    ".git",
+    ".venv",
+    "venv",
+    "__pycache__",
+    "backups",
+    "*.pyc",
+    "*.log",
+)
+
+# lstat calls in flight at once; stat is I/O bound and releases the GIL
+STAT_THREADS = 8
+# Entries per stat task, so pool overhead is not paid per file
+STAT_BATCH = 64
+
+
+def _translate(glob):
+    """Regex source for one glob, where "*" and "?" never match "/"."""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if glob[j:j + 1] == "!":
+                j += 1
+            if glob[j:j + 1] == "]":
+                j += 1
+            end = glob.find("]", j)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                elif body.startswith("^"):
+                    body = "\\" + body
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class ExclusionRules:
+    """
+    Exclusion patterns with .gitignore semantics, compiled once:
+
+    - blank lines and ``#`` comments are ignored
+    - ``!pattern`` re-includes what an earlier pattern excluded
+    - a trailing ``/`` only matches directories
+    - a pattern without any other ``/`` matches a name at any depth;
+      otherwise it is anchored to the root of the tree
+    - ``*``, ``?`` and ``[...]`` do not cross ``/``; ``**`` does
+
+    As in git, the last matching pattern wins, and nothing inside an
+    excluded directory can be re-included because the walk never enters
+    it. Paths are relative to the tree root, with ``/`` separators.
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        self._has_negation = False
+        self._combined = None
+        for line in patterns:
+            self.add(line)
+
+    def add(self, line):
+        pattern = line.rstrip("\n")
+        if not pattern.strip() or pattern.startswith("#"):
+            return
+        # Trailing spaces are insignificant unless escaped
+        while pattern.endswith(" ") and not pattern.endswith("\\ "):
+            pattern = pattern[:-1]
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        elif pattern.startswith("\\"):
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            return
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        regex = re.compile(f"{prefix}{_translate(pattern)}\\Z", re.DOTALL)
+        self.rules.append((regex, negate, dir_only))
+        self._has_negation = self._has_negation or negate
+        self._combined = None
+
+    def excluded(self, path, is_dir=False):
+        """True if the relative ``path`` is excluded."""
+        if not self._has_negation:
+            # Common case: one alternation decides it in a single match
+            combined = self._combined_for(is_dir)
+            return combined is not None and combined.match(path) is not None
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                return not negate
+        return False
+
+    def _combined_for(self, is_dir):
+        if self._combined is None:
+            self._combined = {}
+            for kind in (False, True):
+                sources = [regex.pattern for regex, _, dir_only in self.rules
+                           if kind or not dir_only]
+                self._combined[kind] = (
+                    re.compile("|".join(f"(?:{s})" for s in sources), re.DOTALL)
+                    if sources else None
+                )
+        return self._combined[is_dir]
+
+
+def walk(root, rules, _prefix=""):
+    """
+    Yield (relative path, absolute path) for everything under ``root``
+    that ``rules`` keeps, depth-first in name order like
+    ``tarfile.add``. Excluded directories are pruned without being listed.
+    """
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        rel = _prefix + entry.name
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if rules.excluded(rel, is_dir):
+            continue
+        yield rel, entry.path
+        if is_dir:
+            yield from walk(entry.path, rules, rel + "/")
+
+
+def _lstat_batch(items):
+    results = []
+    for rel, path in items:
+        try:
+            st = os.lstat(path)
+            target = os.readlink(path) if stat.S_ISLNK(st.st_mode) else None
+        except OSError:
+            # Vanished between listing and stat
+            st = target = None
+        results.append((rel, path, st, target))
+    return results
+
+
+def stat_tree(root, rules, threads=STAT_THREADS):
+    """
+    ``walk`` with entries lstat'ed on a thread pool in batches of
+    ``STAT_BATCH``: yields (relative path, absolute path, stat result,
+    symlink target) in walk order, with at most ``2 * threads`` batches
+    in flight.
+    """
+    with ThreadPoolExecutor(
+        max_workers=threads, thread_name_prefix="artifact-stat"
+    ) as pool:
+        pending = deque()
+        batch = []
+        for item in walk(root, rules):
+            batch.append(item)
+            if len(batch) < STAT_BATCH:
+                continue
+            pending.append(pool.submit(_lstat_batch, batch))
+            batch = []
+            if len(pending) >= 2 * threads:
+                yield from pending.popleft().result()
+        if batch:
+            pending.append(pool.submit(_lstat_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+
+@lru_cache(maxsize=None)
+def _user_name(uid):
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return ""
+
+
+@lru_cache(maxsize=None)
+def _group_name(gid):
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return ""
+
+
+def make_tarinfo(arcname, st, target=None):
+    """TarInfo for a stat result; None for types a source archive skips."""
+    info = tarfile.TarInfo(arcname)
+    if stat.S_ISREG(st.st_mode):
+        info.type = tarfile.REGTYPE
+        info.size = st.st_size
+    elif stat.S_ISDIR(st.st_mode):
+        info.type = tarfile.DIRTYPE
+    elif stat.S_ISLNK(st.st_mode):
+        info.type = tarfile.SYMTYPE
+        info.linkname = target
+    else:
+        return None
+    info.mode = stat.S_IMODE(st.st_mode)
+    # Whole seconds fit the ustar header; a float would add a pax header
+    info.mtime = int(st.st_mtime)
+    info.uid = st.st_uid
+    info.gid = st.st_gid
+    info.uname = _user_name(st.st_uid)
+    info.gname = _group_name(st.st_gid)
+    return info
+
+
+def add_tree(tar, root, rules, arcname=".", threads=STAT_THREADS):
+    """
+    Add ``root`` to an open TarFile as ``arcname``, skipping what
+    ``rules`` excludes. Returns the number of entries written.
+    """
+    count = 0
+    root_info = make_tarinfo(arcname, os.lstat(root))
+    tar.addfile(root_info)
+    for rel, path, st, target in stat_tree(root, rules, threads):
+        if st is None:
+            continue
+        info = make_tarinfo(f"{arcname}/{rel}", st, target)
+        if info is None:
+            continue
+        if info.isreg():
+            with open(path, "rb") as f:
+                tar.addfile(info, f)
+        else:
+            tar.addfile(info)
+        count += 1
+    return count
+
+
+MANIFEST_FORMAT = 1
+
+
+def normalized_mode(mode, is_dir=False):
+    """0755 for directories and executables, 0644 for everything else."""
+    return 0o755 if is_dir or mode & 0o111 else 0o644
+
+
+def load_manifest(path):
+    """The manifest saved by the previous reproducible run, or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def save_manifest(path, manifest):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dict(manifest, format=MANIFEST_FORMAT), f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def scan_tree(root, rules, hash_file, previous=None, threads=STAT_THREADS):
+    """
+    Manifest entries for the tree, in archive order. A file whose size
+    and mtime match ``previous`` (a loaded manifest) keeps its recorded
+    hash; any other file is hashed with ``hash_file(path)``. Returns
+    (entries, number of files hashed).
+    """
+    known = {}
+    if previous:
+        known = {entry["path"]: entry for entry in previous["entries"]}
+    entries = []
+    hashed = 0
+    for rel, path, st, target in stat_tree(root, rules, threads):
+        if st is None:
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            entries.append({"path": rel, "type": "dir",
+                            "mode": normalized_mode(st.st_mode, True)})
+        elif stat.S_ISLNK(st.st_mode):
+            entries.append({"path": rel, "type": "symlink", "target": target})
+        elif stat.S_ISREG(st.st_mode):
+            entry = {"path": rel, "type": "file",
+                     "mode": normalized_mode(st.st_mode),
+                     "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            old = known.get(rel)
+            if (old is not None and old["type"] == "file"
+                    and old["size"] == st.st_size
+                    and old["mtime_ns"] == st.st_mtime_ns):
+                entry["sha256"] = old["sha256"]
+            else:
+                entry["sha256"] = hash_file(path)
+                hashed += 1
+            entries.append(entry)
+    return entries, hashed
+
+
+def tree_key(entries, **options):
+    """
+    SHA-256 over everything that ends up in a reproducible archive: the
+    entries without their real mtimes, plus the packaging ``options``.
+    Equal keys produce byte-identical archives.
+    """
+    content = [
+        {k: v for k, v in entry.items() if k != "mtime_ns"}
+        for entry in entries
+    ]
+    blob = json.dumps({"options": options, "entries": content},
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _normalized_tarinfo(name, entry, mtime):
+    info = tarfile.TarInfo(name)
+    info.mtime = mtime
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    if entry["type"] == "dir":
+        info.type = tarfile.DIRTYPE
+        info.mode = entry["mode"]
+    elif entry["type"] == "symlink":
+        info.type = tarfile.SYMTYPE
+        info.linkname = entry["target"]
+        info.mode = 0o777
+    else:
+        info.size = entry["size"]
+        info.mode = entry["mode"]
+    return info
+
+
+def add_entries_normalized(tar, root, entries, arcname=".", mtime=0):
+    """
+    Add manifest ``entries`` of ``root`` in their (sorted) order with
+    owner, group and mtime normalized, so the same tree always yields
+    the same tar stream. Returns the number of entries written.
+    """
+    tar.addfile(_normalized_tarinfo(arcname, {"type": "dir", "mode": 0o755},
+                                    mtime))
+    for entry in entries:
+        info = _normalized_tarinfo(f"{arcname}/{entry['path']}", entry, mtime)
+        if info.isreg():
+            with open(os.path.join(root, entry["path"]), "rb") as f:
+                tar.addfile(info, f)
+        else:
+            tar.addfile(info)
+    return len(entries)
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+K.A.O.S. Benchmark - Brain Load Test & Analyzer Micro-Benchmark
+Reproducible throughput/latency numbers with baseline regression checks.
+
+Run from the repository root:
+    python -m scripts.benchmark.bench load --concurrency 1 8 32 --output load.json
+    python -m scripts.benchmark.bench analyzer --size 100000 --output analyzer.json
+Add ``--baseline FILE`` to fail on regressions (a missing file is created
+from the run), ``--update-baseline`` to re-record it. Baselines are
+machine-specific and are not committed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from backend.src.brain.app.core.analyzer import CommandAnalyzer
+
+from .corpus import build_corpus
+from .stub_ollama import StubOllamaServer
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+# Metrics checked against the baseline: higher-is-better first
+THROUGHPUT_KEY = "throughput"
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+# Reasoning suffixes of heuristic-only answers
+FALLBACK_MARKERS = ("| LLM Offline", "| LLM Busy")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%H:%M:%S",
+)
+logger = logging.getLogger("KAOS_BENCH")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, **extra) -> Dict:
+    """Throughput and latency percentiles (latencies in seconds)."""
+    ordered = sorted(latencies)
+    summary = {
+        "name": name,
+        "samples": len(ordered),
+        THROUGHPUT_KEY: len(ordered) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+    summary.update(extra)
+    return summary
+
+
+def environment() -> Dict:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "revision": revision or None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BrainProcess:
+    """
+    The Brain API in a child process, so the load generator does not
+    share its interpreter. ``server`` is ``gunicorn`` (production:
+    gevent workers), ``asgi`` (uvicorn) or ``flask`` (threaded dev server).
+    """
+
+    def __init__(
+        self,
+        ollama_url: str,
+        server: str = "gunicorn",
+        workers: int = 3,
+        cache: bool = False,
+        log_path: Optional[str] = None,
+    ):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = server
+        self.workers = workers
+        self.log_path = log_path
+        self.env = dict(os.environ, OLLAMA_URL=ollama_url, OLLAMA_MODEL="stub")
+        if not cache:
+            # Every request then reaches the analyzer and the stub LLM
+            self.env["ANALYSIS_CACHE_SIZE"] = "0"
+            self.env["SEMANTIC_CACHE_SIZE"] = "0"
+        self.process: Optional[subprocess.Popen] = None
+
+    def command(self) -> List[str]:
+        bind = f"127.0.0.1:{self.port}"
+        if self.server == "gunicorn":
+            return [
+                sys.executable, "-m", "gunicorn", "--workers", str(self.workers),
+                "--worker-class", "gevent", "--bind", bind,
+                "backend.src.brain.app.main:app",
+            ]
+        if self.server == "asgi":
+            return [
+                sys.executable, "-m", "uvicorn", "--workers", str(self.workers),
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning", "backend.src.brain.app.asgi:app",
+            ]
+        return [
+            sys.executable, "-c",
+            "from backend.src.brain.app.main import app; "
+            f"app.run(host='127.0.0.1', port={self.port}, threaded=True)",
+        ]
+
+    def __enter__(self) -> "BrainProcess":
+        log = open(self.log_path, "ab") if self.log_path else subprocess.DEVNULL
+        self.process = subprocess.Popen(
+            self.command(), cwd=ROOT_DIR, env=self.env,
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        self.wait_healthy()
+        return self
+
+    def wait_healthy(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"Brain exited with code {self.process.returncode}"
+                )
+            try:
+                if requests.get(f"{self.url}/api/v1/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"Brain not healthy after {timeout}s")
+
+    def __exit__(self, *exc_info) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def drive(
+    url: str, commands: List[str], concurrency: int,
+    duration: float, warmup: float,
+) -> Dict:
+    """
+    Closed-loop load: ``concurrency`` workers each keep one request in
+    flight. Only requests started after ``warmup`` seconds are measured.
+    """
+    endpoint = f"{url}/api/v1/analyze"
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    lock = threading.Lock()
+    latencies: List[float] = []
+    counts = {"errors": 0, "fallbacks": 0}
+
+    def worker(offset: int) -> None:
+        session = requests.Session()
+        local, errors, fallbacks = [], 0, 0
+        index = offset
+        while True:
+            begin = time.perf_counter()
+            if begin >= stop_at:
+                break
+            command = commands[index % len(commands)]
+            index += concurrency
+            try:
+                response = session.post(
+                    endpoint, json={"command": command}, timeout=60
+                )
+                ok = response.status_code == 200
+                degraded = ok and any(
+                    marker in response.text for marker in FALLBACK_MARKERS
+                )
+            except requests.RequestException:
+                ok, degraded = False, False
+            if begin < measure_from:
+                continue
+            local.append(time.perf_counter() - begin)
+            errors += not ok
+            fallbacks += degraded
+        session.close()
+        with lock:
+            latencies.extend(local)
+            counts["errors"] += errors
+            counts["fallbacks"] += fallbacks
+
+    threads = [
+        threading.Thread(target=worker, args=(offset,))
+        for offset in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Stragglers may finish after stop_at; measure to the last completion
+    elapsed = max(time.perf_counter() - measure_from, duration)
+    return summarize(
+        f"c{concurrency}", latencies, elapsed,
+        concurrency=concurrency, **counts,
+    )
+
+
+def run_load(args) -> Dict:
+    commands = build_corpus(args.corpus_size, args.seed)
+    stub = StubOllamaServer(
+        latency=args.latency, jitter=args.jitter,
+        failure_rate=args.failure_rate, seed=args.seed,
+    ).start()
+    results = []
+    try:
+        with BrainProcess(
+            stub.url, server=args.server, workers=args.workers,
+            cache=args.cache, log_path=args.brain_log,
+        ) as brain:
+            for concurrency in args.concurrency:
+                result = drive(
+                    brain.url, commands, concurrency, args.duration, args.warmup
+                )
+                logger.info(
+                    f"c={concurrency:<4} {result[THROUGHPUT_KEY]:9.1f} req/s  "
+                    f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                    f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+                )
+                results.append(result)
+    finally:
+        stub.stop()
+    config = {
+        key: getattr(args, key) for key in (
+            "server", "workers", "concurrency", "duration", "warmup",
+            "latency", "jitter", "failure_rate", "cache", "corpus_size", "seed",
+        )
+    }
+    return {"benchmark": "load", "config": config, "results": results}
+
+
+def run_analyzer(args) -> Dict:
+    commands = build_corpus(args.size, args.seed)
+    CommandAnalyzer.analyze_batch(commands[:1000])  # warm up
+
+    timings = []
+    clock = time.perf_counter
+    begin = clock()
+    for _ in range(args.repeats):
+        for command in commands:
+            start = clock()
+            CommandAnalyzer.analyze(command)
+            timings.append(clock() - start)
+    single = summarize("analyze", timings, clock() - begin)
+
+    batch_timings = []
+    for _ in range(args.repeats):
+        start = clock()
+        CommandAnalyzer.analyze_batch(commands)
+        batch_timings.append(clock() - start)
+    # Per-command figures so both rows compare like for like
+    batch = summarize(
+        "analyze_batch",
+        [t / len(commands) for t in batch_timings],
+        sum(batch_timings) / len(commands),
+    )
+    for result in (single, batch):
+        logger.info(
+            f"{result['name']:<14} {result[THROUGHPUT_KEY]:12.0f} cmd/s  "
+            f"p50 {result['p50_ms'] * 1000:8.2f} us  "
+            f"p99 {result['p99_ms'] * 1000:8.2f} us"
+        )
+    config = {"size": args.size, "repeats": args.repeats, "seed": args.seed}
+    return {"benchmark": "analyzer", "config": config, "results": [single, batch]}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Describe every result worse than the baseline beyond tolerance."""
+    regressions = []
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    for result in report["results"]:
+        base = previous.get(result["name"])
+        if base is None:
+            continue
+        floor = base[THROUGHPUT_KEY] * (1 - tolerance)
+        if result[THROUGHPUT_KEY] < floor:
+            regressions.append(
+                f"{result['name']}: throughput {result[THROUGHPUT_KEY]:.1f}/s "
+                f"< {floor:.1f}/s (baseline {base[THROUGHPUT_KEY]:.1f}/s)"
+            )
+        for key in LATENCY_KEYS:
+            ceiling = base[key] * (1 + tolerance)
+            if base[key] > 0 and result[key] > ceiling:
+                regressions.append(
+                    f"{result['name']}: {key} {result[key]:.3f} > {ceiling:.3f} "
+                    f"(baseline {base[key]:.3f})"
+                )
+    return regressions
+
+
+def write_json(path: str, data: Dict) -> None:
+    with open(path, "w") as handle:
+        json.dump(data, handle, indent=2)
+        handle.write("\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="Write the JSON report here")
+    common.add_argument("--baseline", help="Baseline report to check against")
+    common.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the baseline instead")
+    common.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression (default: 0.25)")
+    common.add_argument("--seed", type=int, default=0)
+
+    parser = argparse.ArgumentParser(description="K.A.O.S. Brain benchmarks")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    load = modes.add_parser("load", parents=[common],
+                            help="Load-test /api/v1/analyze")
+    load.add_argument("--server", choices=["gunicorn", "asgi", "flask"],
+                      default="gunicorn")
+    load.add_argument("--workers", type=int, default=3)
+    load.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    load.add_argument("--duration", type=float, default=10.0,
+                      help="Measured seconds per concurrency level")
+    load.add_argument("--warmup", type=float, default=2.0)
+    load.add_argument("--latency", type=float, default=0.05,
+                      help="Stub Ollama seconds per call")
+    load.add_argument("--jitter", type=float, default=0.0)
+    load.add_argument("--failure-rate", type=float, default=0.0)
+    load.add_argument("--cache", action="store_true",
+                      help="Keep the Brain's analysis cache enabled")
+    load.add_argument("--corpus-size", type=int, default=5000)
+    load.add_argument("--brain-log", help="Append Brain output to this file")
+
+    analyzer = modes.add_parser("analyzer", parents=[common],
+                                help="Micro-benchmark CommandAnalyzer")
+    analyzer.add_argument("--size", type=int, default=100000)
+    analyzer.add_argument("--repeats", type=int, default=3)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run_load(args) if args.mode == "load" else run_analyzer(args)
+    report["created"] = datetime.now(timezone.utc).isoformat()
+    report["environment"] = environment()
+
+    if args.output:
+        write_json(args.output, report)
+        logger.info(f"Report written to {args.output}")
+
+    if args.baseline and (
+        args.update_baseline or not os.path.exists(args.baseline)
+    ):
+        # The first run on a machine records its baseline
+        write_json(args.baseline, report)
+        logger.info(f"Baseline updated: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            return 1
+        logger.info("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
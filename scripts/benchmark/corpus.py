@@ -0,0 +1,47 @@
+"""
+K.A.O.S. Benchmark - Command Corpus
+Deterministic operator command mix for load tests and micro-benchmarks.
+"""
+
+import random
+from typing import List
+
+# Templates weighted roughly like an engagement log: mostly tool work,
+# some chatter, the odd destructive slip.
+TEMPLATES = [
+    (30, "nmap -sV -p {port} {ip}"),
+    (15, "scan the {zone} subnet {ip}/24 for open ports"),
+    (10, "map services on {host}"),
+    (10, "sqlmap -u http://{host}/item?id={n} --batch"),
+    (5, "inject a payload into the login form on {host}"),
+    (5, "msfconsole -q -x 'use exploit/multi/handler; set LHOST {ip}'"),
+    (5, "run metasploit against {host} port {port}"),
+    (8, "hello brain, what should I check on {host} next?"),
+    (2, "hi"),
+    (5, "cat /etc/passwd | grep {user}"),
+    (3, "rm -rf /tmp/loot-{n}"),
+    (1, "dd if=/dev/zero of=/dev/sd{disk}"),
+    (1, "chmod 777 /"),
+]
+
+ZONES = ["dmz", "lab", "corp", "guest", "mgmt"]
+USERS = ["root", "admin", "svc-backup", "www-data"]
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    """Return ``size`` commands drawn reproducibly from TEMPLATES."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in TEMPLATES]
+    templates = [template for _, template in TEMPLATES]
+    commands = []
+    for template in rng.choices(templates, weights=weights, k=size):
+        commands.append(template.format(
+            ip=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            host=f"{rng.choice(ZONES)}-{rng.randrange(100)}.target.lab",
+            port=rng.choice([22, 80, 443, 445, 3306, 8080]),
+            zone=rng.choice(ZONES),
+            user=rng.choice(USERS),
+            disk=rng.choice("abc"),
+            n=rng.randrange(10000),
+        ))
+    return commands
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+K.A.O.S. Benchmark - Stub Ollama Server
+Local stand-in for the Ollama generate API with tunable latency and errors.
+
+Run with: python -m scripts.benchmark.stub_ollama --latency 0.05 --failure-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate after a delay and /api/tags immediately."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.record_request()
+        delay = max(0.0, server.latency + server.uniform(-1, 1) * server.jitter)
+        time.sleep(delay)
+        if server.uniform(0, 1) < server.failure_rate:
+            self._send_json(500, {"error": "stub failure"})
+            return
+        self._send_json(
+            200, {"response": f"stub insight for: {body.get('prompt', '')}"}
+        )
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """
+    Threaded stub server. ``latency`` +/- ``jitter`` seconds is spent per
+    generate call and ``failure_rate`` of calls answer HTTP 500. The
+    random stream is seeded so runs are repeatable.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__((host, port), StubOllamaHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests_served = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def uniform(self, low: float, high: float) -> float:
+        with self._lock:
+            return self._random.uniform(low, high)
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests_served += 1
+
+    def start(self) -> "StubOllamaServer":
+        threading.Thread(
+            target=self.serve_forever, name="stub-ollama", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Seconds per generate call")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Uniform +/- seconds added to the latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fraction of generate calls answering HTTP 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StubOllamaServer(args.host, args.port, args.latency,
+                              args.jitter, args.failure_rate, args.seed)
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+K.A.O.S. Integration Tests - Benchmark Harness
+Short end-to-end runs of the load test and analyzer micro-benchmark
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+
+from scripts.benchmark import bench
+from scripts.benchmark.corpus import build_corpus
+from scripts.benchmark.stub_ollama import StubOllamaServer
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """Test suite for the benchmark harness"""
+
+    def test_stub_failure_rate(self):
+        """Test that the stub answers HTTP 500 for every call at rate 1.0"""
+        stub = StubOllamaServer(latency=0, failure_rate=1.0).start()
+        try:
+            response = requests.post(stub.url, json={"prompt": "x"}, timeout=5)
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(stub.requests_served, 1)
+        finally:
+            stub.stop()
+
+    def test_corpus_is_reproducible(self):
+        """Test that a seed always yields the same commands"""
+        self.assertEqual(build_corpus(50, seed=7), build_corpus(50, seed=7))
+        self.assertNotEqual(build_corpus(50, seed=7), build_corpus(50, seed=8))
+
+    def test_load_run_reports_and_checks_baseline(self):
+        """Test a short load run against the Brain and a stub Ollama"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "load.json")
+            baseline = os.path.join(tmp, "baseline.json")
+            args = ["load", "--server", "flask", "--concurrency", "1", "2",
+                    "--duration", "0.5", "--warmup", "0.1", "--latency", "0.01",
+                    "--output", output, "--baseline", baseline]
+
+            self.assertEqual(bench.main(args + ["--update-baseline"]), 0)
+            with open(output) as handle:
+                report = json.load(handle)
+            self.assertEqual([r["name"] for r in report["results"]], ["c1", "c2"])
+            for result in report["results"]:
+                self.assertGreater(result["throughput"], 0)
+                self.assertEqual(result["errors"], 0)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+            # An impossibly good baseline must be reported as a regression
+            for result in report["results"]:
+                result["throughput"] *= 100
+            with open(baseline, "w") as handle:
+                json.dump(report, handle)
+            self.assertEqual(bench.main(args), 1)
+
+    def test_compare_latency_tolerance(self):
+        """Test that only regressions beyond the tolerance fail"""
+        base = {"results": [{"name": "analyze", "throughput": 100.0,
+                             "p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 4.0}]}
+        run = {"results": [{"name": "analyze", "throughput": 90.0,
+                            "p50_ms": 1.1, "p95_ms": 2.2, "p99_ms": 6.0}]}
+        regressions = bench.compare(run, base, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("p99_ms", regressions[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
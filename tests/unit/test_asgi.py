@@ -0,0 +1,80 @@
+"""
+K.A.O.S. Unit Tests - Async Brain Module
+Tests for the Starlette serving mode and its LLM admission control
+"""
+
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from starlette.testclient import TestClient
+from backend.src.brain.app import asgi
+
+
+class TestAsyncBrainAPI(unittest.TestCase):
+    """Test suite for the ASGI Brain app"""
+
+    def test_health_endpoint(self):
+        """Test health check endpoint"""
+        with TestClient(asgi.app) as client:
+            response = client.get("/api/v1/health")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "healthy")
+
+    def test_conversation_skips_llm(self):
+        """Test that the heuristic fast path answers without the LLM"""
+        with TestClient(asgi.app) as client:
+            response = client.post("/api/v1/analyze",
+                                   json={"command": "hello brain"})
+        layer = response.json()["llm_layer"]
+        self.assertEqual(layer["tool_type"], "conversation")
+        self.assertNotIn("LLM", layer["reasoning"])
+
+    def test_overload_fails_fast(self):
+        """Test that a saturated LLM semaphore degrades to heuristics"""
+        with TestClient(asgi.app) as client:
+            asgi.llm_slots = asyncio.Semaphore(0)
+            response = client.post("/api/v1/analyze",
+                                   json={"command": "scan the dmz"})
+            stream = client.post("/api/v1/analyze/stream",
+                                 json={"command": "scan the dmz"})
+        self.assertTrue(
+            response.json()["llm_layer"]["reasoning"].endswith("| LLM Busy")
+        )
+        events = [line for line in stream.text.splitlines() if line]
+        self.assertIn('"event":"error"', events[1])
+        self.assertIn("LLM Busy", events[-1])
+
+    def test_blocking_work_leaves_event_loop(self):
+        """Test that scope reloads and semantic stores run on worker threads"""
+        threads = {}
+
+        def record(name, result=None):
+            def call(*args):
+                threads[name] = threading.get_ident()
+                return result
+            return call
+
+        async def generate(fn, prompt):
+            threads["loop"] = threading.get_ident()
+            return "insight"
+
+        breaker = mock.Mock(call_async=generate)
+        with mock.patch.object(asgi, "llm_breaker", breaker), \
+                mock.patch.object(asgi, "semantic_store", record("store")), \
+                mock.patch.object(asgi.TargetValidator, "reload_due",
+                                  return_value=True), \
+                mock.patch.object(asgi.TargetValidator, "validate_target",
+                                  record("scope", (True, "ok"))):
+            with TestClient(asgi.app) as client:
+                response = client.post(
+                    "/api/v1/analyze", json={"command": "scan the worker dmz"}
+                )
+        self.assertIn("insight", response.json()["llm_layer"]["reasoning"])
+        self.assertNotEqual(threads["scope"], threads["loop"])
+        self.assertNotEqual(threads["store"], threads["loop"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+K.A.O.S. Unit Tests - Backup Compression Module
+Tests for the pigz-style parallel gzip writer
+"""
+
+import gzip
+import io
+import os
+import random
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import unittest
+import zlib
+
+from frontend.tools.backup.compression import ParallelGzipWriter, open_compressed
+
+
+def sample_data(size):
+    rng = random.Random(7)
+    words = [b"nmap", b"scan", b"10.0.0.1", b"open", b"ssh", b"\n"]
+    text = b" ".join(rng.choice(words) for _ in range(size // 4))
+    return text[: size // 2] + rng.randbytes(size // 2)
+
+
+class TestParallelGzipWriter(unittest.TestCase):
+    """Test suite for ParallelGzipWriter class"""
+
+    def compress(self, data, **kwargs):
+        out = io.BytesIO()
+        writer = ParallelGzipWriter(out, **kwargs)
+        for start in range(0, len(data), 10240):
+            writer.write(data[start:start + 10240])
+        writer.close()
+        return out.getvalue()
+
+    def test_round_trip_single_member(self):
+        """Test that blocked output is one standard gzip member"""
+        data = sample_data(600 * 1024)
+        packed = self.compress(data, level=6, threads=4, block_size=64 * 1024)
+        self.assertEqual(gzip.decompress(packed), data)
+        member = zlib.decompressobj(31)
+        self.assertEqual(member.decompress(packed), data)
+        self.assertTrue(member.eof)
+        self.assertEqual(member.unused_data, b"")
+
+    def test_edge_sizes(self):
+        """Test empty input and exact block multiples"""
+        for size in (0, 1, 4096, 8192):
+            data = sample_data(size)
+            packed = self.compress(data, threads=2, block_size=4096)
+            self.assertEqual(gzip.decompress(packed), data)
+
+    def test_dictionary_keeps_ratio(self):
+        """Test that priming each block keeps the serial compression ratio"""
+        data = b"session capture line 0001 nmap -sV target\n" * 20000
+        packed = self.compress(data, threads=4, block_size=16 * 1024)
+        self.assertLess(len(packed), len(gzip.compress(data)) * 1.5)
+
+    @unittest.skipUnless(shutil.which("gzip"), "gzip binary not installed")
+    def test_readable_by_gzip_and_tar(self):
+        """Test a tar stream written through the writer with standard tools"""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "arm")
+            os.makedirs(source)
+            with open(os.path.join(source, "capture.pcap"), "wb") as f:
+                f.write(sample_data(300 * 1024))
+            archive = os.path.join(tmp, "backup.tar.gz")
+            with open(archive, "wb") as out:
+                stream = open_compressed(out, "gzip", level=1, threads=3)
+                with tarfile.open(fileobj=stream, mode="w|") as tar:
+                    tar.add(source, arcname="arm")
+                stream.close()
+
+            subprocess.run(["gzip", "-t", archive], check=True)
+            with tarfile.open(archive, "r:gz") as tar:
+                self.assertEqual(tar.getnames(), ["arm", "arm/capture.pcap"])
+
+    def test_invalid_codec_and_level(self):
+        """Test argument validation"""
+        with self.assertRaises(ValueError):
+            open_compressed(io.BytesIO(), "lz4")
+        with self.assertRaises(ValueError):
+            open_compressed(io.BytesIO(), "gzip", level=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+K.A.O.S. Unit Tests - Batch Analysis
+Tests for /api/v1/analyze/batch and CommandAnalyzer.analyze_batch
+"""
+
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.analyzer import CommandAnalyzer
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.data.splitlines() if line]
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """Test suite for batch analysis"""
+
+    def setUp(self):
+        """Initialize test client"""
+        self.client = main.app.test_client()
+        main.analysis_cache.clear()
+        main.semantic_cache.clear()
+
+    def test_analyze_batch_preserves_order(self):
+        """Test that duplicates share a result and order is kept"""
+        commands = ["hello", "rm -rf /", "hello", "scan it"]
+        results = CommandAnalyzer.analyze_batch(commands)
+        self.assertEqual(
+            [r["tool_type"] for r in results],
+            ["conversation", "system", "conversation", "nmap"],
+        )
+        self.assertIs(results[0], results[2])
+
+    def test_analyze_batch_single_pass(self):
+        """Test that the batch scans once and matches analyze per command"""
+        commands = ["sudo rm", "-rf /tmp", "hi", "sqlmap -u x", "this", "hi"]
+        with mock.patch.object(CommandAnalyzer, "analyze") as analyze:
+            results = CommandAnalyzer.analyze_batch(commands)
+        analyze.assert_not_called()
+        self.assertEqual(results,
+                         [CommandAnalyzer.analyze(c) for c in commands])
+
+    def test_json_array_and_ndjson_bodies(self):
+        """Test both accepted request formats"""
+        array = read_ndjson(self.client.post(
+            "/api/v1/analyze/batch",
+            data=json.dumps(["hello", {"command": "rm -rf /"}]),
+        ))
+        ndjson = read_ndjson(self.client.post(
+            "/api/v1/analyze/batch",
+            data='{"command": "hello"}\n"rm -rf /"\n',
+            content_type="application/x-ndjson",
+        ))
+        for results in (array, ndjson):
+            self.assertEqual([r["index"] for r in results], [0, 1])
+            self.assertEqual(results[1]["llm_layer"]["risk"], "CRITICAL")
+
+    def test_invalid_item_rejected(self):
+        """Test that malformed batches are rejected up front"""
+        response = self.client.post("/api/v1/analyze/batch", data="[1, 2]")
+        self.assertEqual(response.status_code, 400)
+
+    def test_llm_calls_are_grouped_and_bounded(self):
+        """Test one LLM call per distinct command, capped in parallel"""
+        active = []
+        peak = []
+        threads = set()
+        lock = threading.Lock()
+
+        def fake_llm(command):
+            with lock:
+                active.append(command)
+                peak.append(len(active))
+                threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+            with lock:
+                active.remove(command)
+            return "insight for " + command
+
+        commands = [f"scan host {i % 6}" for i in range(30)]
+        with mock.patch.object(main, "cached_llm_reasoning",
+                               side_effect=fake_llm) as llm:
+            results = read_ndjson(self.client.post(
+                "/api/v1/analyze/batch", data=json.dumps(commands)
+            ))
+
+        self.assertEqual(llm.call_count, 6)
+        self.assertLessEqual(max(peak), main.settings.BATCH_LLM_CONCURRENCY)
+        self.assertTrue(all(t.startswith("batch-llm") for t in threads))
+        self.assertEqual([r["index"] for r in results], list(range(30)))
+        self.assertIn("insight for scan host 5",
+                      results[11]["llm_layer"]["reasoning"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+K.A.O.S. Unit Tests - Arm Brain Client Module
+Tests for the pooled Brain session, health memory and disk cache
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from frontend.src.kaos_arm.brain_client import (
+    AnalysisStore,
+    BrainClient,
+    BrainHealth,
+    BrainRejected,
+    BrainUnavailable,
+)
+
+
+class StubBrainHandler(BaseHTTPRequestHandler):
+    """Minimal analyze/stream stub that records client ports"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.client_ports.add(self.client_address[1])
+        if body["command"].startswith("status "):
+            status = int(body["command"].split()[1])
+            data = json.dumps({"error": f"refused with {status}"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        layer = {"command": "nmap " + body["command"], "reasoning": "recon"}
+        if self.path.endswith("/stream"):
+            events = [{"event": "analysis", "llm_layer": layer},
+                      {"event": "token", "text": "ok"},
+                      {"event": "done", "reasoning": "recon | ok"}]
+            data = b"".join(json.dumps(e).encode() + b"\n" for e in events)
+        else:
+            data = json.dumps({"llm_layer": layer}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBrainClient(unittest.TestCase):
+    """Test suite for BrainClient, BrainHealth and AnalysisStore"""
+
+    def setUp(self):
+        """Start the stub Brain"""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubBrainHandler)
+        self.server.client_ports = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = BrainClient(f"http://127.0.0.1:{self.server.server_port}")
+
+    def tearDown(self):
+        """Stop the stub Brain"""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse(self):
+        """Test that analyze and stream calls share one connection"""
+        for index in range(3):
+            layer = self.client.analyze(f"host{index}")
+            self.assertEqual(layer["command"], f"nmap host{index}")
+        events = list(self.client.stream("host"))
+        self.assertEqual([e["event"] for e in events],
+                         ["analysis", "token", "done"])
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_dead_brain_skipped_until_cooldown(self):
+        """Test that a failed Brain is not retried inside the backoff window"""
+        clock = FakeClock()
+        health = BrainHealth(backoff_initial=2, backoff_max=5, clock=clock)
+        client = BrainClient("http://127.0.0.1:9", health=health)
+        with self.assertRaises(BrainUnavailable):
+            client.analyze("scan")
+        with self.assertRaisesRegex(BrainUnavailable, "marked offline"):
+            client.analyze("scan")
+
+        clock.now += 2
+        self.assertTrue(health.available())
+        with self.assertRaises(BrainUnavailable):
+            client.analyze("scan")
+        self.assertEqual(health.retry_in(), 4)
+        health.record_success()
+        self.assertTrue(health.available())
+        client.close()
+
+    def test_client_errors_are_not_outages(self):
+        """Test that 4xx answers are raised as is and 5xx ones mark a failure"""
+        for call in (self.client.analyze, lambda c: list(self.client.stream(c))):
+            with self.assertRaises(BrainRejected) as caught:
+                call("status 403")
+            self.assertEqual(caught.exception.status, 403)
+            self.assertEqual(caught.exception.message, "refused with 403")
+            self.assertTrue(self.client.health.available())
+
+        with self.assertRaisesRegex(BrainUnavailable, "500"):
+            self.client.analyze("status 500")
+        self.assertEqual(self.client.health.failures, 1)
+        self.assertFalse(self.client.health.available())
+
+    def test_store_survives_restart(self):
+        """Test normalized keys, persistence, LRU bound and TTL"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "analyses.db")
+            store = AnalysisStore(path, max_entries=2)
+            store.set("Scan  Host", {"proposed_command": "nmap host"})
+            store.set("ip", {"proposed_command": "ip a"})
+            store.close()
+
+            store = AnalysisStore(path, max_entries=2)
+            self.assertEqual(store.get("scan host")["proposed_command"],
+                             "nmap host")
+            store.set("whoami", {"proposed_command": "id"})
+            self.assertIsNone(store.get("ip"))
+            store.ttl = -1
+            self.assertIsNone(store.get("whoami"))
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
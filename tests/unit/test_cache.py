@@ -0,0 +1,84 @@
+"""
+K.A.O.S. Unit Tests - Analysis Cache Module
+Tests for the bounded LRU/TTL analysis cache
+"""
+
+import json
+import unittest
+from backend.src.brain.app.core.cache import (
+    AnalysisCache,
+    HEURISTIC,
+    LLM,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Test suite for AnalysisCache class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.clock = FakeClock()
+        self.cache = AnalysisCache(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_normalized_keys_and_namespaces(self):
+        """Test key normalization and heuristic/LLM separation"""
+        key = AnalysisCache.make_key(HEURISTIC, "mistral", "Scan  the Subnet")
+        self.cache.set(key, {"risk": "SAFE"})
+
+        same = AnalysisCache.make_key(HEURISTIC, "mistral", "scan the subnet ")
+        self.assertEqual(self.cache.get(same), {"risk": "SAFE"})
+        self.assertIsNone(
+            self.cache.get(AnalysisCache.make_key(LLM, "mistral", "scan the subnet"))
+        )
+        self.assertIsNone(
+            self.cache.get(AnalysisCache.make_key(HEURISTIC, "llama3", "scan the subnet"))
+        )
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL"""
+        self.cache.set("a", 1)
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10.0
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_api_feeds_cache_metrics(self):
+        """Test that repeated analyses show up as cache hits"""
+        from backend.src.brain.app.main import app, metrics
+
+        client = app.test_client()
+        metrics.reset()
+        for _ in range(2):
+            client.post(
+                "/api/v1/analyze",
+                data=json.dumps({"command": "hello there"}),
+                content_type="application/json",
+            )
+        cache = json.loads(client.get("/api/v1/metrics").data)["cache"]
+        self.assertEqual(cache["hits"], 1)
+        self.assertEqual(cache["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
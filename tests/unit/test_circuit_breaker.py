@@ -0,0 +1,138 @@
+"""
+K.A.O.S. Unit Tests - Circuit Breaker Module
+Tests for LLM circuit breaker states and the offline fast path
+"""
+
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.circuit_breaker import (
+    BreakerState,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing():
+    raise ConnectionError("ollama down")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test suite for CircuitBreaker class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.clock = FakeClock()
+        self.states = []
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, cooldown=10, clock=self.clock,
+            on_state_change=self.states.append,
+        )
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the breaker"""
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.breaker.call(failing)
+        self.assertIs(self.breaker.state, BreakerState.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: "never called")
+
+    def test_half_open_trial(self):
+        """Test the single half-open trial after the cooldown"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertIs(self.breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+        self.assertIs(self.breaker.state, BreakerState.OPEN)
+        self.clock.now = 20
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(
+            self.states,
+            [BreakerState.OPEN, BreakerState.HALF_OPEN, BreakerState.OPEN,
+             BreakerState.HALF_OPEN, BreakerState.CLOSED],
+        )
+
+    def test_interrupted_trial_is_released(self):
+        """Test that a BaseException frees the half-open trial"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.breaker.call(interrupted)
+        self.assertIs(self.breaker.state, BreakerState.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_abandoned()
+
+        async def cancelled():
+            raise asyncio.CancelledError
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(self.breaker.call_async(cancelled))
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertIs(self.breaker.state, BreakerState.CLOSED)
+
+    def test_background_probe_recovers(self):
+        """Test that a healthy probe moves the breaker to half-open"""
+        probed = threading.Event()
+
+        def probe():
+            probed.set()
+            return True
+
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=3600,
+                                 probe=probe, probe_interval=0.01)
+        breaker.record_failure()
+        self.assertTrue(probed.wait(2))
+        breaker._prober.join(2)
+        self.assertIs(breaker.state, BreakerState.HALF_OPEN)
+
+    def test_open_breaker_skips_llm(self):
+        """Test that the Brain answers heuristically while open"""
+        main.analysis_cache.clear()
+        main.semantic_cache.clear()
+        main.metrics.reset()
+        for _ in range(main.settings.LLM_BREAKER_THRESHOLD):
+            main.llm_breaker.record_failure()
+        try:
+            with mock.patch.object(main.ollama_client, "generate") as generate:
+                response = main.app.test_client().post(
+                    "/api/v1/analyze",
+                    data=json.dumps({"command": "scan the perimeter"}),
+                )
+            generate.assert_not_called()
+            reasoning = json.loads(response.data)["llm_layer"]["reasoning"]
+            self.assertTrue(reasoning.endswith("| LLM Offline"))
+
+            llm = main.metrics.get_metrics()["llm"]
+            self.assertEqual(llm["breaker_state"], "open")
+            self.assertEqual(main.metrics.get_metrics()["fallback"]["activations"], 1)
+        finally:
+            main.llm_breaker.stop()
+            main.llm_breaker.record_success()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+K.A.O.S. Unit Tests - Arm Execution Engine Module
+Tests for streamed output, limits and wait4 resource usage
+"""
+
+import signal
+import sys
+import time
+import unittest
+
+from frontend.src.kaos_arm.executor import ExecStats, Execution, run_foreground
+
+BURN = "import time\nend = time.process_time() + %s\nwhile time.process_time() < end: pass"
+
+
+class TestExecution(unittest.TestCase):
+    """Test suite for Execution and ExecStats"""
+
+    def run_python(self, code, **kwargs):
+        lines = []
+        execution = Execution(
+            [sys.executable, "-c", code],
+            on_line=lambda stream, line: lines.append((stream, line)),
+            echo=False,
+            **kwargs
+        )
+        return execution.wait(), lines
+
+    def test_lines_streamed_per_stream(self):
+        """Test line splitting, stderr separation and a trailing partial line"""
+        result, lines = self.run_python(
+            "import sys\nprint('one')\nprint('two', file=sys.stderr)\n"
+            "sys.stdout.write('partial')\nsys.exit(4)"
+        )
+        self.assertEqual(result.exit_code, 4)
+        self.assertEqual(sorted(lines), [("stderr", "two"),
+                                         ("stdout", "one"),
+                                         ("stdout", "partial")])
+
+    def test_rusage_recorded(self):
+        """Test wall time, CPU time and peak RSS from wait4"""
+        result, _ = self.run_python(
+            BURN % 0.2 + "\nblob = bytearray(64 * 1024 * 1024)\nblob[::4096] = b'x' * len(blob[::4096])"
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertGreaterEqual(result.cpu_time, 0.2)
+        self.assertGreaterEqual(result.wall_time, result.user_time)
+        self.assertGreater(result.max_rss_kb, 64 * 1024)
+
+    def test_tty_gives_controlling_terminal(self):
+        """Test that a pty command sees a terminal and its output is captured"""
+        result, lines = self.run_python(
+            "import os, sys\n"
+            "print(sys.stdin.isatty(), sys.stdout.isatty())\n"
+            "os.close(os.open('/dev/tty', os.O_RDWR))\n"
+            "print('err', file=sys.stderr)",
+            tty=True,
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(lines, [("stdout", "True True"), ("stdout", "err")])
+
+    def test_wall_limit_kills_group(self):
+        """Test that the wall-clock limit terminates the command"""
+        started = time.monotonic()
+        result, _ = self.run_python("import time\ntime.sleep(30)", wall_limit=0.2)
+        self.assertTrue(result.timed_out)
+        self.assertEqual(result.exit_code, -signal.SIGTERM)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_cpu_limit(self):
+        """Test that RLIMIT_CPU stops a busy loop"""
+        result, _ = self.run_python(BURN % 30, cpu_limit=1)
+        self.assertTrue(result.cpu_limited)
+        self.assertFalse(result.timed_out)
+        self.assertLess(result.wall_time, 10)
+
+    def test_foreground_forwards_interrupt(self):
+        """Test that Ctrl-C reaches the command, not the caller"""
+        execution = Execution([sys.executable, "-c", "import time\ntime.sleep(30)"],
+                              echo=False)
+        calls = []
+        wait = execution.wait
+
+        def interrupted_wait():
+            if not calls:
+                calls.append(1)
+                raise KeyboardInterrupt
+            return wait()
+
+        execution.wait = interrupted_wait
+        result = run_foreground(execution)
+        self.assertEqual(result.exit_code, -signal.SIGINT)
+
+    def test_stats_render(self):
+        """Test the kali-stats table and totals"""
+        stats = ExecStats(max_entries=2)
+        for code in ("pass", "import sys; sys.exit(2)", "pass"):
+            stats.add(self.run_python(code)[0])
+        self.assertEqual(len(stats.recent()), 2)
+        text = stats.render()
+        self.assertIn("3 commands", text)
+        self.assertIn("    2 ", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
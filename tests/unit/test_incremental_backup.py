@@ -0,0 +1,123 @@
+"""
+K.A.O.S. Unit Tests - Incremental Backup Module
+Tests for content-defined chunking and the hash-addressed chunk store
+"""
+
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from frontend.tools.backup import incremental
+from frontend.tools.backup.incremental import (
+    MAX_SIZE,
+    MIN_SIZE,
+    ChunkStore,
+    chunk_file,
+    iter_chunks,
+)
+
+
+class TestChunking(unittest.TestCase):
+    """Test suite for iter_chunks"""
+
+    def test_boundaries_survive_insertion(self):
+        """Test that an insertion only changes the chunks around it"""
+        data = random.Random(3).randbytes(2 * 1024 * 1024)
+        chunks = list(iter_chunks(io.BytesIO(data)))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertTrue(all(MIN_SIZE <= len(c) <= MAX_SIZE for c in chunks[:-1]))
+
+        edited = data[:1000000] + b"new session note" + data[1000000:]
+        shared = set(chunks) & set(iter_chunks(io.BytesIO(edited)))
+        self.assertGreaterEqual(len(shared), len(chunks) - 2)
+
+    def test_small_and_empty_files(self):
+        """Test files below the minimum chunk size"""
+        self.assertEqual(list(iter_chunks(io.BytesIO(b""))), [])
+        self.assertEqual(list(iter_chunks(io.BytesIO(b"abc"))), [b"abc"])
+
+
+class TestChunkStore(unittest.TestCase):
+    """Test suite for ChunkStore class"""
+
+    def setUp(self):
+        """Create a source tree and an empty store"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "arm")
+        os.makedirs(os.path.join(self.source, "captures"))
+        self.write("captures/scan.xml", random.Random(1).randbytes(300 * 1024))
+        self.write("session.log", b"started\n" * 1000)
+        os.symlink("session.log", os.path.join(self.source, "current.log"))
+        os.symlink("captures", os.path.join(self.source, "latest"))
+        self.store = ChunkStore(os.path.join(self.source, "backups", "incremental"))
+
+    def tearDown(self):
+        """Remove the source tree and store"""
+        self.tmp.cleanup()
+
+    def write(self, rel, data):
+        with open(os.path.join(self.source, rel), "wb") as f:
+            f.write(data)
+
+    def test_unchanged_files_not_read(self):
+        """Test that a second snapshot only reads modified files"""
+        _, first = self.store.backup(self.source, name="s1")
+        self.assertEqual(first["unchanged"], 0)
+
+        with open(os.path.join(self.source, "session.log"), "ab") as f:
+            f.write(b"command\n")
+        with mock.patch.object(self.store, "_store_file",
+                               wraps=self.store._store_file) as store_file:
+            _, second = self.store.backup(self.source, name="s2")
+        self.assertEqual([c.args[0] for c in store_file.call_args_list],
+                         [os.path.join(self.source, "session.log")])
+        self.assertEqual(second["unchanged"], 1)
+        self.assertLess(second["bytes_read"], first["bytes_read"])
+
+    def test_restore_round_trip(self):
+        """Test that any snapshot rebuilds byte-identical files"""
+        self.store.backup(self.source, name="s1")
+        self.write("session.log", b"rewritten\n")
+        self.store.backup(self.source, name="s2")
+
+        target = os.path.join(self.tmp.name, "restore")
+        self.assertEqual(self.store.restore("s1", target), 2)
+        with open(os.path.join(target, "session.log"), "rb") as f:
+            self.assertEqual(f.read(), b"started\n" * 1000)
+        self.assertEqual(os.readlink(os.path.join(target, "current.log")),
+                         "session.log")
+        self.assertEqual(os.readlink(os.path.join(target, "latest")), "captures")
+        self.assertFalse(os.path.exists(os.path.join(target, "backups")))
+        src = os.stat(os.path.join(self.source, "captures", "scan.xml"))
+        dst = os.stat(os.path.join(target, "captures", "scan.xml"))
+        self.assertEqual(src.st_mtime_ns, dst.st_mtime_ns)
+
+    @mock.patch.object(incremental, "fastcdc_cy", None)
+    @mock.patch.object(incremental, "PY_CDC_LIMIT", 100 * 1024)
+    def test_large_files_use_fixed_chunks_without_fastcdc(self):
+        """Test the fixed-size fallback above the Python chunking limit"""
+        with mock.patch.object(incremental, "iter_chunks") as cdc:
+            chunks = list(chunk_file(
+                os.path.join(self.source, "captures", "scan.xml"), 300 * 1024
+            ))
+        cdc.assert_not_called()
+        self.assertEqual([len(c) for c in chunks], [MAX_SIZE, 300 * 1024 - MAX_SIZE])
+
+    def test_rotation_collects_garbage(self):
+        """Test that chunks only used by expired snapshots are removed"""
+        self.store.backup(self.source, name="s1")
+        self.write("session.log", b"rewritten\n")
+        self.store.backup(self.source, name="s2")
+
+        removed, chunks = self.store.rotate(keep=1)
+        self.assertEqual((removed, chunks), (1, 1))
+        self.assertEqual(self.store.snapshots(), ["s2"])
+        target = os.path.join(self.tmp.name, "restore")
+        self.assertEqual(self.store.restore("s2", target), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+K.A.O.S. Unit Tests - Arm Background Jobs Module
+Tests for the job table, concurrency cap and output ring buffers
+"""
+
+import signal
+import subprocess
+import sys
+import threading
+import unittest
+
+from frontend.src.kaos_arm.executor import Execution
+from frontend.src.kaos_arm.jobs import DONE, KILLED, QUEUED, RUNNING, JobManager
+
+
+def spawn(job, on_line):
+    return Execution(job.args, command=job.command, on_line=on_line, echo=False)
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestJobManager(unittest.TestCase):
+    """Test suite for JobManager class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.exited = []
+        self.manager = JobManager(spawn, max_running=1, buffer_lines=3,
+                                  on_exit=self.exited.append)
+
+    def test_ring_buffer_keeps_last_lines(self):
+        """Test that only the newest output lines are retained"""
+        job = self.manager.submit("count", python("for i in range(10): print(i)"))
+        self.assertTrue(job.finished.wait(10))
+        self.assertEqual(job.output(), ["7", "8", "9"])
+        self.assertEqual(job.lines_seen, 10)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result.exit_code, 0)
+        self.assertEqual(self.manager.take_finished(), [job])
+        self.assertEqual(self.manager.take_finished(), [])
+
+    def test_concurrency_cap_and_cancel(self):
+        """Test that jobs beyond the cap wait and can be cancelled"""
+        first = self.manager.submit("sleep", python("import time; time.sleep(30)"))
+        second = self.manager.submit("echo", python("print('x')"))
+        third = self.manager.submit("echo", python("print('y')"))
+        for _ in range(100):
+            if first.status == RUNNING and first.execution is not None:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(second.status, QUEUED)
+        self.assertEqual(self.manager.active(), 3)
+
+        self.assertTrue(self.manager.kill(third))
+        self.assertTrue(self.manager.kill(first, signal.SIGKILL))
+        for job in (first, second, third):
+            self.assertTrue(job.finished.wait(10))
+        self.assertEqual(first.result.exit_code, -signal.SIGKILL)
+        self.assertEqual(second.output(), ["x"])
+        self.assertEqual(third.status, KILLED)
+        self.assertIsNone(third.result)
+        self.assertEqual(len(self.exited), 3)
+
+    def test_attach_replays_backlog(self):
+        """Test that fg-style attach returns the backlog then streams"""
+        gate = python("import sys\nprint('a', flush=True)\nsys.stdin.readline()\nprint('b')")
+        manager = JobManager(
+            lambda job, on_line: Execution(job.args, on_line=on_line, echo=False,
+                                           stdin=subprocess.PIPE),
+        )
+        job = manager.submit("gate", gate)
+        for _ in range(500):
+            if job.output():
+                break
+            threading.Event().wait(0.01)
+        live = []
+        self.assertEqual(job.attach(lambda stream, line: live.append(line)), ["a"])
+        job.execution.process.stdin.write(b"\n")
+        job.execution.process.stdin.close()
+        self.assertTrue(job.finished.wait(10))
+        self.assertEqual(live, ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+K.A.O.S. Unit Tests - Arm Session Journal Module
+Tests for the background NDJSON audit writer
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from frontend.src.kaos_arm.journal import SessionJournal
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestSessionJournal(unittest.TestCase):
+    """Test suite for SessionJournal class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "arm", "session.log")
+
+    def tearDown(self):
+        """Remove the journal directory"""
+        self.tmp.cleanup()
+
+    def test_records_in_order_after_close(self):
+        """Test that close drains every queued record as NDJSON"""
+        journal = SessionJournal(self.path)
+        journal.record("command", input="scan the box", route="brain")
+        for code in range(100):
+            journal.record("exec", command="true", exit_code=code)
+        journal.close()
+
+        records = read_records(self.path)
+        self.assertEqual(len(records), 101)
+        self.assertEqual(records[0]["type"], "command")
+        self.assertEqual([r["seq"] for r in records], list(range(1, 102)))
+        self.assertEqual(records[-1]["exit_code"], 99)
+        self.assertFalse(journal.record("late"))
+
+    def test_fsync_batched_within_window(self):
+        """Test that bursts share one fsync and idle data is synced"""
+        with mock.patch("os.fsync") as fsync:
+            journal = SessionJournal(self.path, fsync_interval=0.1)
+            for _ in range(50):
+                journal.record("token")
+            time.sleep(0.3)
+            self.assertLessEqual(fsync.call_count, 2)
+            self.assertGreaterEqual(fsync.call_count, 1)
+            self.assertEqual(len(read_records(self.path)), 50)
+            journal.close()
+
+    def test_rotation(self):
+        """Test size-based rotation keeps the configured backups"""
+        journal = SessionJournal(self.path, max_bytes=200, backups=2)
+        for index in range(60):
+            journal.record("exec", command="echo %d" % index, exit_code=0)
+        journal.close()
+
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        tail = read_records(self.path) or read_records(self.path + ".1")
+        self.assertEqual(tail[-1]["command"], "echo 59")
+
+    def test_failed_rotation_keeps_writing(self):
+        """Test that a rotation that cannot reopen the file loses nothing"""
+        journal = SessionJournal(self.path, max_bytes=600, backups=5)
+        with mock.patch("builtins.open", side_effect=PermissionError("denied")):
+            for index in range(10):
+                journal.record("exec", command="echo %d" % index, exit_code=0)
+            time.sleep(0.2)
+        self.assertGreater(journal.errors, 0)
+        self.assertFalse(os.path.exists(self.path))
+        for index in range(10, 20):
+            journal.record("exec", command="echo %d" % index, exit_code=0)
+        journal.close()
+
+        self.assertTrue(os.path.exists(self.path))
+        records = []
+        for path in [f"{self.path}.{i}" for i in range(5, 0, -1)] + [self.path]:
+            if os.path.exists(path):
+                records += read_records(path)
+        self.assertEqual([r["command"] for r in records],
+                         ["echo %d" % i for i in range(20)])
+
+    def test_full_queue_drops_and_reports_gap(self):
+        """Test that a full queue never blocks and leaves a gap record"""
+        journal = SessionJournal(self.path, max_queue=1)
+        gate = threading.Event()
+        write = journal._write
+
+        def stalled_write(batch, force_sync=False):
+            gate.wait(5)
+            write(batch, force_sync)
+
+        journal._write = stalled_write
+        journal.record("first")
+        time.sleep(0.05)  # writer picks it up and stalls
+        self.assertTrue(journal.record("queued"))
+        self.assertFalse(journal.record("overflow"))
+        self.assertEqual(journal.dropped, 1)
+        gate.set()
+        time.sleep(0.05)
+        journal.record("after")
+        journal.close()
+
+        kinds = [r["type"] for r in read_records(self.path)]
+        self.assertEqual(kinds.count("journal_gap"), 1)
+        kinds.remove("journal_gap")
+        self.assertEqual(kinds, ["first", "queued", "after"])
+
+if __name__ == "__main__":
+    unittest.main()
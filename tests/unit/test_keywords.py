@@ -0,0 +1,71 @@
+"""
+K.A.O.S. Unit Tests - Keyword Index Module
+Tests for the Aho-Corasick intent keyword automaton
+"""
+
+import unittest
+from backend.src.brain.app.core.keywords import KeywordIndex
+from backend.src.brain.app.core.analyzer import CommandAnalyzer, ToolType
+
+
+class TestKeywordIndex(unittest.TestCase):
+    """Test suite for KeywordIndex class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.index = KeywordIndex()
+        for keyword in ("he", "she", "his", "hers"):
+            self.index.add(keyword, keyword)
+        self.index.build()
+
+    def test_overlapping_hits_in_one_pass(self):
+        """Test the classic overlapping-keyword example"""
+        hits = [(h.keyword, h.start, h.end) for h in self.index.search("ushers")]
+        self.assertEqual(
+            sorted(hits),
+            [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)],
+        )
+
+    def test_whole_word_matching(self):
+        """Test that whole-word keywords respect word boundaries"""
+        index = KeywordIndex()
+        index.add("hi", "greeting", whole_word=True)
+        index.build()
+        self.assertEqual(index.search("this is it"), [])
+        self.assertEqual(len(index.search("Hi, there")), 1)
+
+    def test_rank_by_weight(self):
+        """Test ranking by summed weight rather than insertion order"""
+        index = KeywordIndex()
+        index.add("map", "nmap")
+        index.add("sqlmap", "sqlmap", weight=3.0)
+        index.build()
+        self.assertEqual(
+            index.rank("run sqlmap now"), [("sqlmap", 3.0), ("nmap", 1.0)]
+        )
+
+    def test_rank_many_keeps_texts_apart(self):
+        """Test that a batch ranks each text as if searched alone"""
+        index = KeywordIndex()
+        index.add("hi", "greeting", whole_word=True)
+        index.add("map", "nmap")
+        index.build()
+        texts = ["HI", "this", "ma", "p hi", "", "nmap it"]
+        self.assertEqual(index.rank_many(texts),
+                         [index.rank(t) for t in texts])
+
+    def test_analyzer_candidates(self):
+        """Test ranked candidates exposed by the analyzer"""
+        result = CommandAnalyzer.analyze("sqlmap -u http://target.com")
+        self.assertEqual(result["tool_type"], ToolType.SQLMAP.value)
+        self.assertEqual(
+            result["intent_candidates"],
+            [ToolType.SQLMAP.value, ToolType.NMAP.value],
+        )
+        self.assertEqual(
+            CommandAnalyzer.identify_tool("show this file"), ToolType.UNKNOWN
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
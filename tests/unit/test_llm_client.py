@@ -0,0 +1,90 @@
+"""
+K.A.O.S. Unit Tests - LLM Client Module
+Tests for the pooled Ollama client against a local stub server
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from backend.src.brain.app.core.llm_client import OllamaClient
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal /api/generate stub that records client ports"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.client_ports.add(self.client_address[1])
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for _ in range(50):
+                line = json.dumps({"response": "abcde", "done": False})
+                self.wfile.write(line.encode() + b"\n")
+            self.wfile.write(b'{"response": "", "done": true}\n')
+            return
+        data = json.dumps({"response": "echo: " + body["prompt"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestOllamaClient(unittest.TestCase):
+    """Test suite for OllamaClient class"""
+
+    def setUp(self):
+        """Start the stub server"""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        self.server.client_ports = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/api/generate"
+        self.client = OllamaClient(url, "test-model", retries=2,
+                                   backoff_initial=0.01, backoff_max=0.01)
+
+    def tearDown(self):
+        """Stop the stub server"""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse(self):
+        """Test that sequential prompts share one pooled connection"""
+        for index in range(5):
+            self.assertEqual(self.client.generate(f"p{index}"), f"echo: p{index}")
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_stream_stops_at_budget(self):
+        """Test that streaming stops once the character budget is reached"""
+        fragments = list(self.client.stream("go", max_chars=12))
+        self.assertEqual(fragments, ["abcde", "abcde", "ab"])
+        self.assertEqual(len("".join(self.client.stream("go"))), 250)
+
+    def test_retries_then_raises_on_connection_error(self):
+        """Test that connection failures are retried and then surfaced"""
+        client = OllamaClient("http://127.0.0.1:9/api/generate", "m",
+                              retries=2, backoff_initial=0.01,
+                              backoff_max=0.01)
+        with self.assertRaises(Exception) as ctx:
+            client.generate("hello")
+        self.assertIsInstance(
+            ctx.exception.last_attempt.exception(),
+            requests.exceptions.ConnectionError,
+        )
+        self.assertEqual(ctx.exception.last_attempt.attempt_number, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
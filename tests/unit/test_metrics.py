@@ -0,0 +1,110 @@
+"""
+K.A.O.S. Unit Tests - Metrics Module
+Tests for sharded counters, latency histograms and Prometheus exposition
+"""
+
+import threading
+import unittest
+
+from monitoring.metrics import MetricsCollector, get_metrics_collector
+
+
+class TestMetricsCollector(unittest.TestCase):
+    """Test suite for MetricsCollector class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.collector = MetricsCollector()
+
+    def test_concurrent_counters_are_exact(self):
+        """Test that parallel writers never lose increments"""
+        def worker():
+            for _ in range(5000):
+                self.collector.record_cache_hit()
+                self.collector.record_request(0.001)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = self.collector.get_metrics()
+        self.assertEqual(snapshot["cache"]["hits"], 40000)
+        self.assertEqual(snapshot["requests"]["total"], 40000)
+        self.assertEqual(self.collector.metrics["requests_total"], 40000)
+
+    def test_threads_spread_across_shards(self):
+        """Test that concurrent writers do not all share one stripe"""
+        start = threading.Barrier(8)
+
+        def worker():
+            start.wait()
+            self.collector.record_request(0.001)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        used = [shard for shard in self.collector._shards
+                if shard.counters["requests_total"]]
+        self.assertEqual(len(used), 8)
+
+    def test_reset_applies_to_known_threads(self):
+        """Test that a thread keeps counting after reset"""
+        self.collector.record_request(0.001)
+        self.collector.reset()
+        self.collector.record_request(0.001)
+        self.assertEqual(self.collector.get_metrics()["requests"]["total"], 1)
+
+    def test_latency_percentiles(self):
+        """Test p50/p95/p99 estimates from the fixed buckets"""
+        for _ in range(90):
+            self.collector.record_request(0.002)
+        for _ in range(10):
+            self.collector.record_request(2.0, success=False)
+
+        requests = self.collector.get_metrics()["requests"]
+        self.assertLessEqual(requests["p50_ms"], 2.5)
+        self.assertGreater(requests["p95_ms"], 1000)
+        self.assertLessEqual(requests["p99_ms"], 2500)
+        self.assertAlmostEqual(requests["error_rate"], 0.1)
+
+    def test_prometheus_exposition(self):
+        """Test the Prometheus text format"""
+        self.collector.record_llm_query(0.3)
+        self.collector.record_breaker_state("open")
+        text = self.collector.render_prometheus()
+
+        self.assertIn("# TYPE kaos_llm_queries_total counter", text)
+        self.assertIn("kaos_llm_queries_total 1", text)
+        self.assertIn('kaos_llm_latency_seconds_bucket{le="0.25"} 0', text)
+        self.assertIn('kaos_llm_latency_seconds_bucket{le="0.5"} 1', text)
+        self.assertIn('kaos_llm_latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("kaos_llm_latency_seconds_count 1", text)
+        self.assertIn("kaos_llm_breaker_open 1", text)
+        self.assertIn("kaos_llm_breaker_opens_total 1", text)
+
+    def test_reset_and_singleton(self):
+        """Test reset and the shared collector instance"""
+        self.collector.record_fallback()
+        self.collector.reset()
+        self.assertEqual(self.collector.get_metrics()["fallback"]["activations"], 0)
+        self.assertIs(get_metrics_collector(), get_metrics_collector())
+
+    def test_brain_metrics_endpoint(self):
+        """Test the /metrics endpoint on the Brain"""
+        from backend.src.brain.app.main import app
+
+        client = app.test_client()
+        client.get("/api/v1/health")
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertIn(b"kaos_request_duration_seconds_count", response.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+K.A.O.S. Unit Tests - Pattern Matcher Module
+Tests for the combined destructive-pattern matcher
+"""
+
+import os
+import tempfile
+import unittest
+from backend.src.brain.app.core.patterns import PatternMatcher
+from backend.src.brain.app.core.analyzer import CommandAnalyzer
+
+
+class TestPatternMatcher(unittest.TestCase):
+    """Test suite for PatternMatcher class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.matcher = PatternMatcher(CommandAnalyzer.DESTRUCTIVE_PATTERNS)
+
+    def test_reports_matching_pattern(self):
+        """Test that the source pattern of a hit is returned"""
+        self.assertEqual(self.matcher.search("sudo RM -RF /"), r"rm\s+-rf")
+        self.assertEqual(self.matcher.search(":(){ :|: & };:"),
+                         r":\(\)\{\s*:\|:\s*&\s*\};:")
+        self.assertIsNone(self.matcher.search("nmap -sV localhost"))
+
+    def test_matches_per_pattern_search(self):
+        """Test parity with searching each pattern individually"""
+        import re
+
+        commands = [
+            "rm -rf /", "mkfs.ext4 /dev/sda1", "dd if=/dev/zero of=x",
+            "chmod 777 /", "chmod 755 /tmp", "echo hello", "ls -la",
+        ]
+        for command in commands:
+            expected = any(
+                re.search(p, command, re.IGNORECASE)
+                for p in CommandAnalyzer.DESTRUCTIVE_PATTERNS
+            )
+            self.assertEqual(self.matcher.search(command) is not None,
+                             expected, command)
+
+    def test_load_file_and_standalone_patterns(self):
+        """Test loading extra patterns, including unmergeable ones"""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt",
+                                         delete=False) as f:
+            f.write("# operator blocklist\n\nshred\\s+-u\n(\\w+)-\\1\n")
+        try:
+            self.assertEqual(self.matcher.load_file(f.name), 2)
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual(len(self.matcher), 7)
+        self.assertEqual(self.matcher.search("shred -u key"), r"shred\s+-u")
+        self.assertEqual(self.matcher.search("boom-boom"), r"(\w+)-\1")
+        self.assertIsNone(self.matcher.search("boom-bang"))
+
+    def test_search_many_matches_search(self):
+        """Test that one scan over many texts keeps per-text results"""
+        self.matcher.add_patterns([r"(\w+)-\1"])
+        texts = [
+            "ls", "sudo rm", "-rf /tmp", "boom", "-boom", "mkfs x",
+            "dd if=/dev/zero", "multi\nrm -rf /", "",
+        ]
+        self.assertEqual(self.matcher.search_many(texts),
+                         [self.matcher.search(t) for t in texts])
+        self.assertIsNone(self.matcher.search_many(["sudo rm", "-rf /tmp"])[0])
+
+        anchored = PatternMatcher([r"^rm\b", r"wipe$"])
+        self.assertEqual(anchored.search_many(["rm x", "x rm", "disk wipe"]),
+                         [r"^rm\b", None, r"wipe$"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+K.A.O.S. Unit Tests - Arm Prefetch Module
+Tests for debounced, cancellable speculative Brain analysis
+"""
+
+import threading
+import time
+import unittest
+
+from frontend.src.kaos_arm.prefetch import Prefetcher
+
+
+class SlowFetch:
+    """Fetch stub that records calls and polls for cancellation"""
+
+    def __init__(self, duration=0.1):
+        self.duration = duration
+        self.calls = []
+        self.aborted = []
+        self.started = threading.Event()
+
+    def __call__(self, text, cancelled):
+        self.calls.append(text)
+        self.started.set()
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline:
+            if cancelled():
+                self.aborted.append(text)
+                return None
+            time.sleep(0.005)
+        return {"proposed_command": "nmap " + text}
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Test suite for Prefetcher class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.fetch = SlowFetch()
+        self.prefetcher = Prefetcher(self.fetch, delay=0.05)
+
+    def tearDown(self):
+        """Stop the worker thread"""
+        self.prefetcher.close()
+
+    def test_only_paused_text_is_sent(self):
+        """Test that keystrokes inside the pause never reach the Brain"""
+        for prefix in ("scan", "scan t", "scan th", "scan the box"):
+            self.prefetcher.update(prefix)
+        time.sleep(0.25)
+        self.assertEqual(self.fetch.calls, ["scan the box"])
+        result = self.prefetcher.take("Scan the  box", timeout=0)
+        self.assertEqual(result["proposed_command"], "nmap scan the box")
+
+    def test_take_waits_for_inflight_request(self):
+        """Test that submitting mid-request reuses it instead of refetching"""
+        self.prefetcher.update("scan the box")
+        self.assertTrue(self.fetch.started.wait(1))
+        result = self.prefetcher.take("scan the box", timeout=1)
+        self.assertEqual(result["proposed_command"], "nmap scan the box")
+        self.assertEqual(len(self.fetch.calls), 1)
+
+    def test_stale_request_cancelled(self):
+        """Test that edits abort the in-flight request for older text"""
+        self.prefetcher.update("scan the box")
+        self.assertTrue(self.fetch.started.wait(1))
+        self.prefetcher.update("scan the box quietly")
+        self.assertIsNone(self.prefetcher.take("whoami please", timeout=0.5))
+        time.sleep(0.05)
+        self.assertEqual(self.fetch.aborted, ["scan the box"])
+        self.assertEqual(self.prefetcher.cancelled, 1)
+
+    def test_rejected_and_short_lines_skipped(self):
+        """Test the accept predicate and the minimum length"""
+        prefetcher = Prefetcher(self.fetch, delay=0.01,
+                                accept=lambda text: not text.startswith("ls"))
+        prefetcher.update("ls -la /tmp")
+        prefetcher.update("ip")
+        time.sleep(0.1)
+        self.assertIsNone(prefetcher.take("ls -la /tmp", timeout=0))
+        self.assertEqual(self.fetch.calls, [])
+        prefetcher.close()
+
+    def test_expired_results_discarded(self):
+        """Test that an old result is refetched rather than returned"""
+        fetch = SlowFetch(duration=0.01)
+        prefetcher = Prefetcher(fetch, delay=0.01, max_age=0.1)
+        prefetcher.update("scan the box")
+        time.sleep(0.2)
+        self.assertIsNone(prefetcher.take("scan the box", timeout=0))
+
+        prefetcher.update("scan the box")
+        time.sleep(0.05)
+        self.assertIsNotNone(prefetcher.take("scan the box", timeout=0))
+
+        prefetcher.update("scan the box")
+        time.sleep(0.2)
+        prefetcher.update("scan the box quietly")
+        prefetcher.update("scan the box")
+        time.sleep(0.05)
+        self.assertIsNotNone(prefetcher.take("scan the box", timeout=0))
+        self.assertEqual(len(fetch.calls), 4)
+        prefetcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
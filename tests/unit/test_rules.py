@@ -0,0 +1,138 @@
+"""
+K.A.O.S. Unit Tests - Rule Packs Module
+Tests for rule pack loading, cached artifacts and atomic swaps
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.analyzer import CommandAnalyzer, RiskLevel
+from backend.src.brain.app.core.rules import RulePack, load_rule_pack
+
+EXAMPLE_PACK = os.path.join(
+    os.path.dirname(__file__), "..", "..",
+    "backend", "src", "brain", "rules", "example.json",
+)
+
+
+class TestRulePack(unittest.TestCase):
+    """Test suite for RulePack and load_rule_pack"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        """Restore the built-in rules"""
+        CommandAnalyzer.install_rules(CommandAnalyzer.BUILTIN_RULES)
+        self.tmp.cleanup()
+
+    def write_pack(self, name, spec):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            json.dump(spec, f)
+        return path
+
+    def test_artifact_reused_on_restart(self):
+        """Test that an unchanged pack is loaded from its cached artifact"""
+        pack, cached = load_rule_pack(EXAMPLE_PACK, self.cache_dir)
+        self.assertFalse(cached)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        again, cached = load_rule_pack(EXAMPLE_PACK, self.cache_dir)
+        self.assertTrue(cached)
+        self.assertEqual(again.digest, pack.digest)
+        self.assertEqual(again.destructive.search("shred -u key"), r"shred\s+-u")
+        self.assertEqual(again.intents.rank("run sqlmap")[0][0], "sqlmap")
+
+    def test_shared_cache_dir_not_trusted(self):
+        """Test that a group or world writable cache is neither read nor written"""
+        load_rule_pack(EXAMPLE_PACK, self.cache_dir)
+        self.assertEqual(os.stat(self.cache_dir).st_mode & 0o777, 0o700)
+        os.chmod(self.cache_dir, 0o777)
+        with mock.patch("pickle.load") as load:
+            _, cached = load_rule_pack(EXAMPLE_PACK, self.cache_dir)
+        self.assertFalse(cached)
+        load.assert_not_called()
+
+        os.chmod(self.cache_dir, 0o700)
+        artifact = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        os.chmod(artifact, 0o666)
+        _, cached = load_rule_pack(EXAMPLE_PACK, self.cache_dir)
+        self.assertFalse(cached)
+
+    def test_yaml_pack(self):
+        """Test that YAML and JSON packs compile alike"""
+        path = os.path.join(self.tmp.name, "pack.yaml")
+        with open(path, "w") as f:
+            f.write("name: yaml\nversion: 2\n"
+                    "destructive_patterns: ['wipefs']\n"
+                    "intents:\n  - {keyword: hydra, tool: unknown}\n")
+        pack, _ = load_rule_pack(path)
+        self.assertEqual((pack.name, pack.version), ("yaml", 2))
+        self.assertEqual(pack.destructive.search("wipefs -a /dev/sdb"), "wipefs")
+
+    def test_risk_overrides(self):
+        """Test that overrides replace the heuristic verdict"""
+        pack, _ = load_rule_pack(EXAMPLE_PACK)
+        CommandAnalyzer.install_rules(pack)
+        result = CommandAnalyzer.analyze("sqlmap -u http://t/?id=1 --os-shell")
+        self.assertEqual(result["risk"], RiskLevel.HIGH.value)
+        self.assertTrue(result["allowed"])
+        self.assertIn("OS takeover", result["reasoning"])
+        self.assertNotIn("matched_override",
+                         CommandAnalyzer.analyze("sqlmap -u http://t/?id=1"))
+
+    def test_invalid_packs_rejected(self):
+        """Test schema and enum validation"""
+        with self.assertRaises(ValueError):
+            RulePack({"intents": [{"keyword": "scan"}]})
+        with self.assertRaises(ValueError):
+            CommandAnalyzer.install_rules(
+                RulePack({"intents": [{"keyword": "scan", "tool": "nessus"}]})
+            )
+        self.assertIs(CommandAnalyzer.rules(), CommandAnalyzer.BUILTIN_RULES)
+
+    def test_reload_endpoint_swaps_pack(self):
+        """Test hot swapping through /api/v1/rules/reload"""
+        client = main.app.test_client()
+        path = self.write_pack("pack.json", {
+            "name": "hot", "version": 7, "destructive_patterns": ["wipefs"],
+        })
+        with mock.patch.multiple(main, RULE_PACK=path,
+                                 RULE_CACHE_DIR=self.cache_dir):
+            response = client.post("/api/v1/rules/reload")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data)["version"], 7)
+            self.assertTrue(CommandAnalyzer.check_destructive("wipefs -a"))
+            self.assertFalse(CommandAnalyzer.check_destructive("rm -rf /"))
+
+            with open(path, "w") as f:
+                f.write("{broken")
+            response = client.post("/api/v1/rules/reload")
+            self.assertEqual(response.status_code, 400)
+            info = json.loads(client.get("/api/v1/rules").data)
+            self.assertEqual(info["name"], "hot")
+
+    def test_reload_endpoint_is_local_only(self):
+        """Test that remote clients cannot trigger a rule reload"""
+        client = main.app.test_client()
+        with mock.patch.object(main, "load_rules",
+                               return_value={"name": "builtin"}) as load:
+            response = client.post("/api/v1/rules/reload",
+                                   environ_base={"REMOTE_ADDR": "10.0.0.9"})
+            self.assertEqual(response.status_code, 403)
+            load.assert_not_called()
+            response = client.post("/api/v1/rules/reload",
+                                   environ_base={"REMOTE_ADDR": "::1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(main.is_local_client(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
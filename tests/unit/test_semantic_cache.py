@@ -0,0 +1,126 @@
+"""
+K.A.O.S. Unit Tests - Semantic Cache Module
+Tests for the hashed n-gram vectorizer and the NumPy similarity cache
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.semantic_cache import (
+    HashingVectorizer,
+    SemanticCache,
+    command_signature,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSemanticCache(unittest.TestCase):
+    """Test suite for SemanticCache class"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        self.clock = FakeClock()
+        self.cache = SemanticCache(max_entries=3, threshold=0.8, ttl=60,
+                                   clock=self.clock)
+
+    def test_rephrased_prompts_hit(self):
+        """Test that paraphrases share an answer and flags do not"""
+        self.cache.add("scan the box", "recon insight")
+        for prompt in ("scan host", "Scan  the TARGET", "port scan target"):
+            hit = self.cache.lookup(prompt)
+            self.assertIsNotNone(hit, prompt)
+            self.assertEqual(hit[0], "recon insight")
+
+        self.cache.add("nmap -sV 10.0.0.1", "version scan")
+        self.assertIsNone(self.cache.lookup("nmap -sC 10.0.0.1"))
+        self.assertIsNone(self.cache.lookup("inject sql into the login form"))
+
+    def test_flag_set_must_match(self):
+        """Test that an added or different flag never reuses an answer"""
+        cache = SemanticCache(max_entries=8, clock=self.clock)
+        cache.add("sqlmap -u http://10.0.0.5/item.php?id=1", "plain")
+        cache.add("nmap -sV 10.0.0.1", "version scan")
+
+        self.assertIsNone(
+            cache.lookup("sqlmap -u http://10.0.0.5/item.php?id=1 --os-shell"))
+        self.assertIsNone(cache.lookup("nmap -sV 10.0.0.1 --script vuln"))
+        self.assertIsNone(cache.lookup("masscan -sV 10.0.0.1"))
+        self.assertEqual(cache.lookup("NMAP 10.0.0.1 -sV")[0], "version scan")
+
+    def test_tool_lines_and_prose_do_not_mix(self):
+        """Test that only tool invocations are gated on tool and flags"""
+        self.assertEqual(command_signature("port scan target"),
+                         ("", "port scan target"))
+        self.assertEqual(command_signature("nmap 10.0.0.1"), ("nmap", "10.0.0.1"))
+        self.assertEqual(command_signature("run it -v now"), ("run -v", "it now"))
+
+        self.cache.add("nmap 10.0.0.1", "tool answer")
+        self.assertIsNone(self.cache.lookup("scan 10.0.0.1"))
+        self.assertIsNone(self.cache.lookup("masscan 10.0.0.1"))
+
+    def test_vectors_are_normalized(self):
+        """Test that identical text embeds to a unit vector"""
+        vectorizer = HashingVectorizer(dim=256)
+        vector = vectorizer.transform("sqlmap --dbs")
+        self.assertAlmostEqual(float(vector @ vector), 1.0, places=5)
+        self.assertTrue((vector == vectorizer.transform("SQLMAP  --dbs")).all())
+
+    def test_lru_eviction_and_ttl(self):
+        """Test bounded size, LRU replacement and expiry"""
+        self.cache.add("scan host", "a")
+        self.cache.add("inject payload", "b")
+        self.cache.add("msfconsole handler", "c")
+        self.clock.now += 1
+        self.cache.lookup("scan host")  # refresh
+        self.cache.add("hello brain", "d")
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.lookup("inject payload"))
+        self.assertEqual(self.cache.lookup("scan host")[0], "a")
+
+        self.clock.now += 61
+        self.assertIsNone(self.cache.lookup("scan host"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_snapshot_round_trip(self):
+        """Test that a snapshot restores entries for the same tag only"""
+        self.cache.add("scan host", "recon insight")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "semantic.npz")
+            self.assertEqual(self.cache.save(path, tag="mistral"), 1)
+
+            restored = SemanticCache(max_entries=3, clock=self.clock)
+            self.assertEqual(restored.load(path, tag="mistral"), 1)
+            self.assertEqual(restored.lookup("scan the box")[0], "recon insight")
+
+            other = SemanticCache(max_entries=3, clock=self.clock)
+            self.assertEqual(other.load(path, tag="llama3"), 0)
+            self.assertEqual(other.load(os.path.join(tmp, "missing.npz")), 0)
+
+    def test_brain_skips_llm_for_paraphrase(self):
+        """Test that the Brain answers a rephrased prompt from the cache"""
+        main.analysis_cache.clear()
+        main.metrics.reset()
+        enabled = SemanticCache(max_entries=16, clock=self.clock)
+        with mock.patch.object(main, "semantic_cache", enabled), \
+                mock.patch.object(main, "query_ollama", return_value="insight") as llm:
+            self.assertEqual(main.cached_llm_reasoning("scan the box"), "insight")
+            self.assertEqual(main.cached_llm_reasoning("scan host"), "insight")
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(main.metrics.get_metrics()["cache"]["semantic_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+K.A.O.S. Unit Tests - Single-Flight Module
+Tests for coalescing identical concurrent LLM calls
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.singleflight import (
+    AsyncSingleFlight,
+    SingleFlight,
+)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test suite for SingleFlight and AsyncSingleFlight"""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that concurrent callers for one key run fn once"""
+        flight = SingleFlight()
+        calls = []
+        results = []
+        start = threading.Barrier(5)
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "answer"
+
+        def worker():
+            start.wait()
+            results.append(flight.do("key", slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results),
+                         [False, True, True, True, True])
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_errors_fan_out(self):
+        """Test that the leader's exception reaches every waiter"""
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("key", lambda: (_ for _ in ()).throw(ValueError("x")))
+        self.assertEqual(flight.do("key", lambda: 1), (1, False))
+
+    def test_async_callers_share_one_call(self):
+        """Test coalescing of coroutine calls on one event loop"""
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("key", slow) for _ in range(4))
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([shared for _, shared in results].count(True), 3)
+
+    def test_async_cancelled_caller_does_not_cancel_others(self):
+        """Test that a cancelled leader leaves followers their result"""
+        flight = AsyncSingleFlight()
+        started = []
+
+        async def slow():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("key", slow))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("key", slow))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            result = await follower
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return result
+
+        self.assertEqual(asyncio.run(run()), ("answer", True))
+        self.assertEqual(len(started), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_async_call_cancelled_without_callers(self):
+        """Test that the shared call stops once every caller is gone"""
+        flight = AsyncSingleFlight()
+        events = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+
+        async def run():
+            callers = [asyncio.ensure_future(flight.do("key", slow))
+                       for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0)
+            self.assertEqual(flight.in_flight(), 0)
+            # A new caller starts a fresh call instead of joining the dead one
+            return await flight.do("key", lambda: asyncio.sleep(0, "fresh"))
+
+        self.assertEqual(asyncio.run(run()), ("fresh", False))
+        self.assertEqual(events, ["cancelled"])
+
+    def test_brain_records_coalesced_calls(self):
+        """Test that coalesced LLM calls are counted in the metrics"""
+        main.analysis_cache.clear()
+        main.semantic_cache.clear()
+        main.metrics.reset()
+
+        def slow_llm(prompt):
+            time.sleep(0.1)
+            return "insight"
+
+        with mock.patch.object(main, "query_ollama", side_effect=slow_llm) as llm:
+            threads = [
+                threading.Thread(
+                    target=main.cached_llm_reasoning, args=("scan the lab",)
+                )
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(llm.call_count, 1)
+        llm_metrics = main.metrics.get_metrics()["llm"]
+        self.assertEqual(llm_metrics["coalesced_total"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
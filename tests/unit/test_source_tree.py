@@ -0,0 +1,203 @@
+"""
+K.A.O.S. Unit Tests - Source Tree Module
+Tests for .gitignore-style exclusions, the pruning tree walk and
+reproducible archives
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from scripts.artifacts import source_tree
+from scripts.artifacts.source_tree import (
+    DEFAULT_EXCLUDES,
+    ExclusionRules,
+    add_entries_normalized,
+    add_tree,
+    load_manifest,
+    save_manifest,
+    scan_tree,
+    tree_key,
+    walk,
+)
+
+
+class TestExclusionRules(unittest.TestCase):
+    """Test suite for ExclusionRules"""
+
+    def test_gitignore_semantics(self):
+        """Test anchoring, directory-only patterns, globs and comments"""
+        rules = ExclusionRules([
+            "# comment",
+            "",
+            "*.log",
+            "/build",
+            "cache/",
+            "docs/**/*.tmp",
+            "data?.[ch]sv",
+        ])
+        self.assertTrue(rules.excluded("app.log"))
+        self.assertTrue(rules.excluded("deep/dir/app.log"))
+        self.assertTrue(rules.excluded("build", is_dir=True))
+        self.assertFalse(rules.excluded("src/build", is_dir=True))
+        self.assertTrue(rules.excluded("src/cache", is_dir=True))
+        self.assertFalse(rules.excluded("src/cache"))
+        self.assertTrue(rules.excluded("docs/x.tmp"))
+        self.assertTrue(rules.excluded("docs/a/b/x.tmp"))
+        self.assertFalse(rules.excluded("x.tmp"))
+        self.assertTrue(rules.excluded("data1.csv"))
+        self.assertFalse(rules.excluded("data12.csv"))
+        self.assertFalse(rules.excluded("# comment"))
+
+    def test_negation_last_match_wins(self):
+        """Test that ! re-includes and later patterns override earlier ones"""
+        rules = ExclusionRules(["*.log", "!keep.log", "logs/keep.log"])
+        self.assertTrue(rules.excluded("a.log"))
+        self.assertFalse(rules.excluded("keep.log"))
+        self.assertTrue(rules.excluded("logs/keep.log"))
+
+    def test_defaults_match_previous_filter(self):
+        """Test the default exclusions"""
+        rules = ExclusionRules(DEFAULT_EXCLUDES)
+        for path in (".git", "a/.venv", "venv", "pkg/__pycache__",
+                     "backups", "m.pyc", "x/y.log"):
+            self.assertTrue(rules.excluded(path, is_dir=True), path)
+        self.assertFalse(rules.excluded("src/main.py"))
+        self.assertFalse(rules.excluded("my.venv.txt"))
+
+
+class TestTreeWalk(unittest.TestCase):
+    """Test suite for walk and add_tree"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ("b/z.py", "b/a.py", "a.txt", "c.log",
+                     ".venv/lib/site.py", "b/__pycache__/a.pyc"):
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as f:
+                f.write(path)
+        os.symlink("a.txt", os.path.join(self.root, "link"))
+        self.rules = ExclusionRules(DEFAULT_EXCLUDES)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_walk_order_and_pruning(self):
+        """Test depth-first name order with excluded subtrees never listed"""
+        listed = []
+        real_scandir = os.scandir
+
+        def scandir(path):
+            listed.append(os.path.relpath(path, self.root))
+            return real_scandir(path)
+
+        with mock.patch.object(source_tree.os, "scandir", scandir):
+            paths = [rel for rel, _ in walk(self.root, self.rules)]
+
+        self.assertEqual(paths, ["a.txt", "b", "b/a.py", "b/z.py", "link"])
+        self.assertEqual(sorted(listed), [".", "b"])
+
+    def test_add_tree_matches_tarfile_add(self):
+        """Test that add_tree writes the same members as tarfile.add"""
+        def skip(tarinfo):
+            return None if self.rules.excluded(tarinfo.name[2:]) else tarinfo
+
+        archives = {}
+        for name in ("walked", "added"):
+            path = os.path.join(self.root, f"{name}.tar")
+            with tarfile.open(path, "w") as tar:
+                if name == "walked":
+                    add_tree(tar, self.root, self.rules, threads=2)
+                else:
+                    tar.add(self.root, arcname=".", filter=skip)
+            with tarfile.open(path) as tar:
+                archives[name] = [
+                    (m.name, m.type, m.size, m.mode, m.linkname)
+                    for m in tar.getmembers() if "tar" not in m.name
+                ]
+        self.assertEqual(archives["walked"], archives["added"])
+
+
+class TestReproducibleArchives(unittest.TestCase):
+    """Test suite for the cached manifest and normalized archives"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path, mode in (("run.sh", 0o775), ("src/app.py", 0o600)):
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as f:
+                f.write(path)
+            os.chmod(full, mode)
+        self.rules = ExclusionRules(["*.json"])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def hash_file(self, path):
+        self.hashed.append(os.path.relpath(path, self.root))
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def scan(self, previous=None):
+        self.hashed = []
+        entries, _ = scan_tree(self.root, self.rules, self.hash_file, previous)
+        return entries
+
+    def archive(self, entries):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            add_entries_normalized(tar, self.root, entries, mtime=1700000000)
+        return buffer.getvalue()
+
+    def test_unchanged_files_are_not_rehashed(self):
+        """Test that size and mtime matches reuse the manifest hash"""
+        manifest_path = os.path.join(self.root, "manifest.json")
+        entries = self.scan()
+        self.assertEqual(sorted(self.hashed), ["run.sh", "src/app.py"])
+        save_manifest(manifest_path, {"key": tree_key(entries), "entries": entries})
+
+        previous = load_manifest(manifest_path)
+        self.assertEqual(self.scan(previous), entries)
+        self.assertEqual(self.hashed, [])
+
+        with open(os.path.join(self.root, "run.sh"), "a") as f:
+            f.write("\necho changed")
+        changed = self.scan(previous)
+        self.assertEqual(self.hashed, ["run.sh"])
+        self.assertNotEqual(tree_key(changed), tree_key(entries))
+
+    def test_archive_ignores_mtime_and_owner(self):
+        """Test that touching files changes neither the key nor the bytes"""
+        entries = self.scan()
+        first = self.archive(entries)
+        os.utime(os.path.join(self.root, "src/app.py"), (0, 0))
+        touched = self.scan()
+
+        self.assertEqual(tree_key(touched), tree_key(entries))
+        self.assertEqual(self.archive(touched), first)
+        with tarfile.open(fileobj=io.BytesIO(first)) as tar:
+            members = {m.name: m for m in tar.getmembers()}
+        self.assertEqual(list(members), [".", "./run.sh", "./src", "./src/app.py"])
+        self.assertEqual(members["./run.sh"].mode, 0o755)
+        self.assertEqual(members["./src/app.py"].mode, 0o644)
+        self.assertEqual({(m.uid, m.uname, m.mtime) for m in members.values()},
+                         {(0, "", 1700000000)})
+
+    def test_stale_manifest_ignored(self):
+        """Test that missing or foreign manifests are treated as absent"""
+        path = os.path.join(self.root, "manifest.json")
+        self.assertIsNone(load_manifest(path))
+        with open(path, "w") as f:
+            f.write('{"format": 99}')
+        self.assertIsNone(load_manifest(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
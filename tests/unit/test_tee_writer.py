@@ -0,0 +1,126 @@
+"""
+K.A.O.S. Unit Tests - Tee Writer Module
+Tests for hashing and signing archives while they are written
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+import gnupg
+
+from frontend.tools.backup.compression import open_compressed
+from frontend.tools.backup.tee_writer import GpgPipeSigner, TeeWriter, file_digests
+
+
+class TestTeeWriter(unittest.TestCase):
+    """Test suite for TeeWriter and file_digests"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_digest_matches_written_archive(self):
+        """Test that the streamed hash equals a hash of the file on disk"""
+        source = os.path.join(self.tmp, "src")
+        os.makedirs(source)
+        with open(os.path.join(source, "data.bin"), "wb") as f:
+            f.write(os.urandom(300000))
+
+        path = os.path.join(self.tmp, "out.tar.gz")
+        with open(path, "wb") as out:
+            tee = TeeWriter(out, ("sha256", "md5"))
+            with open_compressed(tee, "gzip", threads=2) as stream:
+                with tarfile.open(fileobj=stream, mode="w|") as tar:
+                    tar.add(source, arcname=".")
+
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertEqual(tee.bytes_written, len(data))
+        self.assertEqual(tee.hexdigests(), {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "md5": hashlib.md5(data).hexdigest(),
+        })
+        self.assertEqual(file_digests(path)["sha256"], tee.hexdigests()["sha256"])
+        gzip.decompress(data)
+
+    def test_sinks_receive_same_bytes(self):
+        """Test that extra sinks see every write in order"""
+        sink = io.BytesIO()
+        tee = TeeWriter(io.BytesIO(), sinks=[sink])
+        tee.write(b"abc")
+        tee.write(b"def")
+        self.assertEqual(sink.getvalue(), b"abcdef")
+        self.assertEqual(tee.tell(), 6)
+
+    def test_file_digests_empty_file(self):
+        """Test that empty files, which cannot be mmapped, still hash"""
+        path = os.path.join(self.tmp, "empty")
+        open(path, "wb").close()
+        self.assertEqual(
+            file_digests(path), {"sha256": hashlib.sha256(b"").hexdigest()}
+        )
+
+    def test_unknown_algorithm(self):
+        """Test that unsupported algorithms are rejected up front"""
+        with self.assertRaises(ValueError):
+            TeeWriter(io.BytesIO(), ("nope",))
+
+
+@unittest.skipUnless(shutil.which("gpg"), "gpg is not installed")
+class TestGpgPipeSigner(unittest.TestCase):
+    """Test suite for streamed detached signatures"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.home = tempfile.mkdtemp()
+        cls.gpg = gnupg.GPG(gnupghome=cls.home)
+        key_input = cls.gpg.gen_key_input(
+            key_type="RSA", key_length=2048, name_email="backup@kaos.test",
+            no_protection=True,
+        )
+        if not cls.gpg.gen_key(key_input):
+            raise unittest.SkipTest("gpg key generation failed")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.home, ignore_errors=True)
+
+    def test_signature_verifies_against_file(self):
+        """Test that a signature of the stream verifies the written file"""
+        path = os.path.join(self.home, "archive.bin")
+        signer = GpgPipeSigner(self.gpg, path + ".sig")
+        with open(path, "wb") as out:
+            tee = TeeWriter(out, sinks=[signer])
+            for _ in range(32):
+                tee.write(os.urandom(65536))
+        self.assertTrue(signer.close())
+
+        with open(path + ".sig", "rb") as sig:
+            verified = self.gpg.verify_file(sig, path)
+        self.assertTrue(verified.valid)
+
+    def test_failed_signing_does_not_block_writer(self):
+        """Test that writes keep flowing when gpg cannot sign"""
+        empty_home = tempfile.mkdtemp()
+        try:
+            signer = GpgPipeSigner(
+                gnupg.GPG(gnupghome=empty_home), os.path.join(empty_home, "x.sig")
+            )
+            tee = TeeWriter(io.BytesIO(), sinks=[signer])
+            for _ in range(64):
+                tee.write(b"\0" * 65536)
+            self.assertFalse(signer.close())
+        finally:
+            shutil.rmtree(empty_home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+K.A.O.S. Unit Tests - Tracing Module
+Tests for per-stage spans, Server-Timing headers and slow-request profiles
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from backend.src.brain.app import asgi, main
+from backend.src.brain.app.core.tracing import (
+    RequestTrace,
+    SamplingProfiler,
+    span,
+)
+
+
+class TestRequestTrace(unittest.TestCase):
+    """Test suite for RequestTrace and SamplingProfiler"""
+
+    def test_spans_and_server_timing(self):
+        """Test that repeated spans are summed and reported in order"""
+        recorded = []
+        trace = RequestTrace(on_span=lambda name, d: recorded.append(name))
+        with trace.span("decode"):
+            pass
+        with trace.span("validate"):
+            pass
+        with trace.span("decode"):
+            pass
+
+        header = trace.server_timing()
+        self.assertEqual(
+            [entry.split(";")[0] for entry in header.split(", ")],
+            ["decode", "validate", "total"],
+        )
+        self.assertEqual(recorded, ["decode", "validate", "decode"])
+
+    def test_span_outside_trace_is_noop(self):
+        """Test that helpers can be timed without an active request"""
+        with span("analyze"):
+            value = 42
+        self.assertEqual(value, 42)
+
+    def test_profiler_dumps_slow_requests_only(self):
+        """Test that folded stacks are written above the threshold"""
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SamplingProfiler(
+                slow_threshold=0.05, interval=0.001, output_dir=tmp
+            )
+            fast = profiler.start()
+            self.assertIsNone(profiler.stop(fast, 0.001, "POST /fast"))
+
+            ident = profiler.start()
+            time.sleep(0.06)
+            path = profiler.stop(ident, 0.06, "POST /api/v1/analyze")
+
+            self.assertTrue(os.path.basename(path).endswith("ms.folded"))
+            with open(path) as handle:
+                lines = handle.read().splitlines()
+            self.assertTrue(lines)
+            self.assertIn("test_profiler_dumps_slow_requests_only", lines[0])
+            self.assertTrue(lines[0].rsplit(" ", 1)[1].isdigit())
+
+
+class TestBrainTracing(unittest.TestCase):
+    """Test suite for tracing on the Flask and ASGI Brain apps"""
+
+    def setUp(self):
+        """Initialize test fixtures"""
+        main.analysis_cache.clear()
+        main.semantic_cache.clear()
+        main.metrics.reset()
+
+    def test_flask_server_timing_and_stage_histograms(self):
+        """Test the Server-Timing header and per-stage metrics"""
+        with mock.patch.object(main, "query_ollama", return_value="insight"):
+            response = main.app.test_client().post(
+                "/api/v1/analyze",
+                data=json.dumps({"command": "scan the perimeter"}),
+            )
+
+        timing = response.headers["Server-Timing"]
+        for stage in ("decode", "validate", "analyze", "llm", "encode", "total"):
+            self.assertIn(f"{stage};dur=", timing)
+
+        stages = main.metrics.get_metrics()["stages"]
+        self.assertEqual(stages["llm"]["count"], 1)
+        self.assertIn(
+            'kaos_stage_duration_seconds_count{stage="validate"} 1',
+            main.metrics.render_prometheus(),
+        )
+
+    def test_asgi_server_timing(self):
+        """Test the Server-Timing header in the async serving mode"""
+        with TestClient(asgi.app) as client:
+            response = client.post("/api/v1/analyze",
+                                   json={"command": "hello brain"})
+        timing = response.headers["server-timing"]
+        self.assertIn("analyze;dur=", timing)
+        self.assertNotIn("llm;dur=", timing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+K.A.O.S. Unit Tests - Validator Module
+Tests for the scope engine behind TargetValidator
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from backend.src.brain.app import main
+from backend.src.brain.app.core.validator import (
+    DomainTrie,
+    IntervalIndex,
+    ScopeEngine,
+    TargetValidator,
+    extract_targets,
+)
+
+SCOPE = """
+# Engagement 42
+10.0.0.0/8
+!10.0.5.0/24       # client VPN
+2001:db8::/32
+192.168.1.10-192.168.1.20
+example.com
+*.example.com
+!vpn.example.com
+"""
+
+
+class TestScopeIndexes(unittest.TestCase):
+    """Test suite for IntervalIndex and DomainTrie"""
+
+    def test_intervals_are_merged(self):
+        """Test containment across adjacent and overlapping ranges"""
+        index = IntervalIndex([(10, 20), (21, 30), (25, 40), (100, 200)])
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.covers(15, 35))
+        self.assertFalse(index.covers(35, 120))
+        self.assertTrue(index.overlaps(35, 120))
+        self.assertFalse(index.overlaps(41, 99))
+
+    def test_domain_trie_wildcards(self):
+        """Test exact hosts versus wildcard subdomains"""
+        trie = DomainTrie()
+        trie.add("example.com")
+        trie.add("*.corp.example.org")
+        self.assertTrue(trie.match("example.com"))
+        self.assertFalse(trie.match("www.example.com"))
+        self.assertTrue(trie.match("a.b.corp.example.org"))
+        self.assertFalse(trie.match("corp.example.org"))
+
+    def test_extract_targets(self):
+        """Test target extraction from typical commands"""
+        command = ("nmap -sV -oX scan.xml 10.0.0.1:22 [2001:db8::1]:443 "
+                   "https://www.example.com/login admin@vpn.example.com")
+        self.assertEqual(
+            list(extract_targets(command)),
+            ["10.0.0.1", "2001:db8::1", "www.example.com", "vpn.example.com"],
+        )
+
+
+class TestTargetValidator(unittest.TestCase):
+    """Test suite for TargetValidator with a scope file"""
+
+    def setUp(self):
+        """Write the scope file"""
+        handle = tempfile.NamedTemporaryFile("w", suffix=".scope", delete=False)
+        handle.write(SCOPE)
+        handle.close()
+        self.path = handle.name
+        TargetValidator.load_scope(self.path)
+
+    def tearDown(self):
+        """Restore Pentest Mode"""
+        TargetValidator.load_scope(None)
+        os.unlink(self.path)
+
+    def test_scope_decisions(self):
+        """Test included, excluded and out-of-scope targets"""
+        cases = {
+            "nmap -sV 10.1.2.3": True,
+            "nmap 10.0.5.7": False,
+            "nmap 10.0.0.0/16": False,  # overlaps the excluded /24
+            "nmap 192.168.1.12-18": True,
+            "nmap 192.168.1.12-30": False,
+            "curl https://www.example.com/": True,
+            "ssh root@vpn.example.com": False,
+            "nmap -6 2001:db8::dead:beef": True,
+            "ping google.com": False,
+            "cat loot.txt": True,
+            "hello": True,
+            "sudo nmap -sV evil.org": False,
+            "gobuster dns -d evil.org -w common.words": False,
+            "sqlmap -u http://evil.org/?id=1 --batch": False,
+            "hydra -L users.list evil.org ssh": False,
+            "nmap -iL hosts.list 10.1.1.1": True,
+        }
+        for command, expected in cases.items():
+            with self.subTest(command=command):
+                allowed, _ = TargetValidator.validate_target(command)
+                self.assertEqual(allowed, expected)
+
+    def test_file_and_option_values_are_not_hosts(self):
+        """Test that file names and option values are not taken for domains"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(os.chdir, os.getcwd())
+            os.chdir(tmp)
+            open("targets.zone", "w").close()
+            commands = [
+                "msfconsole -r setup.rc",
+                "hydra -L users.list 10.0.0.1 ssh",
+                "sqlmap -r request.req --batch",
+                "gobuster dir -u https://www.example.com -w common.words",
+                "cat notes.docx",
+                "echo hello.world",
+                "nmap -sV targets.zone",
+            ]
+            for command in commands:
+                with self.subTest(command=command):
+                    self.assertEqual(
+                        TargetValidator.validate_target(command),
+                        (True, "Targets in scope"),
+                    )
+
+    def test_hot_reload(self):
+        """Test that an edited scope file is picked up without restart"""
+        engine = ScopeEngine(self.path, reload_interval=0)
+        self.assertFalse(engine.check("nmap 172.16.0.1")[0])
+        with open(self.path, "a") as handle:
+            handle.write("172.16.0.0/12\n")
+        self.assertTrue(engine.check("nmap 172.16.0.1")[0])
+
+        os.unlink(self.path)
+        self.assertTrue(engine.check("nmap 172.16.0.1")[0])  # keeps last scope
+        with open(self.path, "w") as handle:
+            handle.write(SCOPE)
+
+    def test_brain_rejects_out_of_scope(self):
+        """Test that the Brain answers 403 for out-of-scope targets"""
+        response = main.app.test_client().post(
+            "/api/v1/analyze", data=json.dumps({"command": "nmap 8.8.8.8"})
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("out of scope", json.loads(response.data)["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()